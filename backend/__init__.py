@@ -1,12 +1,47 @@
 """
 Initialize the backend package.
+
+Public names are imported on first access, so `import backend` (and running any
+`python -m backend.<module>` entry point) does not load langchain, Chroma or the
+embedding stack until they are actually used.
 """
-from .audio_processing import preprocess_audio_file
-from .model_services import get_available_models, get_available_whisper_models
-from .summarizer import translate_and_summarize
-
-# Import RAG application functions
-from .populate_database import main as update_chroma_database
-from .rag_app.get_chroma_db import get_chroma_db
-from .rag_app.get_embedding_function import get_embedding_function
-from .rag_app.query_rag import query_rag
\ No newline at end of file
+import importlib
+
+_exports = {
+    "get_cache_stats": ".artifact_cache",
+    "preprocess_audio_file": ".audio_processing",
+    "prepare_audio_for_whisper": ".audio_processing",
+    "get_job_manager": ".jobs",
+    "QueueFullError": ".jobs",
+    "get_ollama_client": ".ollama_client",
+    "OllamaClient": ".ollama_client",
+    "AsyncOllamaClient": ".ollama_client",
+    "OllamaError": ".ollama_client",
+    "get_available_models": ".model_services",
+    "get_available_whisper_models": ".model_services",
+    "translate_and_summarize": ".summarizer",
+    "stream_summary": ".summarizer",
+    # RAG application functions
+    "update_chroma_database": (".populate_database", "main"),
+    "get_chroma_db": ".rag_app.get_chroma_db",
+    "get_embedding_function": ".rag_app.get_embedding_function",
+    "query_rag": ".rag_app.query_rag",
+    "stream_query_rag": ".rag_app.query_rag",
+    "invalidate_resources": ".rag_app.resources",
+    "warmup_resources": ".rag_app.resources",
+}
+
+__all__ = list(_exports)
+
+def __getattr__(name: str):
+    target = _exports.get(name)
+    if target is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    module_name, attribute = target if isinstance(target, tuple) else (target, name)
+    value = getattr(importlib.import_module(module_name, __name__), attribute)
+    # Cache on the package so later lookups skip __getattr__
+    globals()[name] = value
+    return value
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
@@ -0,0 +1,115 @@
+import hashlib
+import os
+import tempfile
+import threading
+
+# Cache directories in the root directory
+CACHE_DIR = os.path.join("data", "cache")
+TRANSCRIPT_CACHE_DIR = os.path.join(CACHE_DIR, "transcripts")
+SUMMARY_CACHE_DIR = os.path.join(CACHE_DIR, "summaries")
+
+# Size bounds for each layer; the least recently used entries are evicted first
+TRANSCRIPT_CACHE_MAX_BYTES = 256 * 1024 * 1024
+SUMMARY_CACHE_MAX_BYTES = 32 * 1024 * 1024
+
+class ArtifactCache:
+    """
+    On-disk, content-addressed text cache with size-bounded LRU eviction.
+
+    Every entry is one file named after its key. Reads refresh the file's
+    modification time, so eviction can simply remove the oldest files until the
+    directory fits in `max_bytes` again.
+    """
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.txt")
+
+    def get(self, key: str) -> str | None:
+        """Returns the cached text for `key`, or None on a miss."""
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                value = f.read()
+            os.utime(path)  # Mark as recently used
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return value
+
+    def put(self, key: str, value: str):
+        """Stores `value` under `key` and evicts old entries if the layer is over its bound."""
+        os.makedirs(self.directory, exist_ok=True)
+        # Write to a temporary file first so readers never see a partial entry
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(value)
+        os.replace(tmp_path, self._path(key))
+        self.evict()
+
+    def evict(self):
+        """Removes least recently used entries until the layer fits in `max_bytes`."""
+        with self._lock:
+            try:
+                entries = [
+                    entry for entry in os.scandir(self.directory)
+                    if entry.is_file() and entry.name.endswith(".txt")
+                ]
+            except FileNotFoundError:
+                return
+            stats = [(entry.stat(), entry.path) for entry in entries]
+            total = sum(stat.st_size for stat, _ in stats)
+            for stat, path in sorted(stats, key=lambda item: item[0].st_mtime):
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                    total -= stat.st_size
+                except FileNotFoundError:
+                    pass
+
+    def stats(self) -> dict:
+        """Returns the hit/miss counters for this layer."""
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses}
+
+def hash_file(file_path: str, block_size: int = 1024 * 1024) -> str:
+    """Returns the SHA-256 of a file's bytes, read in blocks."""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def hash_text(text: str) -> str:
+    """Returns the SHA-256 of a string encoded as UTF-8."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+def transcript_cache_key(file_hash: str, whisper_model_name: str, settings: str = "") -> str:
+    """
+    Key for a transcript: the input bytes, the Whisper model that produced it, and the
+    other transcription settings (see transcription.transcription_settings).
+    """
+    # Entries hold serialized TranscriptSegments; the suffix keeps older plain-text entries from matching
+    return hash_text(f"{file_hash}\0{whisper_model_name}\0segments\0{settings}")
+
+def summary_cache_key(transcript: str, llm_model_name: str, context: str, language: str) -> str:
+    """Key for a summary: everything that goes into the summary prompt."""
+    return hash_text(f"{hash_text(transcript)}\0{llm_model_name}\0{context or ''}\0{language}")
+
+# Shared cache layers used by the summarizer
+transcript_cache = ArtifactCache(TRANSCRIPT_CACHE_DIR, TRANSCRIPT_CACHE_MAX_BYTES)
+summary_cache = ArtifactCache(SUMMARY_CACHE_DIR, SUMMARY_CACHE_MAX_BYTES)
+
+def get_cache_stats() -> dict:
+    """Returns hit/miss counters for both cache layers."""
+    return {"transcripts": transcript_cache.stats(), "summaries": summary_cache.stats()}
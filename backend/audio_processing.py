@@ -1,21 +1,346 @@
 import os
 import subprocess
+import wave
+import numpy as np
+from .metrics import span, increment
 
-def preprocess_audio_file(file_path: str) -> str:
+# Format whisper.cpp expects
+WHISPER_SAMPLE_RATE = 16000
+
+# Silence removal before transcription; set SILENCE_REMOVAL=0 to transcribe recordings as they are
+SILENCE_REMOVAL_ENABLED = os.environ.get("SILENCE_REMOVAL", "1") != "0"
+SILENCE_MIN_SECONDS = 2.0              # Quiet stretches between speech shorter than this are kept
+SILENCE_PADDING_SECONDS = 0.4          # Quiet audio kept on each side of speech
+SILENCE_RMS_FLOOR = 50                 # Frames below this int16 RMS are always silent (about -56 dBFS)
+SILENCE_RELATIVE_THRESHOLD = 0.05      # Frames below this fraction of loud speech (95th percentile RMS) are silent
+
+# Memory bounds for long recordings
+ENERGY_BLOCK_SECONDS = 10              # Audio converted to float at a time when measuring frame energy
+FFMPEG_READ_BYTES = 1 << 20            # PCM read from FFmpeg's pipe at a time
+
+class TimeMap:
+    """
+    Maps times in audio with silences removed back to the original recording.
+
+    Kept stretch i starts `output_starts[i]` ms into the trimmed audio and
+    `source_starts[i]` ms into the original; both arrays are sorted.
+    """
+
+    __slots__ = ("output_starts", "source_starts", "removed_seconds")
+
+    def __init__(self, output_starts: np.ndarray, source_starts: np.ndarray, removed_seconds: float = 0.0):
+        self.output_starts = output_starts
+        self.source_starts = source_starts
+        self.removed_seconds = removed_seconds
+
+    @classmethod
+    def identity(cls) -> "TimeMap":
+        return cls(np.zeros(1, dtype=np.int64), np.zeros(1, dtype=np.int64))
+
+    def to_source(self, milliseconds, ends: bool = False) -> np.ndarray:
+        """Converts trimmed-audio times (ms) to recording times (ms)."""
+        milliseconds = np.asarray(milliseconds, dtype=np.int64)
+        # A segment ending exactly at a join belongs to the stretch before it
+        index = np.searchsorted(self.output_starts, milliseconds, side="left" if ends else "right") - 1
+        index = np.clip(index, 0, len(self.output_starts) - 1)
+        return self.source_starts[index] + milliseconds - self.output_starts[index]
+
+    def remap(self, segments):
+        """Returns transcript segments (TranscriptSegments) with times in the original recording."""
+        if len(self.output_starts) == 1 and self.source_starts[0] == 0:
+            return segments
+        return type(segments)(
+            self.to_source(segments.starts).astype(np.int32),
+            self.to_source(segments.ends, ends=True).astype(np.int32),
+            segments.offsets,
+            segments.text,
+            segments.language,
+        )
+
+def probe_wav(file_path: str) -> tuple[int, int, int]:
+    """Returns (sample rate, channels, sample width) of a PCM WAV file, or None for anything else."""
+    try:
+        with wave.open(file_path, "rb") as wav:
+            return wav.getframerate(), wav.getnchannels(), wav.getsampwidth()
+    except (wave.Error, EOFError):
+        return None
+
+def decode_audio(file_path: str, sample_rate: int = WHISPER_SAMPLE_RATE) -> np.ndarray:
+    """
+    Decodes any audio or video file to int16 mono samples with FFmpeg, reading the PCM
+    from a pipe instead of an intermediate file. The pipe is read in FFMPEG_READ_BYTES
+    chunks into one growing buffer, so the recording is held in memory only once.
+    """
+    command = [
+        "ffmpeg", "-nostdin", "-v", "error", "-i", file_path,
+        "-f", "s16le", "-acodec", "pcm_s16le", "-ac", "1", "-ar", str(sample_rate), "-",
+    ]
+    pcm = bytearray()
+    with span("ffmpeg"):
+        with subprocess.Popen(command, stdout=subprocess.PIPE) as process:
+            while chunk := process.stdout.read(FFMPEG_READ_BYTES):
+                pcm += chunk
+        if process.returncode:
+            raise subprocess.CalledProcessError(process.returncode, command)
+    increment("meeting_bytes_processed_total", os.path.getsize(file_path), stage="ffmpeg")
+    return np.frombuffer(pcm, dtype=np.int16, count=len(pcm) // 2)
+
+def remove_silences(
+    samples: np.ndarray,
+    sample_rate: int,
+    min_silence_seconds: float = SILENCE_MIN_SECONDS,
+    padding_seconds: float = SILENCE_PADDING_SECONDS,
+    frame_ms: int = 30,
+) -> tuple[np.ndarray, TimeMap]:
+    """
+    Cuts leading and trailing silence, and quiet stretches longer than
+    `min_silence_seconds` between speech, from int16 mono samples.
+
+    Frames are silent when their RMS energy is below SILENCE_RMS_FLOOR or
+    SILENCE_RELATIVE_THRESHOLD times the loud end of the recording. `padding_seconds`
+    of quiet audio stays around speech so words are not clipped.
+
+    Returns:
+        tuple[np.ndarray, TimeMap]: The trimmed samples (`samples` itself when nothing was
+        removed) and the map from trimmed times back to the recording.
+    """
+    energy = frame_energy(samples, sample_rate, frame_ms)
+    if not len(energy):
+        return samples, TimeMap.identity()
+    threshold = max(SILENCE_RMS_FLOOR, SILENCE_RELATIVE_THRESHOLD * float(np.percentile(energy, 95)))
+    voiced = energy > threshold
+    if not voiced.any():
+        # Nothing sounds like speech; let whisper decide
+        return samples, TimeMap.identity()
+
+    # Keep the padding around every voiced frame
+    padding = int(padding_seconds * 1000 / frame_ms)
+    kept = np.convolve(voiced, np.ones(2 * padding + 1), mode="same") > 0
+    edges = np.flatnonzero(np.diff(np.concatenate([[0], kept.astype(np.int8), [0]])))
+
+    # Runs of kept frames separated by short silences are merged
+    min_silence = int(min_silence_seconds * 1000 / frame_ms)
+    spans = []
+    for start, end in edges.reshape(-1, 2):
+        if spans and start - spans[-1][1] < min_silence:
+            spans[-1][1] = end
+        else:
+            spans.append([start, end])
+
+    frame_length = max(1, sample_rate * frame_ms // 1000)
+    sample_spans = [
+        (start * frame_length, len(samples) if end == len(energy) else end * frame_length) for start, end in spans
+    ]
+    kept_samples = sum(end - start for start, end in sample_spans)
+    if kept_samples == len(samples):
+        return samples, TimeMap.identity()
+
+    lengths = np.array([end - start for start, end in sample_spans], dtype=np.int64)
+    output_starts = np.concatenate([[0], np.cumsum(lengths)[:-1]]) * 1000 // sample_rate
+    source_starts = np.array([start for start, _ in sample_spans], dtype=np.int64) * 1000 // sample_rate
+    trimmed = np.concatenate([samples[start:end] for start, end in sample_spans])
+    return trimmed, TimeMap(output_starts, source_starts, (len(samples) - kept_samples) / sample_rate)
+
+def prepare_audio_for_whisper(
+    file_path: str,
+    output_dir: str = None,
+    remove_silence: bool = SILENCE_REMOVAL_ENABLED,
+) -> tuple[str, TimeMap]:
+    """
+    Produces the 16 kHz mono WAV file whisper.cpp reads, doing as little work as the input allows.
+
+    A WAV file already in that format is memory-mapped instead of converted, and is
+    returned as is when there is no silence to remove. Other inputs are decoded by FFmpeg
+    through a pipe. Silences are removed before the one file whisper needs is written.
+
+    Args:
+        file_path (str): Path to the input audio or video file.
+        output_dir (str): Directory for the converted file; next to the input when omitted.
+        remove_silence (bool): Cut long silences (see remove_silences).
+
+    Returns:
+        tuple[str, TimeMap]: The WAV path (`file_path` itself when no new file was needed)
+        and the map from its times back to the recording.
+    """
+    compliant = probe_wav(file_path) == (WHISPER_SAMPLE_RATE, 1, 2)
+    if compliant and not remove_silence:
+        return file_path, TimeMap.identity()
+
+    samples = read_wav_samples(file_path)[0] if compliant else decode_audio(file_path)
+    time_map = TimeMap.identity()
+    if remove_silence:
+        with span("silence_removal"):
+            trimmed, time_map = remove_silences(samples, WHISPER_SAMPLE_RATE)
+        increment("meeting_silence_removed_seconds_total", time_map.removed_seconds)
+        if compliant and trimmed is samples:
+            return file_path, time_map
+        samples = trimmed
+
+    output_wav_file = f"{os.path.splitext(file_path)[0]}_converted.wav"
+    if output_dir:
+        output_wav_file = os.path.join(output_dir, os.path.basename(output_wav_file))
+    write_wav_samples(output_wav_file, samples, WHISPER_SAMPLE_RATE)
+    return output_wav_file, time_map
+
+def preprocess_audio_file(file_path: str, output_dir: str = None) -> str:
     """
     Converts the input audio or video file to a WAV format with a 16kHz sample rate and mono channel.
-    If the input is a video file, the function extracts audio using FFmpeg.
+    Files already in that format are returned unchanged.
 
     Args:
         file_path (str): Path to the input audio or video file.
+        output_dir (str): Directory for the converted file; next to the input when omitted.
 
     Returns:
         str: The path to the preprocessed WAV file.
     """
-    output_wav_file = f"{os.path.splitext(file_path)[0]}_converted.wav"
+    return prepare_audio_for_whisper(file_path, output_dir, remove_silence=False)[0]
+
+def get_wav_duration(wav_path: str) -> float:
+    """Returns the duration of a WAV file in seconds, reading only its header."""
+    with wave.open(wav_path, "rb") as wav:
+        return wav.getnframes() / wav.getframerate()
+
+def find_wav_data_offset(header: bytes) -> int:
+    """Returns where the samples start in a WAV file, from its first bytes."""
+    position = 12
+    while position + 8 <= len(header):
+        chunk_id = header[position:position + 4]
+        chunk_size = int.from_bytes(header[position + 4:position + 8], "little")
+        if chunk_id == b"data":
+            return position + 8
+        position += 8 + chunk_size + (chunk_size & 1)
+    raise ValueError("No data chunk found in the WAV header")
+
+def read_wav_samples(wav_path: str) -> tuple[np.ndarray, int]:
+    """
+    Memory-maps the samples of a 16-bit PCM WAV file (as produced by preprocess_audio_file),
+    so long recordings are paged in as they are used instead of read up front.
+
+    Args:
+        wav_path (str): Path to the WAV file.
+
+    Returns:
+        tuple[np.ndarray, int]: The int16 samples of the first channel and the sample rate.
+    """
+    with wave.open(wav_path, "rb") as wav:
+        if wav.getsampwidth() != 2:
+            raise ValueError(f"Expected 16-bit PCM audio in {wav_path}")
+        sample_rate = wav.getframerate()
+        channels = wav.getnchannels()
+        frame_count = wav.getnframes()
+    if frame_count == 0:
+        return np.zeros(0, dtype=np.int16), sample_rate
+    with open(wav_path, "rb") as f:
+        offset = find_wav_data_offset(f.read(65536))
+    samples = np.memmap(wav_path, dtype="<i2", mode="r", offset=offset, shape=(frame_count * channels,))
+    if channels > 1:
+        samples = samples[::channels]
+    return samples, sample_rate
+
+def write_wav_samples(wav_path: str, samples: np.ndarray, sample_rate: int = 16000):
+    """Writes int16 mono samples to a WAV file."""
+    with wave.open(wav_path, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.writeframes(np.ascontiguousarray(samples, dtype=np.int16).tobytes())
+
+def to_whisper_samples(samples: np.ndarray, sample_rate: int, target_rate: int = 16000) -> np.ndarray:
+    """
+    Converts raw audio (int or float samples, mono or (samples, channels)) to the int16
+    mono 16kHz samples whisper.cpp expects. Resampling is linear, which is enough for speech.
+    """
+    samples = np.asarray(samples)
+    if samples.ndim > 1:
+        samples = samples.mean(axis=1)
+    if np.issubdtype(samples.dtype, np.floating):
+        samples = np.clip(samples, -1.0, 1.0) * 32767
+    elif samples.dtype == np.int32:
+        samples = samples / 65536
+    samples = samples.astype(np.float32)
+    if sample_rate != target_rate and len(samples):
+        target_length = int(len(samples) * target_rate / sample_rate)
+        positions = np.linspace(0, len(samples) - 1, target_length)
+        samples = np.interp(positions, np.arange(len(samples)), samples)
+    return samples.astype(np.int16)
+
+def frame_energy(samples: np.ndarray, sample_rate: int, frame_ms: int = 30) -> np.ndarray:
+    """
+    Returns the RMS energy of consecutive, non-overlapping frames of `frame_ms` milliseconds.
+    Samples are converted to float ENERGY_BLOCK_SECONDS at a time, so memory use does not
+    grow with the length of the recording.
+    """
+    frame_length = max(1, sample_rate * frame_ms // 1000)
+    frame_count = len(samples) // frame_length
+    energy = np.zeros(frame_count, dtype=np.float32)
+    block_frames = max(1, ENERGY_BLOCK_SECONDS * 1000 // frame_ms)
+    for start in range(0, frame_count, block_frames):
+        end = min(frame_count, start + block_frames)
+        frames = samples[start * frame_length:end * frame_length].astype(np.float32).reshape(end - start, frame_length)
+        energy[start:end] = np.sqrt(np.mean(frames * frames, axis=1))
+    return energy
+
+def find_silence_split_points(
+    samples: np.ndarray,
+    sample_rate: int,
+    target_seconds: float = 300.0,
+    search_seconds: float = 20.0,
+    frame_ms: int = 30,
+) -> list[int]:
+    """
+    Chooses cut points roughly every `target_seconds`, moving each one to the quietest
+    frame within `search_seconds` of the target so that words are not split in half.
+
+    Returns:
+        list[int]: Sample indices of the cuts, excluding the start and the end of the audio.
+    """
+    energy = frame_energy(samples, sample_rate, frame_ms)
+    frame_length = max(1, sample_rate * frame_ms // 1000)
+    target_frames = int(target_seconds * 1000 / frame_ms)
+    search_frames = min(int(search_seconds * 1000 / frame_ms), target_frames // 2)
 
-    # Use FFmpeg to convert or extract audio, ensuring 16kHz sample rate and mono channel
-    cmd = f'ffmpeg -y -i "{file_path}" -ar 16000 -ac 1 "{output_wav_file}"'
-    subprocess.run(cmd, shell=True, check=True)
+    cuts = []
+    position = target_frames
+    while position < len(energy) - search_frames:
+        window_start = max(0, position - search_frames)
+        window_end = min(len(energy), position + search_frames)
+        quietest = window_start + int(np.argmin(energy[window_start:window_end]))
+        cuts.append(quietest * frame_length + frame_length // 2)
+        position = quietest + target_frames
+    return cuts
+
+def split_wav_at_silences(
+    wav_path: str,
+    output_dir: str,
+    target_seconds: float = 300.0,
+    overlap_seconds: float = 1.0,
+) -> list[tuple[str, float, float]]:
+    """
+    Splits a 16 kHz mono WAV file at silence boundaries into overlapping segment files.
+
+    Each segment after the first starts `overlap_seconds` before its cut point, so speech
+    right at a cut is heard by both neighbours and can be deduplicated when stitching.
+
+    Args:
+        wav_path (str): Path to the preprocessed WAV file.
+        output_dir (str): Directory where the segment files are written.
+        target_seconds (float): Approximate length of each segment.
+        overlap_seconds (float): Audio shared with the previous segment.
+
+    Returns:
+        list[tuple[str, float, float]]: (segment path, segment start, cut point) per segment,
+        with times in seconds from the beginning of the recording.
+    """
+    samples, sample_rate = read_wav_samples(wav_path)
+    cuts = find_silence_split_points(samples, sample_rate, target_seconds)
+    overlap = int(overlap_seconds * sample_rate)
 
-    return output_wav_file
\ No newline at end of file
+    boundaries = [0] + cuts + [len(samples)]
+    segments = []
+    for index, (cut, end) in enumerate(zip(boundaries[:-1], boundaries[1:])):
+        start = max(0, cut - overlap) if index > 0 else 0
+        segment_path = os.path.join(output_dir, f"segment_{index:04d}.wav")
+        write_wav_samples(segment_path, samples[start:end], sample_rate)
+        segments.append((segment_path, start / sample_rate, cut / sample_rate))
+    return segments
@@ -0,0 +1,253 @@
+"""
+Bulk ingestion of a directory of historical transcripts into the RAG store.
+
+    python -m backend.backfill data/archive --workers 4
+
+Transcripts are read one at a time and split like populate_database does. Chunks
+that are already stored are skipped. The rest are embedded in large batches on a
+process pool and written one batch per meeting. Every finished transcript is
+recorded in a progress file, so an interrupted run resumes where it stopped.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from backend.artifact_cache import hash_file
+from backend.metrics import span, increment
+from backend.populate_database import CHROMA_PATH, load_transcription, split_documents, calculate_chunk_ids, plan_sync
+from backend.rag_app.get_chroma_db import get_chroma_db, get_meeting_id, get_collection_name
+from backend.rag_app.get_embedding_function import get_embedding_function
+from backend.rag_app.numpy_store import NumpyVectorStore
+from backend.rag_app.semantic_cache import semantic_cache
+
+# Progress file of the last backfill, in the root directory
+BACKFILL_PROGRESS_PATH = os.path.join("data", "backfill_progress.jsonl")
+# Chunks embedded per task sent to a worker process
+BACKFILL_EMBED_BATCH = 256
+# Upper bound on the rows written to the store in one call (Chroma caps batch sizes)
+BACKFILL_WRITE_BATCH = 2000
+
+_worker_embeddings = None
+
+def _init_worker(torch_threads: int):
+    """Loads the embedding model once per worker process."""
+    global _worker_embeddings
+    try:
+        import torch
+        # Split the cores between the workers instead of letting each one use all of them
+        torch.set_num_threads(torch_threads)
+    except ImportError:
+        pass
+    _worker_embeddings = get_embedding_function()
+
+def _embed_batch(texts: list[str]) -> list[list[float]]:
+    return _worker_embeddings.embed_documents(texts)
+
+def iter_transcripts(directory: str, extensions: tuple = (".txt",)):
+    """Yields transcript paths under `directory` in a stable order, without listing it all up front."""
+    with os.scandir(directory) as entries:
+        for entry in sorted(entries, key=lambda e: e.name):
+            if entry.is_dir(follow_symlinks=False):
+                yield from iter_transcripts(entry.path, extensions)
+            elif entry.name.endswith(extensions):
+                yield entry.path
+
+def backfill_meeting_id(directory: str, path: str) -> str:
+    """
+    Derives a meeting ID from a transcript's path relative to the backfill root, so
+    same-named files in different folders stay separate meetings. Files directly under
+    the root keep the usual ID (their file name without extension).
+    """
+    relative = os.path.relpath(path, directory)
+    parts = os.path.dirname(relative).split(os.sep) if os.path.dirname(relative) else []
+    return "/".join(parts + [get_meeting_id(path)])
+
+def check_meeting_ids(directory: str, extensions: tuple = (".txt",)):
+    """Raises ValueError when two transcripts under `directory` would share a meeting's collection."""
+    owners = {}
+    for path in iter_transcripts(directory, extensions):
+        collection_name = get_collection_name(backfill_meeting_id(directory, path))
+        if collection_name in owners:
+            raise ValueError(
+                f"{owners[collection_name]} and {path} map to the same meeting ({collection_name}); "
+                f"rename one of them so they do not overwrite each other's chunks"
+            )
+        owners[collection_name] = path
+
+def load_progress(path: str) -> dict:
+    """Returns the transcripts finished by earlier runs, as {path: content hash}."""
+    done = {}
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # The last line may be cut off by an interruption
+                    continue
+                done[entry["path"]] = entry["sha256"]
+    return done
+
+def store_embeddings(db, ids: list[str], texts: list[str], embeddings: list, metadatas: list[dict]):
+    """Writes precomputed embeddings to either vector store backend, in bounded batches."""
+    for start in range(0, len(ids), BACKFILL_WRITE_BATCH):
+        end = start + BACKFILL_WRITE_BATCH
+        if isinstance(db, NumpyVectorStore):
+            db.add_embeddings(ids[start:end], texts[start:end], embeddings[start:end], metadatas[start:end])
+        else:
+            db._collection.upsert(
+                ids=ids[start:end],
+                embeddings=[list(map(float, e)) for e in embeddings[start:end]],
+                documents=texts[start:end],
+                metadatas=metadatas[start:end],
+            )
+
+class _Batch:
+    """Chunks of one or more transcripts that are embedded together."""
+
+    def __init__(self):
+        self.files = []      # (path, sha256, meeting_id, chunk count)
+        self.chunks = []     # (meeting_id, chunk)
+
+    def __len__(self):
+        return len(self.chunks)
+
+def backfill(
+    directory: str,
+    workers: int = None,
+    batch_size: int = BACKFILL_EMBED_BATCH,
+    progress_path: str = BACKFILL_PROGRESS_PATH,
+    restart: bool = False,
+) -> dict:
+    """
+    Ingests every transcript under `directory`, each as its own meeting.
+
+    Args:
+        directory (str): Directory searched recursively for .txt transcripts.
+        workers (int): Embedding processes; 0 embeds in this process. Defaults to the CPU count.
+        batch_size (int): Chunks per embedding task.
+        progress_path (str): Progress file used to resume an interrupted run.
+        restart (bool): Ignore the progress file and check every transcript again.
+
+    Returns:
+        dict: Counts of transcripts ingested and skipped and of chunks embedded and deleted.
+    """
+    workers = (os.cpu_count() or 1) if workers is None else workers
+    # Checked before anything is written: colliding meetings would delete each other's chunks
+    check_meeting_ids(directory)
+    if restart and os.path.exists(progress_path):
+        os.remove(progress_path)
+    done = load_progress(progress_path)
+    stats = {"ingested": 0, "skipped": 0, "chunks_embedded": 0, "chunks_deleted": 0}
+
+    pool = None
+    if workers > 0:
+        pool = ProcessPoolExecutor(
+            max_workers=workers,
+            # Fresh interpreters: forking a process that already loaded torch can hang
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(max(1, (os.cpu_count() or 1) // workers),),
+        )
+    embeddings = get_embedding_function() if pool is None else None
+
+    os.makedirs(os.path.dirname(progress_path) or ".", exist_ok=True)
+    progress_file = open(progress_path, "a", encoding="utf-8")
+    # Batches being embedded, oldest first, so progress is recorded in order
+    in_flight = deque()
+
+    def submit(batch: _Batch):
+        texts = [chunk.page_content for _, chunk in batch.chunks]
+        if pool is None:
+            futures = [embeddings.embed_documents(texts)]
+        else:
+            futures = [pool.submit(_embed_batch, texts[i:i + batch_size]) for i in range(0, len(texts), batch_size)]
+        in_flight.append((batch, futures))
+
+    def finish_oldest():
+        batch, futures = in_flight.popleft()
+        vectors = []
+        with span("embed_chunks", chunks=len(batch)):
+            for future in futures:
+                vectors.extend(future if isinstance(future, list) else future.result())
+
+        # One write per meeting in the batch
+        by_meeting = {}
+        for (meeting_id, chunk), vector in zip(batch.chunks, vectors):
+            by_meeting.setdefault(meeting_id, []).append((chunk, vector))
+        for meeting_id, rows in by_meeting.items():
+            store_embeddings(
+                get_chroma_db(meeting_id, CHROMA_PATH),
+                [chunk.metadata["id"] for chunk, _ in rows],
+                [chunk.page_content for chunk, _ in rows],
+                [vector for _, vector in rows],
+                [chunk.metadata for chunk, _ in rows],
+            )
+        increment("meeting_chunks_embedded_total", len(batch))
+        stats["chunks_embedded"] += len(batch)
+
+        for path, sha256, meeting_id, chunk_count in batch.files:
+            progress_file.write(json.dumps({"path": path, "sha256": sha256, "meeting_id": meeting_id, "chunks": chunk_count}) + "\n")
+            stats["ingested"] += 1
+        progress_file.flush()
+        print(f"👉 {stats['ingested']} transcripts ingested, {stats['chunks_embedded']} chunks embedded")
+
+    batch = _Batch()
+    try:
+        for path in iter_transcripts(directory):
+            sha256 = hash_file(path)
+            if done.get(path) == sha256:
+                stats["skipped"] += 1
+                continue
+
+            meeting_id = backfill_meeting_id(directory, path)
+            with span("split_documents"):
+                chunks = calculate_chunk_ids(split_documents(load_transcription(path, meeting_id)))
+            db = get_chroma_db(meeting_id, CHROMA_PATH)
+            new_chunks, stale_ids = plan_sync(db, chunks, meeting_id)
+            if stale_ids or new_chunks:
+                semantic_cache.invalidate_meeting(meeting_id)
+            if stale_ids:
+                db.delete(ids=stale_ids)
+                stats["chunks_deleted"] += len(stale_ids)
+
+            batch.files.append((path, sha256, meeting_id, len(chunks)))
+            batch.chunks.extend((meeting_id, chunk) for chunk in new_chunks)
+            if len(batch) >= batch_size * max(workers, 1):
+                submit(batch)
+                batch = _Batch()
+                # Keep every worker busy without holding the whole archive in memory
+                while len(in_flight) > 1:
+                    finish_oldest()
+
+        if batch.files:
+            submit(batch)
+        while in_flight:
+            finish_oldest()
+    finally:
+        progress_file.close()
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+
+    return stats
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ingest a directory of transcripts into the RAG store.")
+    parser.add_argument("directory", help="Directory of .txt transcripts (searched recursively).")
+    parser.add_argument("--workers", type=int, default=None, help="Embedding processes (0 embeds in this process).")
+    parser.add_argument("--batch-size", type=int, default=BACKFILL_EMBED_BATCH, help="Chunks per embedding task.")
+    parser.add_argument("--progress", default=BACKFILL_PROGRESS_PATH, help="Progress file used to resume.")
+    parser.add_argument("--restart", action="store_true", help="Ignore earlier progress.")
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.directory):
+        sys.exit(f"Not a directory: {args.directory}")
+    try:
+        result = backfill(args.directory, args.workers, args.batch_size, args.progress, args.restart)
+    except ValueError as e:
+        sys.exit(f"❌ {e}")
+    print(f"✅ Backfill finished: {result}")
@@ -0,0 +1,301 @@
+"""
+Portable single-file bundles of indexed meetings.
+
+A bundle holds everything needed to serve one meeting: its transcript, segments and
+summary, plus its chunks and their embeddings. Another node can then import the
+meeting without transcribing or embedding anything again:
+
+    python -m backend.bundle export <meeting_id> meeting.bundle --quantize int8
+    python -m backend.bundle import meeting.bundle
+
+The file starts with an 8-byte magic, the header length (little-endian uint64), the
+SHA-256 of the header and the JSON header. The sections the header lists follow it.
+Each section is 64-byte aligned, so the embedding matrix can be used straight from a
+memory map, and each carries its own SHA-256, which is checked on import.
+"""
+import argparse
+import hashlib
+import json
+import os
+import struct
+import sys
+import time
+from dataclasses import dataclass
+import numpy as np
+from backend.backfill import store_embeddings
+from backend.metrics import span, increment
+from backend.populate_database import CHROMA_PATH, CHUNK_SIZE, CHUNK_OVERLAP
+from backend.rag_app.get_chroma_db import get_chroma_db
+from backend.rag_app.get_embedding_function import EMBEDDING_MODEL_NAME
+from backend.rag_app.semantic_cache import semantic_cache
+from backend.summarizer import TRANSCRIPTS_DIR, get_summary_path
+from backend.transcription import TranscriptSegments
+
+# Bundle format
+BUNDLE_MAGIC = b"MTGBNDL\x01"
+BUNDLE_VERSION = 1
+BUNDLE_ALIGNMENT = 64                  # Bytes; keeps every section aligned for memory mapping
+BUNDLE_PREAMBLE = len(BUNDLE_MAGIC) + 8 + 32
+# Storage types of the embeddings: float16 halves the size, int8 (one scale per row) quarters it
+BUNDLE_QUANTIZATIONS = ("float32", "float16", "int8")
+BUNDLE_DEFAULT_QUANTIZATION = "float16"
+
+class BundleError(Exception):
+    """Raised when a bundle cannot be written, is corrupt, or does not fit this node."""
+
+@dataclass
+class MeetingBundle:
+    header: dict
+    transcript: str
+    summary: str
+    segments: TranscriptSegments       # None when the transcript has no timestamps
+    ids: list[str]
+    texts: list[str]
+    metadatas: list[dict]
+    embeddings: np.ndarray             # Rows as stored, mapped from the file
+    scales: np.ndarray                 # Per-row scales of int8 embeddings, else None
+
+    def vectors(self, rows=None) -> np.ndarray:
+        """Returns embeddings (all of them, or the given rows) ready for a vector store."""
+        embeddings = self.embeddings if rows is None else self.embeddings[rows]
+        if self.scales is None:
+            return embeddings
+        scales = self.scales if rows is None else self.scales[rows]
+        return embeddings.astype(np.float32) * scales[:, None]
+
+def _align(position: int) -> int:
+    return -(-position // BUNDLE_ALIGNMENT) * BUNDLE_ALIGNMENT
+
+def quantize_embeddings(embeddings, quantization: str = BUNDLE_DEFAULT_QUANTIZATION) -> tuple[np.ndarray, np.ndarray]:
+    """Normalizes embeddings and converts them to `quantization`. Returns (rows, int8 scales or None)."""
+    if quantization not in BUNDLE_QUANTIZATIONS:
+        raise BundleError(f"Unknown quantization {quantization!r}, expected one of {', '.join(BUNDLE_QUANTIZATIONS)}")
+    vectors = np.asarray(embeddings, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    vectors = vectors / norms
+    if quantization != "int8":
+        return vectors.astype(quantization), None
+    # Symmetric per-row scale: the largest component maps to 127
+    scales = np.abs(vectors).max(axis=1) / 127
+    scales[scales == 0] = 1.0
+    return np.round(vectors / scales[:, None]).astype(np.int8), scales.astype(np.float32)
+
+def export_meeting(
+    meeting_id: str,
+    output_path: str,
+    transcript_path: str = None,
+    summary: str = None,
+    quantization: str = BUNDLE_DEFAULT_QUANTIZATION,
+) -> dict:
+    """
+    Writes one meeting's transcript, summary, chunks and stored embeddings to a bundle.
+
+    Args:
+        transcript_path (str): Defaults to the meeting's file in TRANSCRIPTS_DIR.
+        summary (str): Defaults to the summary saved next to the transcript, if any.
+        quantization (str): Storage type of the embeddings (see BUNDLE_QUANTIZATIONS).
+
+    Returns:
+        dict: The bundle header.
+    """
+    transcript_path = transcript_path or os.path.join(TRANSCRIPTS_DIR, f"{meeting_id}.txt")
+    try:
+        with open(transcript_path, "r", encoding="utf-8") as f:
+            transcript = f.read()
+    except FileNotFoundError:
+        raise BundleError(f"Transcript of meeting {meeting_id} not found at {transcript_path}; pass its path explicitly")
+    if summary is None and os.path.exists(get_summary_path(transcript_path)):
+        with open(get_summary_path(transcript_path), "r", encoding="utf-8") as f:
+            summary = f.read()
+
+    with span("bundle_export", meeting_id=meeting_id):
+        stored = get_chroma_db(meeting_id, CHROMA_PATH).get(include=["embeddings", "documents", "metadatas"])
+        if not stored["ids"]:
+            raise BundleError(f"Meeting {meeting_id} has no indexed chunks")
+        vectors, scales = quantize_embeddings(stored["embeddings"], quantization)
+
+        sections = {
+            "transcript": transcript.encode("utf-8"),
+            "summary": (summary or "").encode("utf-8"),
+            "records": json.dumps(
+                {"ids": stored["ids"], "texts": stored["documents"], "metadatas": stored["metadatas"]},
+                separators=(",", ":"),
+            ).encode("utf-8"),
+            "embeddings": vectors.tobytes(),
+        }
+        if scales is not None:
+            sections["scales"] = scales.tobytes()
+        segments = TranscriptSegments.from_text(transcript)
+        if len(segments):
+            sections["segments"] = segments.to_json().encode("utf-8")
+
+        # Offsets are relative to the first section, so they do not depend on the header's length
+        layout, position = {}, 0
+        for name, data in sections.items():
+            position = _align(position)
+            layout[name] = {"offset": position, "length": len(data), "sha256": hashlib.sha256(data).hexdigest()}
+            position += len(data)
+
+        header = {
+            "version": BUNDLE_VERSION,
+            "meeting_id": meeting_id,
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "embedding_model": EMBEDDING_MODEL_NAME,
+            "chunk_size": CHUNK_SIZE,
+            "chunk_overlap": CHUNK_OVERLAP,
+            "count": len(vectors),
+            "dimension": vectors.shape[1],
+            "dtype": quantization,
+            "sections": layout,
+        }
+        header_bytes = json.dumps(header).encode("utf-8")
+
+        os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+        data_start = _align(BUNDLE_PREAMBLE + len(header_bytes))
+        # Written next to the final name, so readers never see a partial bundle
+        with open(output_path + ".tmp", "wb") as f:
+            f.write(BUNDLE_MAGIC + struct.pack("<Q", len(header_bytes)) + hashlib.sha256(header_bytes).digest())
+            f.write(header_bytes)
+            for name, data in sections.items():
+                f.seek(data_start + layout[name]["offset"])
+                f.write(data)
+        os.replace(output_path + ".tmp", output_path)
+    return header
+
+def read_bundle(path: str, verify: bool = True) -> MeetingBundle:
+    """
+    Opens a bundle by memory-mapping it; the embeddings are not copied into memory.
+
+    Args:
+        verify (bool): Check the SHA-256 of every section (reads the whole file once).
+    """
+    raw = np.memmap(path, dtype=np.uint8, mode="r")
+    if len(raw) < BUNDLE_PREAMBLE or raw[:len(BUNDLE_MAGIC)].tobytes() != BUNDLE_MAGIC:
+        raise BundleError(f"{path} is not a meeting bundle")
+    header_length = struct.unpack("<Q", raw[len(BUNDLE_MAGIC):len(BUNDLE_MAGIC) + 8].tobytes())[0]
+    header_bytes = raw[BUNDLE_PREAMBLE:BUNDLE_PREAMBLE + header_length].tobytes()
+    if hashlib.sha256(header_bytes).digest() != raw[len(BUNDLE_MAGIC) + 8:BUNDLE_PREAMBLE].tobytes():
+        raise BundleError(f"The header of {path} is corrupt")
+    header = json.loads(header_bytes)
+    if header["version"] > BUNDLE_VERSION:
+        raise BundleError(f"{path} uses bundle version {header['version']}; this node reads up to {BUNDLE_VERSION}")
+
+    data_start = _align(BUNDLE_PREAMBLE + header_length)
+    sections = {}
+    for name, entry in header["sections"].items():
+        start = data_start + entry["offset"]
+        section = raw[start:start + entry["length"]]
+        if len(section) != entry["length"]:
+            raise BundleError(f"{path} is truncated (section {name})")
+        if verify and hashlib.sha256(section).hexdigest() != entry["sha256"]:
+            raise BundleError(f"Checksum mismatch in section {name} of {path}")
+        sections[name] = section
+
+    def text(name: str) -> str:
+        return sections[name].tobytes().decode("utf-8") if name in sections else ""
+
+    records = json.loads(text("records"))
+    embeddings = sections["embeddings"].view(header["dtype"]).reshape(header["count"], header["dimension"])
+    scales = sections["scales"].view(np.float32) if "scales" in sections else None
+    segments = TranscriptSegments.from_json(text("segments")) if "segments" in sections else None
+    return MeetingBundle(
+        header, text("transcript"), text("summary"), segments,
+        records["ids"], records["texts"], records["metadatas"], embeddings, scales,
+    )
+
+def import_meeting(path: str, meeting_id: str = None, transcripts_dir: str = TRANSCRIPTS_DIR, verify: bool = True) -> dict:
+    """
+    Loads a bundle into this node: writes the transcript (and summary) to `transcripts_dir`
+    and stores the bundled embeddings in the meeting's vector store. Chunks already stored
+    are kept and stored chunks missing from the bundle are deleted, so importing again is
+    cheap and leaves the meeting matching the bundle.
+
+    Args:
+        meeting_id (str): Import under another ID (defaults to the exported meeting's ID).
+
+    Returns:
+        dict: The meeting ID, transcript path and counts of chunks added and deleted.
+    """
+    bundle = read_bundle(path, verify)
+    header = bundle.header
+    if header["embedding_model"] != EMBEDDING_MODEL_NAME:
+        raise BundleError(
+            f"{path} was embedded with {header['embedding_model']}, but this node uses {EMBEDDING_MODEL_NAME}"
+        )
+    source_id = header["meeting_id"]
+    meeting_id = meeting_id or source_id
+
+    transcript_path = os.path.join(transcripts_dir, f"{meeting_id}.txt")
+    # Backfilled meeting IDs can contain folders ("2024/q1/audit")
+    os.makedirs(os.path.dirname(transcript_path), exist_ok=True)
+    with open(transcript_path, "w", encoding="utf-8") as f:
+        f.write(bundle.transcript)
+    if bundle.summary:
+        with open(get_summary_path(transcript_path), "w", encoding="utf-8") as f:
+            f.write(bundle.summary)
+
+    # Chunk IDs start with the meeting ID; renaming them keeps later re-ingestion incremental
+    prefix = f"{source_id}:"
+    ids = [f"{meeting_id}:{chunk_id[len(prefix):]}" if chunk_id.startswith(prefix) else chunk_id for chunk_id in bundle.ids]
+    metadatas = [
+        {**metadata, "id": chunk_id, "meeting_id": meeting_id, "source": transcript_path}
+        for chunk_id, metadata in zip(ids, bundle.metadatas)
+    ]
+
+    with span("bundle_import", meeting_id=meeting_id, chunks=len(ids)):
+        db = get_chroma_db(meeting_id, CHROMA_PATH)
+        existing_ids = set(db.get(include=[])["ids"])
+        # Only this meeting's own chunks are replaced
+        stale_ids = [chunk_id for chunk_id in existing_ids - set(ids) if chunk_id.startswith(f"{meeting_id}:")]
+        rows = [i for i, chunk_id in enumerate(ids) if chunk_id not in existing_ids]
+
+        if stale_ids or rows:
+            semantic_cache.invalidate_meeting(meeting_id)
+        if stale_ids:
+            db.delete(ids=stale_ids)
+        if rows:
+            vectors = bundle.vectors(None if len(rows) == len(ids) else rows)
+            store_embeddings(
+                db, [ids[i] for i in rows], [bundle.texts[i] for i in rows], vectors, [metadatas[i] for i in rows]
+            )
+    increment("meeting_bundles_imported_total")
+    return {"meeting_id": meeting_id, "transcript_path": transcript_path, "chunks_added": len(rows), "chunks_deleted": len(stale_ids)}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Move indexed meetings between nodes as single-file bundles.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = commands.add_parser("export", help="Write a meeting to a bundle.")
+    export_parser.add_argument("meeting_id", help="Meeting to export.")
+    export_parser.add_argument("output", help="Bundle file to write.")
+    export_parser.add_argument("--transcript", default=None, help="Transcript path (defaults to the meeting's file in data/transcripts).")
+    export_parser.add_argument("--summary", default=None, help="File with the summary to include (defaults to the saved summary).")
+    export_parser.add_argument(
+        "--quantize", choices=BUNDLE_QUANTIZATIONS, default=BUNDLE_DEFAULT_QUANTIZATION, help="Storage type of the embeddings."
+    )
+
+    import_parser = commands.add_parser("import", help="Load a bundle into this node's vector store.")
+    import_parser.add_argument("bundle", help="Bundle file to import.")
+    import_parser.add_argument("--meeting-id", default=None, help="Import under another meeting ID.")
+    import_parser.add_argument("--no-verify", action="store_true", help="Skip the checksum verification.")
+
+    info_parser = commands.add_parser("info", help="Print a bundle's header.")
+    info_parser.add_argument("bundle", help="Bundle file to inspect.")
+    args = parser.parse_args()
+
+    try:
+        if args.command == "export":
+            summary = None
+            if args.summary:
+                with open(args.summary, "r", encoding="utf-8") as f:
+                    summary = f.read()
+            header = export_meeting(args.meeting_id, args.output, args.transcript, summary, args.quantize)
+            print(f"✅ Exported {header['count']} chunks ({header['dtype']}) to {args.output} ({os.path.getsize(args.output)} bytes)")
+        elif args.command == "import":
+            result = import_meeting(args.bundle, args.meeting_id, verify=not args.no_verify)
+            print(f"✅ Imported meeting: {result}")
+        else:
+            print(json.dumps(read_bundle(args.bundle, verify=False).header, indent=2))
+    except BundleError as e:
+        sys.exit(f"❌ {e}")
@@ -0,0 +1,167 @@
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Default behaviour of the stand-in server
+FAKE_MODELS = ["llama3.2:latest"]
+FAKE_RESPONSE_TOKENS = 40          # Tokens streamed per response
+FAKE_PROMPT_TOKEN_LATENCY = 0.0    # Seconds spent "evaluating" each new prompt token
+FAKE_TOKEN_LATENCY = 0.0           # Seconds between streamed tokens
+
+def _tokenize(text: str) -> list[int]:
+    # Cheap deterministic stand-in for a tokenizer: one token per word
+    return [hash(word) & 0x7FFFFFFF for word in text.split()]
+
+class FakeOllamaHandler(BaseHTTPRequestHandler):
+    """
+    Implements the subset of the Ollama API used by this project (/api/tags,
+    /api/generate and /api/chat) with configurable latencies, so clients and the
+    pipeline can be tested and benchmarked without a model server.
+    """
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status: int, payload: dict):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_json(self) -> dict:
+        length = int(self.headers.get("Content-Length", 0))
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def do_GET(self):
+        if self.path == "/api/tags":
+            self._send_json(200, {"models": [{"name": m, "model": m} for m in self.server.models]})
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+        request = self._read_json()
+        if self.path == "/api/generate":
+            prompt_tokens = _tokenize(request.get("prompt", ""))
+            self._respond(request, prompt_tokens, chat=False)
+        elif self.path == "/api/chat":
+            text = "\n".join(message.get("content", "") for message in request.get("messages", []))
+            self._respond(request, _tokenize(text), chat=True)
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def _respond(self, request: dict, prompt_tokens: list[int], chat: bool):
+        server = self.server
+        model = request.get("model", "")
+        if model not in server.models and f"{model}:latest" not in server.models:
+            self._send_json(404, {"error": f"model '{model}' not found"})
+            return
+
+        # Tokens already in the supplied context are not evaluated again, like Ollama's KV cache
+        context = list(request.get("context") or [])
+        prompt_eval_seconds = len(prompt_tokens) * server.prompt_token_latency
+        time.sleep(prompt_eval_seconds)
+
+        words = [f"token{i}" for i in range(server.response_tokens)]
+        stream = request.get("stream", True)
+        started = time.perf_counter()
+
+        def message_for(text: str, done: bool) -> dict:
+            message = {"model": model, "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ"), "done": done}
+            if chat:
+                message["message"] = {"role": "assistant", "content": text}
+            else:
+                message["response"] = text
+            if done:
+                message.update({
+                    "done_reason": "stop",
+                    "prompt_eval_count": len(prompt_tokens),
+                    "prompt_eval_duration": int(prompt_eval_seconds * 1e9),
+                    "eval_count": len(words),
+                    "eval_duration": int((time.perf_counter() - started) * 1e9),
+                })
+                if not chat:
+                    message["context"] = context + prompt_tokens + _tokenize(" ".join(words))
+            return message
+
+        if not stream:
+            time.sleep(server.token_latency * len(words))
+            final = message_for(" ".join(words), True)
+            self._send_json(200, final)
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        try:
+            for i, word in enumerate(words):
+                time.sleep(server.token_latency)
+                self._write_chunk(message_for(word if i == 0 else f" {word}", False))
+            self._write_chunk(message_for("", True))
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            # The client closed the stream, which is how generation gets cancelled
+            server.cancelled_requests += 1
+
+    def _write_chunk(self, message: dict):
+        line = json.dumps(message).encode("utf-8") + b"\n"
+        self.wfile.write(f"{len(line):X}\r\n".encode("ascii") + line + b"\r\n")
+        self.wfile.flush()
+
+class FakeOllamaServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(
+        self,
+        address: tuple = ("127.0.0.1", 0),
+        models: list[str] = None,
+        response_tokens: int = FAKE_RESPONSE_TOKENS,
+        prompt_token_latency: float = FAKE_PROMPT_TOKEN_LATENCY,
+        token_latency: float = FAKE_TOKEN_LATENCY,
+    ):
+        super().__init__(address, FakeOllamaHandler)
+        self.models = models or list(FAKE_MODELS)
+        self.response_tokens = response_tokens
+        self.prompt_token_latency = prompt_token_latency
+        self.token_latency = token_latency
+        self.cancelled_requests = 0
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+def start_fake_ollama_server(**kwargs) -> FakeOllamaServer:
+    """
+    Starts a stand-in Ollama server on a background thread (a free port by default).
+    Point the backend at it with OLLAMA_SERVER_URL=<server.url>; call shutdown() to stop it.
+    """
+    server = FakeOllamaServer(**kwargs)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run a stand-in Ollama server for offline tests and benchmarks.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11435)
+    parser.add_argument("--model", action="append", dest="models", help="Model name to advertise (repeatable).")
+    parser.add_argument("--response-tokens", type=int, default=FAKE_RESPONSE_TOKENS)
+    parser.add_argument("--prompt-token-latency", type=float, default=FAKE_PROMPT_TOKEN_LATENCY)
+    parser.add_argument("--token-latency", type=float, default=FAKE_TOKEN_LATENCY)
+    args = parser.parse_args()
+
+    server = FakeOllamaServer(
+        (args.host, args.port),
+        models=args.models,
+        response_tokens=args.response_tokens,
+        prompt_token_latency=args.prompt_token_latency,
+        token_latency=args.token_latency,
+    )
+    print(f"Fake Ollama server listening on {server.url}")
+    server.serve_forever()
@@ -0,0 +1,185 @@
+import os
+import shutil
+import tempfile
+import threading
+import time
+import traceback
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from .summarizer import translate_and_summarize, TRANSCRIPTS_DIR, SummaryCancelled
+from .rag_app.resources import get_resource
+from .metrics import job_trace, increment, set_gauge
+
+# Background job settings
+JOB_WORKERS = 2            # Meetings processed at the same time
+JOB_QUEUE_LIMIT = 8        # Jobs waiting for a worker before new submissions are rejected
+JOB_HISTORY_LIMIT = 100    # Finished jobs kept for status polling
+
+class QueueFullError(Exception):
+    """Raised when a job is submitted while the queue is at JOB_QUEUE_LIMIT."""
+
+@dataclass
+class Job:
+    job_id: str
+    status: str = "queued"           # queued, running, done, failed or cancelled
+    stage: str = "Waiting for a worker"
+    progress: float = 0.0
+    summary: str = None
+    partial_summary: str = ""        # Summary text streamed so far
+    transcript_path: str = None
+    error: str = None
+    created_at: float = field(default_factory=time.time)
+    started_at: float = None
+    finished_at: float = None
+    cancel_event: threading.Event = field(default_factory=threading.Event, repr=False)
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("done", "failed", "cancelled")
+
+class JobManager:
+    """
+    Runs translate_and_summarize in a bounded pool of background workers.
+
+    Each job gets its own temporary workspace for intermediate files and writes its
+    transcript to data/transcripts/<job_id>.txt, so concurrent jobs never share a path.
+    """
+
+    def __init__(self, max_workers: int = JOB_WORKERS, max_queued: int = JOB_QUEUE_LIMIT):
+        self.max_workers = max_workers
+        self.max_queued = max_queued
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(
+        self,
+        file_path_or_text: str,
+        context: str,
+        whisper_model_name: str,
+        llm_model_name: str,
+        is_transcript: bool = False,
+    ) -> str:
+        """
+        Queues a meeting for processing.
+
+        Returns:
+            str: The job ID used to poll its status.
+
+        Raises:
+            QueueFullError: If JOB_QUEUE_LIMIT jobs are already waiting.
+        """
+        with self._lock:
+            if self.queue_depth() >= self.max_queued:
+                raise QueueFullError(f"Too many meetings waiting ({self.max_queued}), try again shortly.")
+            job = Job(job_id=uuid.uuid4().hex)
+            self._jobs[job.job_id] = job
+            self._prune()
+            set_gauge("meeting_jobs_queued", self.queue_depth())
+
+        self._executor.submit(
+            self._run, job, file_path_or_text, context, whisper_model_name, llm_model_name, is_transcript
+        )
+        return job.job_id
+
+    def get(self, job_id: str) -> Job:
+        """Returns the job with the given ID, or None if it is unknown or was pruned."""
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id: str):
+        """
+        Cancels a job. A queued job never starts; a running job stops at the next
+        summary token, which also closes its stream to the Ollama server.
+        """
+        job = self.get(job_id)
+        if job is not None and not job.finished:
+            job.cancel_event.set()
+
+    def queue_depth(self) -> int:
+        """Returns the number of jobs waiting for a worker (call with the lock held)."""
+        return sum(1 for job in self._jobs.values() if job.status == "queued")
+
+    def _update_queue_gauge(self):
+        with self._lock:
+            set_gauge("meeting_jobs_queued", self.queue_depth())
+
+    def queue_position(self, job_id: str) -> int:
+        """Returns how many queued jobs are ahead of this one (0 once it is running)."""
+        with self._lock:
+            position = 0
+            for other in self._jobs.values():
+                if other.job_id == job_id:
+                    return position if other.status == "queued" else 0
+                if other.status == "queued":
+                    position += 1
+        return 0
+
+    def _prune(self):
+        # Forget the oldest finished jobs once the history limit is reached
+        finished = [job_id for job_id, job in self._jobs.items() if job.finished]
+        for job_id in finished[:max(0, len(self._jobs) - JOB_HISTORY_LIMIT)]:
+            del self._jobs[job_id]
+
+    def _run(self, job: Job, file_path_or_text, context, whisper_model_name, llm_model_name, is_transcript):
+        def progress(stage: str, fraction: float):
+            job.stage = stage
+            job.progress = fraction
+
+        def on_summary_text(text: str):
+            job.partial_summary = text
+
+        if job.cancel_event.is_set():
+            job.status = "cancelled"
+            job.finished_at = time.time()
+            increment("meeting_jobs_total", status=job.status)
+            self._update_queue_gauge()
+            return
+
+        job.status = "running"
+        job.started_at = time.time()
+        workspace = None
+        try:
+            # Anything that fails from here on marks the job failed instead of leaving it running
+            self._update_queue_gauge()
+            workspace = tempfile.mkdtemp(prefix=f"meeting_{job.job_id}_")
+            with job_trace(job.job_id, whisper_model=whisper_model_name, llm_model=llm_model_name):
+                summary, transcript_path = translate_and_summarize(
+                    file_path_or_text,
+                    context,
+                    whisper_model_name,
+                    llm_model_name,
+                    is_transcript=is_transcript,
+                    workspace=workspace,
+                    transcript_path=os.path.join(TRANSCRIPTS_DIR, f"{job.job_id}.txt"),
+                    progress=progress,
+                    on_summary_text=on_summary_text,
+                    cancel_event=job.cancel_event,
+                )
+            job.summary = summary
+            job.transcript_path = transcript_path
+            job.stage = "Done"
+            job.progress = 1.0
+            job.status = "done"
+        except SummaryCancelled:
+            job.stage = "Cancelled"
+            job.status = "cancelled"
+        except Exception as e:
+            traceback.print_exc()
+            job.error = str(e)
+            job.stage = "Failed"
+            job.status = "failed"
+        finally:
+            job.finished_at = time.time()
+            increment("meeting_jobs_total", status=job.status)
+            if workspace:
+                shutil.rmtree(workspace, ignore_errors=True)
+
+    def shutdown(self, wait: bool = True):
+        self._executor.shutdown(wait=wait)
+
+def get_job_manager() -> JobManager:
+    """Returns the process-wide job manager, creating it on first use."""
+    return get_resource(("job_manager",), JobManager)
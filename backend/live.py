@@ -0,0 +1,285 @@
+"""
+Live transcription of meetings that are still in progress.
+
+Audio arrives in small chunks (from the microphone in the UI, or from a recording that
+is still being written). It is transcribed one window at a time. After each window the
+transcript is re-indexed into the meeting's vector store, so the chat can answer about
+what was just said, and the new speech is folded into a rolling summary.
+
+    python -m backend.live recording.wav --whisper-model small --llm-model llama3.2
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import threading
+import time
+import traceback
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from .audio_processing import to_whisper_samples, write_wav_samples, frame_energy, find_wav_data_offset
+from .transcription import run_whisper, format_segments
+from .summarizer import TRANSCRIPTS_DIR, build_rolling_summary_prompt, generate_with_model, get_summary_path
+from .metrics import span
+
+# Live transcription settings
+LIVE_SAMPLE_RATE = 16000
+LIVE_WINDOW_SECONDS = 15          # Audio collected before a window is transcribed
+LIVE_SEARCH_SECONDS = 3           # Windows are cut at the quietest frame of their last seconds
+LIVE_MIN_FINAL_SECONDS = 1        # Shorter leftovers are dropped when the session ends
+LIVE_MAX_SESSIONS = 16            # Live sessions kept at once (least recently used finished)
+LIVE_POLL_INTERVAL = 1.0          # Seconds between reads of a growing recording
+LIVE_IDLE_TIMEOUT = 30            # A recording that stops growing this long is considered finished
+
+class LiveSession:
+    """
+    Incremental transcription, indexing and summarization of one live meeting.
+
+    Windows are processed one at a time on a background thread. When processing falls
+    behind, the audio that arrives in the meantime is transcribed as one larger window, so
+    the session catches up instead of queueing work.
+    """
+
+    def __init__(
+        self,
+        meeting_id: str,
+        whisper_model_name: str,
+        llm_model_name: str,
+        context: str = "",
+        window_seconds: float = LIVE_WINDOW_SECONDS,
+        transcript_path: str = None,
+    ):
+        self.meeting_id = meeting_id
+        self.whisper_model_name = whisper_model_name
+        self.llm_model_name = llm_model_name
+        self.context = context
+        self.window_seconds = window_seconds
+        self.transcript_path = transcript_path or os.path.join(TRANSCRIPTS_DIR, f"{meeting_id}.txt")
+        self.summary = ""
+        self.language = None
+        self.segments = []                # (start, end, text), seconds since the session started
+        self.error = None
+        self.updated_at = time.time()
+        self._buffer = np.zeros(0, dtype=np.int16)
+        self._buffer_start = 0.0          # Session time of the first buffered sample
+        self._pending_text = ""           # Speech not folded into the summary yet
+        self._busy = False
+        self._closed = False
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="live")
+        self._workspace = tempfile.mkdtemp(prefix=f"live_{meeting_id}_")
+        os.makedirs(os.path.dirname(self.transcript_path) or ".", exist_ok=True)
+        open(self.transcript_path, "w").close()
+
+    def transcript_text(self) -> str:
+        with self._lock:
+            return format_segments(self.segments)
+
+    def feed(self, samples: np.ndarray, sample_rate: int):
+        """Adds audio to the session; a window is transcribed once enough has arrived."""
+        samples = to_whisper_samples(samples, sample_rate, LIVE_SAMPLE_RATE)
+        with self._lock:
+            if self._closed:
+                return
+            self._buffer = np.concatenate([self._buffer, samples])
+            self._schedule()
+
+    def _schedule(self):
+        # Called with the lock held
+        if self._busy:
+            return
+        window, start = self._take_window(final=False)
+        if window is not None:
+            self._busy = True
+            self._executor.submit(self._process, window, start)
+
+    def _take_window(self, final: bool):
+        buffered = len(self._buffer)
+        if final:
+            if buffered < LIVE_MIN_FINAL_SECONDS * LIVE_SAMPLE_RATE:
+                return None, None
+            cut = buffered
+        else:
+            if buffered < self.window_seconds * LIVE_SAMPLE_RATE:
+                return None, None
+            # Cut in the quietest frame near the end, so a word is not split between windows
+            search = min(buffered, int(LIVE_SEARCH_SECONDS * LIVE_SAMPLE_RATE))
+            energy = frame_energy(self._buffer[buffered - search:], LIVE_SAMPLE_RATE)
+            frame_length = LIVE_SAMPLE_RATE * 30 // 1000
+            cut = buffered - search + int(np.argmin(energy)) * frame_length + frame_length // 2 if len(energy) else buffered
+
+        window, start = self._buffer[:cut], self._buffer_start
+        self._buffer = self._buffer[cut:]
+        self._buffer_start += cut / LIVE_SAMPLE_RATE
+        return window, start
+
+    def _process(self, window: np.ndarray, start: float):
+        try:
+            with span("live_window", seconds=round(len(window) / LIVE_SAMPLE_RATE, 3)):
+                self._transcribe(window, start)
+        except Exception as e:
+            traceback.print_exc()
+            self.error = str(e)
+        finally:
+            with self._lock:
+                self._busy = False
+                if not self._closed:
+                    self._schedule()
+
+    def _transcribe(self, window: np.ndarray, start: float):
+        wav_path = os.path.join(self._workspace, f"window_{start:.3f}.wav")
+        write_wav_samples(wav_path, window, LIVE_SAMPLE_RATE)
+        try:
+            segments = run_whisper(wav_path, self.whisper_model_name, work_dir=self._workspace)
+        finally:
+            os.remove(wav_path)
+        if not len(segments):
+            return
+
+        new_segments = [(segment_start + start, segment_end + start, text) for segment_start, segment_end, text in segments]
+        with self._lock:
+            self.segments.extend(new_segments)
+            self.language = self.language or segments.language
+        with open(self.transcript_path, "a") as f:
+            f.write(("\n" if os.path.getsize(self.transcript_path) else "") + format_segments(new_segments))
+
+        # Only the chunks touched by the new speech are embedded again
+        from backend.populate_database import main as update_database
+
+        update_database(self.transcript_path, meeting_id=self.meeting_id)
+        self.updated_at = time.time()
+
+        self._pending_text = "\n".join(filter(None, [self._pending_text, format_segments(new_segments)]))
+        self._fold_summary()
+
+    def _fold_summary(self):
+        language = "pt" if (self.language or "").startswith("pt") else "en"
+        prompt = build_rolling_summary_prompt(self.context, self.summary, self._pending_text, language)
+        with span("live_summary", model=self.llm_model_name):
+            summary = generate_with_model(self.llm_model_name, prompt).strip()
+        if summary:
+            self.summary = summary
+            self._pending_text = ""
+            self.updated_at = time.time()
+
+    def finish(self, timeout: float = None) -> str:
+        """
+        Transcribes the remaining audio, waits for the work in progress and releases the
+        session's resources.
+
+        Returns:
+            str: The final rolling summary.
+        """
+        with self._lock:
+            if self._closed:
+                return self.summary
+            self._closed = True
+
+        def flush():
+            with self._lock:
+                window, start = self._take_window(final=True)
+            if window is not None:
+                self._process(window, start)
+
+        # Runs after the window in progress, on the session's own thread
+        self._executor.submit(flush).result(timeout)
+        self._executor.shutdown(wait=True)
+        shutil.rmtree(self._workspace, ignore_errors=True)
+        if self.summary:
+            with open(get_summary_path(self.transcript_path), "w") as f:
+                f.write(self.summary)
+        return self.summary
+
+_sessions = OrderedDict()
+_sessions_lock = threading.Lock()
+
+def start_live_session(session_id: str, whisper_model_name: str, llm_model_name: str, context: str = "", meeting_id: str = None) -> LiveSession:
+    """Starts a live session, finishing any earlier session with the same ID."""
+    stop_live_session(session_id, wait=False)
+    session = LiveSession(meeting_id or f"live_{uuid.uuid4().hex[:12]}", whisper_model_name, llm_model_name, context)
+    with _sessions_lock:
+        _sessions[session_id] = session
+        while len(_sessions) > LIVE_MAX_SESSIONS:
+            _, evicted = _sessions.popitem(last=False)
+            threading.Thread(target=evicted.finish, daemon=True).start()
+    return session
+
+def get_live_session(session_id: str) -> LiveSession:
+    """Returns the live session with the given ID, or None."""
+    with _sessions_lock:
+        session = _sessions.get(session_id)
+        if session is not None:
+            _sessions.move_to_end(session_id)
+        return session
+
+def stop_live_session(session_id: str, wait: bool = True) -> LiveSession:
+    """Ends a live session. Returns it, or None if there was none."""
+    with _sessions_lock:
+        session = _sessions.pop(session_id, None)
+    if session is not None:
+        if wait:
+            session.finish()
+        else:
+            threading.Thread(target=session.finish, daemon=True).start()
+    return session
+
+def follow_wav(path: str, session: LiveSession, stop_event: threading.Event = None, idle_timeout: float = LIVE_IDLE_TIMEOUT):
+    """
+    Feeds a 16-bit PCM WAV file that is still being recorded into a live session, until
+    it stops growing for `idle_timeout` seconds or `stop_event` is set.
+    """
+    import wave
+
+    # The header's sizes are not final while recording, but the format fields are
+    with wave.open(path, "rb") as wav:
+        sample_rate, channels, sample_width = wav.getframerate(), wav.getnchannels(), wav.getsampwidth()
+    if sample_width != 2:
+        raise ValueError(f"Expected 16-bit PCM audio in {path}")
+    frame_size = channels * sample_width
+
+    with open(path, "rb") as f:
+        f.seek(find_wav_data_offset(f.read(4096)))
+        last_growth = time.monotonic()
+        while not (stop_event is not None and stop_event.is_set()):
+            data = f.read()
+            # A partially written frame is read again on the next pass
+            remainder = len(data) % frame_size
+            if remainder:
+                f.seek(-remainder, os.SEEK_CUR)
+            usable = len(data) - remainder
+            if usable:
+                samples = np.frombuffer(data[:usable], dtype=np.int16).reshape(-1, channels)
+                session.feed(samples, sample_rate)
+                last_growth = time.monotonic()
+            elif time.monotonic() - last_growth > idle_timeout:
+                break
+            time.sleep(LIVE_POLL_INTERVAL)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Transcribe and summarize a recording while it is being written.")
+    parser.add_argument("recording", help="16-bit PCM WAV file that is still growing.")
+    parser.add_argument("--whisper-model", required=True, help="Whisper model name (e.g. small).")
+    parser.add_argument("--llm-model", required=True, help="Ollama model used for the rolling summary.")
+    parser.add_argument("--context", default="", help="Optional context for the summary.")
+    parser.add_argument("--meeting-id", default=None, help="Meeting ID (defaults to a new live_ ID).")
+    parser.add_argument("--idle-timeout", type=float, default=LIVE_IDLE_TIMEOUT, help="Seconds without growth before stopping.")
+    args = parser.parse_args()
+
+    live = LiveSession(
+        args.meeting_id or f"live_{uuid.uuid4().hex[:12]}", args.whisper_model, args.llm_model, args.context
+    )
+    stop = threading.Event()
+    follower = threading.Thread(target=follow_wav, args=(args.recording, live, stop, args.idle_timeout), daemon=True)
+    follower.start()
+    printed_at = 0.0
+    try:
+        while follower.is_alive():
+            follower.join(LIVE_POLL_INTERVAL)
+            if live.updated_at > printed_at and live.summary:
+                printed_at = live.updated_at
+                print(f"\n--- Summary ({len(live.segments)} segments) ---\n{live.summary}")
+    except KeyboardInterrupt:
+        stop.set()
+    print(f"\n--- Final summary ---\n{live.finish()}\nTranscript: {live.transcript_path}")
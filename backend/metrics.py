@@ -0,0 +1,175 @@
+import contextvars
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Port of the Prometheus endpoint started next to the Gradio app
+METRICS_PORT = 9464
+# Structured per-job trace log (one JSON line per job); disabled unless set
+TRACE_LOG_PATH = os.environ.get("MEETING_TRACE_LOG")
+# Upper bounds (seconds) of the stage duration histogram buckets
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800)
+
+_lock = threading.Lock()
+_counters = {}
+_gauges = {}
+_histograms = {}
+_help = {
+    "meeting_stage_duration_seconds": "Time spent in each pipeline stage.",
+    "meeting_bytes_processed_total": "Bytes read by each pipeline stage.",
+    "meeting_chunks_embedded_total": "Transcript chunks embedded into the vector store.",
+    "meeting_tokens_generated_total": "Tokens generated by the Ollama server.",
+    "meeting_jobs_total": "Background jobs by final status.",
+    "meeting_semantic_cache_total": "Chat questions answered from the semantic cache (hit) or not (miss).",
+    "meeting_jobs_queued": "Background jobs waiting for a worker.",
+    "meeting_whisper_servers": "whisper.cpp servers kept warm by the worker pool.",
+    "meeting_chat_prompt_eval_seconds": "Time the chat model spent evaluating the prompt of each turn.",
+    "meeting_chat_prompt_tokens_total": "Prompt tokens evaluated by the chat model.",
+    "meeting_bundles_imported_total": "Meeting bundles loaded into this node.",
+    "meeting_silence_removed_seconds_total": "Seconds of silence cut from recordings before transcription.",
+}
+
+# Spans of the job running in the current context, when a trace is active
+_current_trace = contextvars.ContextVar("meeting_trace", default=None)
+
+def _key(name: str, labels: dict) -> tuple:
+    return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+def increment(name: str, value: float = 1, **labels):
+    """Adds `value` to a counter."""
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+def set_gauge(name: str, value: float, **labels):
+    """Sets a gauge to `value`."""
+    with _lock:
+        _gauges[_key(name, labels)] = value
+
+def observe(name: str, value: float, **labels):
+    """Records one observation in a histogram."""
+    key = _key(name, labels)
+    with _lock:
+        histogram = _histograms.get(key)
+        if histogram is None:
+            histogram = _histograms[key] = {"buckets": [0] * len(DURATION_BUCKETS), "sum": 0.0, "count": 0}
+        for i, bound in enumerate(DURATION_BUCKETS):
+            if value <= bound:
+                histogram["buckets"][i] += 1
+        histogram["sum"] += value
+        histogram["count"] += 1
+
+@contextmanager
+def span(stage: str, **attributes):
+    """
+    Times a pipeline stage. The duration is recorded in the
+    meeting_stage_duration_seconds histogram and, when a job trace is active, appended
+    to it together with `attributes`.
+    """
+    start = time.perf_counter()
+    started_at = time.time()
+    error = None
+    try:
+        yield
+    except BaseException as e:
+        error = type(e).__name__
+        raise
+    finally:
+        duration = time.perf_counter() - start
+        observe("meeting_stage_duration_seconds", duration, stage=stage)
+        trace = _current_trace.get()
+        if trace is not None:
+            entry = {"stage": stage, "start": started_at, "duration_s": round(duration, 6), **attributes}
+            if error:
+                entry["error"] = error
+            trace["spans"].append(entry)
+
+@contextmanager
+def job_trace(job_id: str, **attributes):
+    """
+    Collects the spans of one job and writes them as a JSON line to TRACE_LOG_PATH
+    when the job finishes (nothing is written when the trace log is disabled).
+    """
+    trace = {"job_id": job_id, "start": time.time(), **attributes, "spans": []}
+    token = _current_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        _current_trace.reset(token)
+        trace["duration_s"] = round(time.time() - trace["start"], 6)
+        if TRACE_LOG_PATH:
+            line = json.dumps(trace)
+            with _lock:
+                with open(TRACE_LOG_PATH, "a") as f:
+                    f.write(line + "\n")
+
+def in_current_context(fn):
+    """
+    Wraps `fn` for a worker thread so every call runs in its own copy of the caller's
+    context, keeping the spans of executor tasks in the job trace.
+    """
+    context = contextvars.copy_context()
+
+    def run(*args, **kwargs):
+        # A context cannot be entered by two threads at once
+        return context.copy().run(fn, *args, **kwargs)
+    return run
+
+def _format_labels(labels: tuple, extra: tuple = ()) -> str:
+    items = labels + extra
+    if not items:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in items) + "}"
+
+def render_prometheus() -> str:
+    """Renders every metric in the Prometheus text exposition format."""
+    lines = []
+    declared = set()
+
+    def declare(name: str, kind: str):
+        if name not in declared:
+            declared.add(name)
+            if name in _help:
+                lines.append(f"# HELP {name} {_help[name]}")
+            lines.append(f"# TYPE {name} {kind}")
+
+    with _lock:
+        for (name, labels), value in sorted(_counters.items()):
+            declare(name, "counter")
+            lines.append(f"{name}{_format_labels(labels)} {value}")
+        for (name, labels), value in sorted(_gauges.items()):
+            declare(name, "gauge")
+            lines.append(f"{name}{_format_labels(labels)} {value}")
+        for (name, labels), histogram in sorted(_histograms.items()):
+            declare(name, "histogram")
+            for bound, count in zip(DURATION_BUCKETS, histogram["buckets"]):
+                lines.append(f"{name}_bucket{_format_labels(labels, (('le', str(bound)),))} {count}")
+            lines.append(f"{name}_bucket{_format_labels(labels, (('le', '+Inf'),))} {histogram['count']}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {histogram['sum']}")
+            lines.append(f"{name}_count{_format_labels(labels)} {histogram['count']}")
+    return "\n".join(lines) + "\n"
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = render_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+def start_metrics_server(port: int = METRICS_PORT, host: str = "0.0.0.0") -> ThreadingHTTPServer:
+    """Serves /metrics on a background thread and returns the server."""
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
@@ -1,31 +1,34 @@
 import os
-import requests
 
-OLLAMA_SERVER_URL = "http://localhost:11434"
+# The Ollama server can be moved (or replaced by a stand-in) with the OLLAMA_SERVER_URL variable
+OLLAMA_SERVER_URL = os.environ.get("OLLAMA_SERVER_URL", "http://localhost:11434")
 WHISPER_MODEL_DIR = "./whisper.cpp/models"
 
 def get_available_models() -> list[str]:
     """
     Retrieves a list of all available models from the Ollama server and extracts the model names.
 
+    The listing is cached for a short time by the shared Ollama client.
+
     Returns:
         A list of model names available on the Ollama server.
     """
-    response = requests.get(f"{OLLAMA_SERVER_URL}/api/tags")
-    if response.status_code == 200:
-        models = response.json()["models"]
-        llm_model_names = [model["model"] for model in models]
-        return llm_model_names
-    else:
-        raise Exception(f"Failed to retrieve models from Ollama server: {response.text}")
-
-def get_available_whisper_models() -> list[str]:
+    from .ollama_client import get_ollama_client
+
+    return get_ollama_client().list_models()
+
+def get_available_whisper_models() -> list[tuple[str, str]]:
     """
     Retrieves a list of available Whisper models based on downloaded .bin files.
 
+    Models that currently have a warm server in the whisper pool are listed first and
+    labelled as such.
+
     Returns:
-        A list of available Whisper model names.
+        A list of (label, model name) tuples, as accepted by Gradio dropdowns.
     """
+    from .whisper_pool import get_whisper_pool, whisper_pool_available
+
     valid_models = ["base", "small", "medium", "large", "large-V3"]
     model_files = [f for f in os.listdir(WHISPER_MODEL_DIR) if f.endswith(".bin")]
     whisper_models = [
@@ -33,4 +36,8 @@ def get_available_whisper_models() -> list[str]:
         for f in model_files
         if any(valid_model in f for valid_model in valid_models) and "test" not in f
     ]
-    return list(set(whisper_models))
\ No newline at end of file
+    warm = set(get_whisper_pool().warm_models()) if whisper_pool_available() else set()
+    return [
+        (f"{model} (warm)" if model in warm else model, model)
+        for model in sorted(set(whisper_models), key=lambda model: (model not in warm, model))
+    ]
\ No newline at end of file
@@ -0,0 +1,217 @@
+import asyncio
+import json
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from .model_services import OLLAMA_SERVER_URL
+from .rag_app.resources import get_resource
+
+# Connection settings for the Ollama server
+OLLAMA_CONNECT_TIMEOUT = 5        # Seconds to establish a connection
+OLLAMA_READ_TIMEOUT = 300         # Seconds to wait between two bytes of a response
+OLLAMA_RETRIES = 3                # Retries for connection errors and 502/503/504 responses
+OLLAMA_BACKOFF = 0.5              # Backoff factor between retries (0.5s, 1s, 2s, ...)
+OLLAMA_POOL_SIZE = 16             # Keep-alive connections kept per host
+MODEL_LIST_TTL = 30               # Seconds a model listing is reused
+
+class OllamaError(Exception):
+    """Raised when the Ollama server returns an error or an unreadable response."""
+
+def _parse_stream_line(line: bytes) -> dict:
+    try:
+        return json.loads(line.decode("utf-8"))
+    except json.JSONDecodeError:
+        raise OllamaError(f"Failed to parse the response from the server. Raw response: {line[:200]!r}")
+
+class OllamaClient:
+    """
+    Thread-safe client for the Ollama HTTP API with keep-alive connection pooling,
+    timeouts and retries with exponential backoff.
+    """
+
+    def __init__(
+        self,
+        base_url: str = OLLAMA_SERVER_URL,
+        connect_timeout: float = OLLAMA_CONNECT_TIMEOUT,
+        read_timeout: float = OLLAMA_READ_TIMEOUT,
+        retries: int = OLLAMA_RETRIES,
+        backoff: float = OLLAMA_BACKOFF,
+        pool_size: int = OLLAMA_POOL_SIZE,
+        model_list_ttl: float = MODEL_LIST_TTL,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = (connect_timeout, read_timeout)
+        self.model_list_ttl = model_list_ttl
+        self._models = None
+        self._models_fetched_at = 0.0
+        self._models_lock = threading.Lock()
+
+        retry = Retry(
+            total=retries,
+            backoff_factor=backoff,
+            status_forcelist=(502, 503, 504),
+            allowed_methods=frozenset({"GET", "POST"}),
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def list_models(self, use_cache: bool = True) -> list[str]:
+        """
+        Returns the names of the models available on the server. The listing is reused
+        for MODEL_LIST_TTL seconds unless `use_cache` is False.
+        """
+        with self._models_lock:
+            if use_cache and self._models is not None and time.monotonic() - self._models_fetched_at < self.model_list_ttl:
+                return list(self._models)
+
+        response = self.session.get(f"{self.base_url}/api/tags", timeout=self.timeout)
+        if response.status_code != 200:
+            raise OllamaError(f"Failed to retrieve models from Ollama server: {response.text}")
+        models = [model["model"] for model in response.json()["models"]]
+
+        with self._models_lock:
+            self._models = models
+            self._models_fetched_at = time.monotonic()
+        return list(models)
+
+    def invalidate_model_list(self):
+        """Forgets the cached model listing, e.g. after pulling a new model."""
+        with self._models_lock:
+            self._models = None
+
+    def generate_stream(self, model: str, prompt: str, cancel_event=None, **options):
+        """
+        Calls /api/generate and yields each decoded NDJSON message.
+
+        Closing the generator, or setting `cancel_event`, closes the connection, which
+        makes the server stop generating. Extra keyword arguments (e.g. `context`,
+        `keep_alive`, `options`) are sent as request fields.
+        """
+        data = {"model": model, "prompt": prompt, **options}
+        response = self.session.post(f"{self.base_url}/api/generate", json=data, stream=True, timeout=self.timeout)
+        try:
+            if response.status_code != 200:
+                raise OllamaError(f"Failed to generate with model {model}: {response.text}")
+            for line in response.iter_lines():
+                if cancel_event is not None and cancel_event.is_set():
+                    return
+                if line:
+                    message = _parse_stream_line(line)
+                    if "error" in message:
+                        raise OllamaError(f"Failed to generate with model {model}: {message['error']}")
+                    yield message
+                    if message.get("done", False):
+                        return
+        finally:
+            response.close()
+
+    def generate(self, model: str, prompt: str, **options) -> str:
+        """Calls /api/generate and returns the complete response text."""
+        return "".join(message.get("response", "") for message in self.generate_stream(model, prompt, **options))
+
+    def close(self):
+        self.session.close()
+
+class AsyncOllamaClient:
+    """
+    asyncio variant of OllamaClient for fanning out many requests from one thread.
+
+    Use it as an async context manager so the underlying aiohttp session is closed.
+    """
+
+    def __init__(
+        self,
+        base_url: str = OLLAMA_SERVER_URL,
+        connect_timeout: float = OLLAMA_CONNECT_TIMEOUT,
+        read_timeout: float = OLLAMA_READ_TIMEOUT,
+        retries: int = OLLAMA_RETRIES,
+        backoff: float = OLLAMA_BACKOFF,
+        pool_size: int = OLLAMA_POOL_SIZE,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.pool_size = pool_size
+        self._session = None
+
+    async def __aenter__(self):
+        import aiohttp
+
+        self._session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit_per_host=self.pool_size),
+            timeout=aiohttp.ClientTimeout(sock_connect=self.connect_timeout, sock_read=self.read_timeout),
+        )
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def _request(self, method: str, path: str, **kwargs):
+        import aiohttp
+
+        for attempt in range(self.retries + 1):
+            try:
+                response = await self._session.request(method, f"{self.base_url}{path}", **kwargs)
+                if response.status not in (502, 503, 504) or attempt == self.retries:
+                    return response
+                response.release()
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+                if attempt == self.retries:
+                    raise
+            await asyncio.sleep(self.backoff * (2 ** attempt))
+
+    async def list_models(self) -> list[str]:
+        response = await self._request("GET", "/api/tags")
+        async with response:
+            if response.status != 200:
+                raise OllamaError(f"Failed to retrieve models from Ollama server: {await response.text()}")
+            return [model["model"] for model in (await response.json())["models"]]
+
+    async def generate_stream(self, model: str, prompt: str, **options):
+        """Async generator over the decoded NDJSON messages of /api/generate."""
+        response = await self._request("POST", "/api/generate", json={"model": model, "prompt": prompt, **options})
+        async with response:
+            if response.status != 200:
+                raise OllamaError(f"Failed to generate with model {model}: {await response.text()}")
+            async for line in response.content:
+                line = line.strip()
+                if line:
+                    message = _parse_stream_line(line)
+                    if "error" in message:
+                        raise OllamaError(f"Failed to generate with model {model}: {message['error']}")
+                    yield message
+                    if message.get("done", False):
+                        return
+
+    async def generate(self, model: str, prompt: str, **options) -> str:
+        text = ""
+        async for message in self.generate_stream(model, prompt, **options):
+            text += message.get("response", "")
+        return text
+
+    async def generate_many(self, model: str, prompts: list[str], max_concurrency: int = 4, **options) -> list[str]:
+        """Runs several prompts concurrently (at most `max_concurrency` at a time), keeping their order."""
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def run(prompt):
+            async with semaphore:
+                return await self.generate(model, prompt, **options)
+
+        return await asyncio.gather(*(run(prompt) for prompt in prompts))
+
+def get_ollama_client(base_url: str = None) -> OllamaClient:
+    """Returns the process-wide client for an Ollama server, sharing its connection pool."""
+    base_url = base_url or OLLAMA_SERVER_URL
+    return get_resource(("ollama_client", base_url), lambda: OllamaClient(base_url))
@@ -1,11 +1,16 @@
 import argparse
+import hashlib
 import os
 import sys
 import shutil
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain.schema import Document
-from langchain_chroma import Chroma
-from backend.rag_app.get_embedding_function import get_embedding_function
+from backend.rag_app.get_chroma_db import get_chroma_db, get_meeting_id, get_collection_name, NUMPY_STORE_PATH
+from backend.rag_app.get_embedding_function import EMBEDDING_MODEL_NAME
+from backend.rag_app.resources import invalidate_resources
+from backend.rag_app.semantic_cache import semantic_cache
+from backend.metrics import span, increment
+from backend.transcription import TranscriptSegments
 
 # Ensure the project root is in sys.path
 project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
@@ -15,76 +20,138 @@ sys.path.append(project_root)
 CHROMA_PATH = os.path.join('data', 'chroma')  # This will be 'data/chroma' in the root directory
 DATA_SOURCE_PATH = os.path.join('data', 'transcript.txt')  # 'data/transcript.txt' in root directory
 
-def main(transcript_path=DATA_SOURCE_PATH, reset=False):
+# Chunk sizing, in characters
+CHUNK_SIZE = 600
+CHUNK_OVERLAP = 120
+
+def main(transcript_path=DATA_SOURCE_PATH, reset=False, meeting_id=None):
     if reset:
         print("✨ Clearing Database")
         clear_database()
 
+    # Each transcript is stored in its own collection, named after the meeting
+    meeting_id = meeting_id or get_meeting_id(transcript_path)
+
     # Load and process the transcript file
-    documents = load_transcription(transcript_path)
-    chunks = split_documents(documents)
-    add_to_chroma(chunks)
+    documents = load_transcription(transcript_path, meeting_id)
+    with span("split_documents"):
+        chunks = split_documents(documents)
+    add_to_chroma(chunks, meeting_id)
 
-def load_transcription(file_path):
+def load_transcription(file_path, meeting_id=None):
     with open(file_path, 'r') as f:
         content = f.read()
-    document = Document(page_content=content, metadata={"source": file_path})
+    document = Document(
+        page_content=content,
+        metadata={"source": file_path, "meeting_id": meeting_id or get_meeting_id(file_path)},
+    )
     return [document]
 
 def split_documents(documents: list[Document]):
+    """
+    Splits transcripts into chunks for embedding. Timestamped whisper transcripts are
+    cut between segments and each chunk records its time range in the "start" and "end"
+    metadata (seconds); other text, including transcripts with any line that has no
+    timestamp, is split by characters.
+    """
     text_splitter = RecursiveCharacterTextSplitter(
-        chunk_size=600,
-        chunk_overlap=120,
+        chunk_size=CHUNK_SIZE,
+        chunk_overlap=CHUNK_OVERLAP,
         length_function=len,
         is_separator_regex=False,
     )
-    return text_splitter.split_documents(documents)
+    chunks = []
+    for document in documents:
+        segments = TranscriptSegments.from_text(document.page_content)
+        # Lines without a timestamp would be left out of the segments, so such text is split as is
+        lines = sum(1 for line in document.page_content.splitlines() if line.strip())
+        if not len(segments) or len(segments) != lines:
+            chunks.extend(text_splitter.split_documents([document]))
+            continue
+        for start, end, text in segments.chunks(CHUNK_SIZE, CHUNK_OVERLAP):
+            chunks.append(Document(page_content=text, metadata={**document.metadata, "start": start, "end": end}))
+    return chunks
 
-def add_to_chroma(chunks: list[Document]):
-    embeddings = get_embedding_function()
-    db = Chroma(persist_directory=CHROMA_PATH, embedding_function=embeddings)
+def add_to_chroma(chunks: list[Document], meeting_id: str = None):
+    """
+    Synchronizes a meeting's collection with its current chunks: only chunks whose
+    content is not stored yet are embedded, and chunks that disappeared are deleted.
+    """
+    db = get_chroma_db(meeting_id, CHROMA_PATH)
+    new_chunks, stale_ids = plan_sync(db, calculate_chunk_ids(chunks), meeting_id)
 
-    chunks_with_ids = calculate_chunk_ids(chunks)
-    # Check if the database exists and retrieve existing IDs
-    if os.path.exists(CHROMA_PATH):
-        existing_ids = db.get(include=[])["ids"]
-    else:
-        existing_ids = []
-    new_chunks = [chunk for chunk in chunks_with_ids if chunk.metadata["id"] not in existing_ids]
+    # Cached answers may cite content that is about to change
+    if stale_ids or new_chunks:
+        semantic_cache.invalidate_meeting(meeting_id)
+
+    if stale_ids:
+        print(f"🧹 Removing outdated documents: {len(stale_ids)}")
+        db.delete(ids=stale_ids)
 
     if new_chunks:
         print(f"👉 Adding new documents: {len(new_chunks)}")
-        db.add_documents(new_chunks, ids=[chunk.metadata["id"] for chunk in new_chunks])
-        # Remove or comment out the line below
-        # db.persist()
+        with span("embed_chunks", chunks=len(new_chunks)):
+            db.add_documents(new_chunks, ids=[chunk.metadata["id"] for chunk in new_chunks])
+        increment("meeting_chunks_embedded_total", len(new_chunks))
     else:
         print("✅ No new documents to add")
 
+def plan_sync(db, chunks_with_ids: list[Document], meeting_id: str = None) -> tuple[list[Document], list[str]]:
+    """
+    Returns the chunks missing from a meeting's collection and the stored IDs no longer in use.
+
+    Only IDs of `meeting_id` (those starting with "<meeting_id>:") are ever reported as
+    stale, so chunks of another meeting found in the same collection are left alone.
+    """
+    chunk_ids = {chunk.metadata["id"] for chunk in chunks_with_ids}
+    # The collection only holds this meeting, so listing its IDs stays cheap
+    existing_ids = set(db.get(include=[])["ids"])
+    new_chunks = [chunk for chunk in chunks_with_ids if chunk.metadata["id"] not in existing_ids]
+    stale_ids = existing_ids - chunk_ids
+    if meeting_id:
+        stale_ids = {chunk_id for chunk_id in stale_ids if chunk_id.startswith(f"{meeting_id}:")}
+    return new_chunks, list(stale_ids)
 
 def calculate_chunk_ids(chunks):
-    last_page_id = None
-    current_chunk_index = 0
+    """
+    Assigns each chunk an ID derived from its meeting and a hash of its content, so that
+    re-ingesting an edited transcript only changes the IDs of the chunks that changed.
+    Repeated identical chunks within a meeting get an occurrence suffix.
+    """
+    seen = {}
 
     for chunk in chunks:
-        source = chunk.metadata.get("source")
-        current_page_id = f"{source}"
+        meeting_id = chunk.metadata.get("meeting_id") or chunk.metadata.get("source")
+        content_hash = hashlib.sha256(chunk.page_content.encode("utf-8")).hexdigest()[:24]
+        base_id = f"{meeting_id}:{content_hash}"
 
-        if current_page_id == last_page_id:
-            current_chunk_index += 1
-        else:
-            current_chunk_index = 0
-
-        chunk.metadata["id"] = f"{current_page_id}:{current_chunk_index}"
-        last_page_id = current_page_id
+        occurrence = seen.get(base_id, 0)
+        seen[base_id] = occurrence + 1
+        chunk.metadata["id"] = base_id if occurrence == 0 else f"{base_id}:{occurrence}"
 
     return chunks
 
+def delete_meeting(meeting_id: str):
+    """Removes a meeting's collection from the database."""
+    db = get_chroma_db(meeting_id, CHROMA_PATH)
+    db.delete_collection()
+    semantic_cache.invalidate_meeting(meeting_id)
+    invalidate_resources("chroma", os.path.abspath(CHROMA_PATH), EMBEDDING_MODEL_NAME, get_collection_name(meeting_id))
+    invalidate_resources("numpy_store", os.path.abspath(NUMPY_STORE_PATH), EMBEDDING_MODEL_NAME, get_collection_name(meeting_id))
+
 def clear_database():
-    if os.path.exists(CHROMA_PATH):
-        shutil.rmtree(CHROMA_PATH)
+    # Drop the cached handles first so nothing keeps using the deleted files
+    invalidate_resources("chroma", os.path.abspath(CHROMA_PATH))
+    invalidate_resources("numpy_store", os.path.abspath(NUMPY_STORE_PATH))
+    semantic_cache.clear()
+    for path in (CHROMA_PATH, NUMPY_STORE_PATH):
+        if os.path.exists(path):
+            shutil.rmtree(path)
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument("--reset", action="store_true", help="Reset the database.")
+    parser.add_argument("--transcript", default=DATA_SOURCE_PATH, help="Transcript file to ingest.")
+    parser.add_argument("--meeting-id", default=None, help="Meeting ID (defaults to the transcript file name).")
     args = parser.parse_args()
-    main(reset=args.reset)
+    main(args.transcript, reset=args.reset, meeting_id=args.meeting_id)
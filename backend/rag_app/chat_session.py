@@ -0,0 +1,144 @@
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from .get_chat_model import LOCAL_LLM, CHAT_KEEP_ALIVE
+from .conversation_memory import estimate_tokens, format_messages
+from backend.metrics import increment, observe
+
+# Set CHAT_SESSIONS=0 to send every question as a standalone prompt
+CHAT_SESSIONS_ENABLED = os.environ.get("CHAT_SESSIONS", "1") != "0"
+
+# Chat session settings
+CHAT_SESSION_MAX_TOKENS = int(os.environ.get("CHAT_SESSION_MAX_TOKENS", "3000"))  # Context kept before starting over
+CHAT_SESSION_ANSWER_TOKENS = 1024      # Room left in the model's context for the next answer
+CHAT_SESSION_OPENING_CHARS = 1500      # Start of the transcript included in the fixed prefix
+CHAT_MAX_SESSIONS = 256                # Sessions kept in memory (least recently used dropped)
+
+# Sent once per session; everything after it in the model's context is appended turn by turn
+SESSION_PREFIX_TEMPLATE = """
+You are an assistant who answers questions about a meeting. Each question comes with excerpts of the meeting transcript retrieved for it. Use the excerpts and the conversation so far to provide a concise and accurate answer. Do not include the excerpts, the history, or any extraneous information in your response.
+
+Meeting: {meeting}
+
+Opening of the transcript:
+{opening}
+"""
+
+TURN_TEMPLATE = """
+{history}Context:
+{context}
+
+Question:
+{question}
+
+Answer:
+"""
+
+@dataclass
+class PromptEval:
+    tokens: int                    # Prompt tokens the model evaluated for this turn
+    seconds: float                 # Time the model spent evaluating them
+    reused_tokens: int = 0         # Tokens of earlier turns taken from the session's context
+
+def record_prompt_eval(model: str, metadata: dict, mode: str, reused_tokens: int = 0) -> PromptEval:
+    """Records the prompt evaluation reported in the final message of an Ollama response."""
+    # Ollama leaves the counts out when the whole prompt came from its cache
+    prompt_eval = PromptEval(
+        metadata.get("prompt_eval_count") or 0,
+        (metadata.get("prompt_eval_duration") or 0) / 1e9,
+        reused_tokens,
+    )
+    observe("meeting_chat_prompt_eval_seconds", prompt_eval.seconds, model=model, mode=mode)
+    increment("meeting_chat_prompt_tokens_total", prompt_eval.tokens, model=model, mode=mode)
+    return prompt_eval
+
+def read_opening(transcript_file: str, limit: int = CHAT_SESSION_OPENING_CHARS) -> str:
+    try:
+        with open(transcript_file, encoding="utf-8", errors="replace") as f:
+            return f.read(limit).strip() or "(empty)"
+    except OSError:
+        return "(not available)"
+
+class ChatSession:
+    """
+    A conversation about one meeting that keeps the model's evaluated state between turns.
+
+    The first prompt starts with a fixed prefix (instructions and the opening of the
+    transcript). Every later question is sent with the `context` Ollama returned for the
+    previous answer, so only the new excerpts and question are evaluated, and the model
+    is kept loaded with `keep_alive` so that state stays valid. The model's context window
+    (`num_ctx`) is set to `max_tokens` plus room for an answer, since Ollama's default
+    would silently cut the session's context. Once the context grows past `max_tokens`,
+    the session starts over from the prefix and the conversation memory.
+    """
+
+    def __init__(self, meeting_id: str, opening: str, model: str = LOCAL_LLM, max_tokens: int = CHAT_SESSION_MAX_TOKENS):
+        self.meeting_id = meeting_id
+        self.model = model
+        self.max_tokens = max_tokens
+        self.num_ctx = max_tokens + CHAT_SESSION_ANSWER_TOKENS
+        self.prefix = SESSION_PREFIX_TEMPLATE.format(meeting=meeting_id, opening=opening)
+        self.context = None            # Ollama's token state after the last answer
+        self.covered = 0               # History messages already part of `context`
+        self.last_prompt_eval = None
+        self._lock = threading.Lock()
+
+    def _build_prompt(self, history: list, history_text: str, context_text: str, question: str) -> tuple[str, list]:
+        def turn(history_part: str) -> str:
+            history_part = f"Conversation History:\n{history_part}\n\n" if history_part else ""
+            return TURN_TEMPLATE.format(history=history_part, context=context_text, question=question)
+
+        restart = (
+            self.context is None
+            # A shorter history means the conversation was cleared
+            or len(history) < self.covered
+            or len(self.context) + estimate_tokens(turn("")) > self.max_tokens
+        )
+        if restart:
+            return self.prefix + turn(history_text), None
+
+        # Answers given without the model (cached or direct) are not in the context yet
+        return turn(format_messages(history[self.covered:])), self.context
+
+    def stream(self, history: list, history_text: str, context_text: str, question: str, cancel_event=None):
+        """
+        Yields the answer as it is generated. The session only advances when the answer
+        completes, matching the history, which is not updated for cancelled answers.
+        """
+        from backend.ollama_client import get_ollama_client
+
+        with self._lock:
+            self.last_prompt_eval = None
+            prompt, context = self._build_prompt(history, history_text, context_text, question)
+            messages = get_ollama_client().generate_stream(
+                self.model, prompt, cancel_event,
+                context=context, keep_alive=CHAT_KEEP_ALIVE, options={"temperature": 0, "num_ctx": self.num_ctx},
+            )
+            try:
+                for message in messages:
+                    if message.get("done", False):
+                        increment("meeting_tokens_generated_total", message.get("eval_count", 0), model=self.model, stage="chat")
+                        self.last_prompt_eval = record_prompt_eval(
+                            self.model, message, "session", len(context) if context else 0
+                        )
+                        self.context = message.get("context")
+                        # The question and answer are appended to the history once the turn completes
+                        self.covered = len(history) + 2
+                    yield message.get("response", "")
+            finally:
+                messages.close()
+
+_sessions = OrderedDict()
+_sessions_lock = threading.Lock()
+
+def get_chat_session(thread_id: str, meeting_id: str, transcript_file: str, model: str = LOCAL_LLM) -> ChatSession:
+    """Returns the chat session of a conversation, starting a new one when the meeting changes."""
+    with _sessions_lock:
+        session = _sessions.get(thread_id)
+        if session is None or session.meeting_id != meeting_id or session.model != model:
+            session = _sessions[thread_id] = ChatSession(meeting_id, read_opening(transcript_file), model)
+            while len(_sessions) > CHAT_MAX_SESSIONS:
+                _sessions.popitem(last=False)
+        _sessions.move_to_end(thread_id)
+        return session
@@ -0,0 +1,126 @@
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from .get_chat_model import get_chat_model, LOCAL_LLM
+
+# Conversation memory settings
+MEMORY_RECENT_TURNS = 4          # Question/answer pairs always kept verbatim
+MEMORY_TOKEN_BUDGET = 1200       # Approximate tokens of history sent with each question
+MEMORY_MAX_SESSIONS = 256        # Conversations kept in memory (least recently used dropped)
+CHARS_PER_TOKEN = 4              # Rough token estimate used for budgeting
+
+SUMMARY_PROMPT_TEMPLATE = """
+You maintain a running summary of a conversation between a user and an assistant about a meeting transcript. Update the summary with the new messages below. Keep names, decisions, numbers and open questions. Reply with the updated summary only.
+
+Current summary:
+{summary}
+
+New messages:
+{messages}
+
+Updated summary:
+"""
+
+# Folding runs off the request path, one summary update at a time
+_summary_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="memory")
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN + 1
+
+def format_messages(messages: list) -> str:
+    return "\n".join(f"{msg['role'].capitalize()}: {msg['content']}" for msg in messages)
+
+class ConversationMemory:
+    """
+    Token-budgeted view of a chat history.
+
+    The most recent turns are kept verbatim; older turns are folded into a rolling
+    summary by the chat model in the background, so the history part of each prompt
+    stays roughly constant in size however long the conversation gets.
+    """
+
+    def __init__(self, recent_turns: int = MEMORY_RECENT_TURNS, token_budget: int = MEMORY_TOKEN_BUDGET, model: str = LOCAL_LLM):
+        self.recent_turns = recent_turns
+        self.token_budget = token_budget
+        self.model = model
+        self.summary = ""
+        self.folded = 0              # Number of history messages already in the summary
+        self._folding = False
+        self._lock = threading.Lock()
+
+    def _reset_if_replaced(self, history: list):
+        # A shorter history means the conversation was cleared
+        if len(history) < self.folded:
+            self.summary = ""
+            self.folded = 0
+
+    def format(self, history: list) -> str:
+        """Returns the history text for the prompt: the rolling summary plus recent messages."""
+        with self._lock:
+            self._reset_if_replaced(history)
+            summary, folded = self.summary, self.folded
+
+        budget = self.token_budget - (estimate_tokens(summary) if summary else 0)
+        recent = []
+        # Walk back from the newest message; unfolded messages are kept while they fit
+        for index, message in enumerate(reversed(history[folded:])):
+            cost = estimate_tokens(message["content"]) + 2
+            if index >= self.recent_turns * 2 and cost > budget:
+                break
+            recent.append(message)
+            budget -= cost
+        recent.reverse()
+
+        parts = []
+        if summary:
+            parts.append(f"Summary of the earlier conversation: {summary}")
+        if recent:
+            parts.append(format_messages(recent))
+        return "\n".join(parts)
+
+    def update(self, history: list):
+        """Folds messages older than the recent window into the summary, in the background."""
+        with self._lock:
+            self._reset_if_replaced(history)
+            fold_until = len(history) - self.recent_turns * 2
+            if self._folding or fold_until <= self.folded:
+                return
+            self._folding = True
+            messages = list(history[self.folded:fold_until])
+            summary = self.summary
+        _summary_executor.submit(self._fold, summary, messages, fold_until)
+
+    def _fold(self, summary: str, messages: list, fold_until: int):
+        from langchain.schema import HumanMessage
+
+        try:
+            prompt = SUMMARY_PROMPT_TEMPLATE.format(
+                summary=summary or "(empty)", messages=format_messages(messages)
+            )
+            response = get_chat_model(self.model).invoke([HumanMessage(content=prompt)])
+            with self._lock:
+                # Skip the result if the conversation was cleared meanwhile
+                if self.folded <= fold_until and self.summary == summary:
+                    self.summary = response.content.strip()
+                    self.folded = fold_until
+        except Exception as e:
+            # Unfolded messages stay verbatim (within budget) and are retried on the next turn
+            print(f"Failed to update the conversation summary: {e}")
+        finally:
+            with self._lock:
+                self._folding = False
+
+_memories = OrderedDict()
+_memories_lock = threading.Lock()
+
+def get_conversation_memory(thread_id: str) -> ConversationMemory:
+    """Returns the memory of a conversation, creating it on first use."""
+    with _memories_lock:
+        memory = _memories.get(thread_id)
+        if memory is None:
+            memory = _memories[thread_id] = ConversationMemory()
+            while len(_memories) > MEMORY_MAX_SESSIONS:
+                _memories.popitem(last=False)
+        else:
+            _memories.move_to_end(thread_id)
+        return memory
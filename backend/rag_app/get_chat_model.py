@@ -0,0 +1,17 @@
+import os
+from .resources import get_resource
+from backend.model_services import OLLAMA_SERVER_URL
+
+# Default chat model served by Ollama
+LOCAL_LLM = "llama3.2"
+# How long Ollama keeps the chat model (and the state of chat sessions) loaded after a request
+CHAT_KEEP_ALIVE = os.environ.get("CHAT_KEEP_ALIVE", "30m")
+
+def get_chat_model(model: str = LOCAL_LLM, temperature: float = 0):
+    def connect():
+        from langchain_ollama import ChatOllama
+
+        return ChatOllama(model=model, temperature=temperature, base_url=OLLAMA_SERVER_URL, keep_alive=CHAT_KEEP_ALIVE)
+
+    # One client per model/temperature, built on first use and shared across chat turns
+    return get_resource(("chat_model", model, temperature), connect)
@@ -1,4 +1,6 @@
+import hashlib
 import os
+import re
 import sys
 
 # Ensure the project root is in sys.path
@@ -6,18 +8,80 @@ current_dir = os.path.dirname(os.path.abspath(__file__))
 project_root = os.path.abspath(os.path.join(current_dir, '..', '..'))
 sys.path.append(project_root)
 
-from langchain_chroma import Chroma
-from .get_embedding_function import get_embedding_function
+import numpy as np
+from .get_embedding_function import get_embedding_function, EMBEDDING_MODEL_NAME
+from .numpy_store import NumpyVectorStore
+from .resources import get_resource
 
 # CHROMA_PATH in the root directory
 CHROMA_PATH = os.path.join('data', 'chroma')  # 'data/chroma' in root directory
+# Per-meeting NumPy indexes, used instead of Chroma when VECTOR_BACKEND is "numpy"
+NUMPY_STORE_PATH = os.path.join('data', 'vectors')  # 'data/vectors' in root directory
+# Collection used when no meeting is given (langchain's default collection name)
+DEFAULT_COLLECTION_NAME = "langchain"
 
-def get_chroma_db():
-    # Get the embedding object
-    embeddings = get_embedding_function()
-    # Connect to the existing Chroma database
-    vectorstore = Chroma(
-        persist_directory=CHROMA_PATH,
-        embedding_function=embeddings
-    )
-    return vectorstore
+# Retrieval backend: "chroma" (suited to large archives) or "numpy" (exact in-process search)
+VECTOR_BACKEND = os.environ.get("VECTOR_BACKEND", "chroma").lower()
+# Storage type of the NumPy index: "float32", or "float16" to halve its size
+NUMPY_STORE_DTYPE = os.environ.get("NUMPY_STORE_DTYPE", "float32")
+
+def get_meeting_id(transcript_path: str) -> str:
+    """Derives the meeting ID from a transcript path (its file name without extension)."""
+    if not transcript_path:
+        return None
+    return os.path.splitext(os.path.basename(transcript_path))[0]
+
+def get_collection_name(meeting_id: str) -> str:
+    """
+    Maps a meeting ID to a valid Chroma collection name (3-63 characters of [a-zA-Z0-9._-],
+    starting and ending with an alphanumeric character).
+
+    IDs that are already valid map to "meeting_<id>". Others are sanitised and shortened,
+    and get a hash of the original ID appended, so distinct meetings never share a
+    collection (e.g. "q3 review" and "q3_review").
+    """
+    safe_id = re.sub(r"[^a-zA-Z0-9._-]", "_", meeting_id).strip("._-")
+    name = f"meeting_{safe_id}"
+    if safe_id == meeting_id and len(name) <= 63:
+        return name
+    digest = hashlib.sha1(meeting_id.encode("utf-8")).hexdigest()[:10]
+    return f"meeting_{safe_id[:44].rstrip('._-')}_{digest}"
+
+def get_numpy_store(meeting_id: str = None, persist_directory: str = NUMPY_STORE_PATH) -> NumpyVectorStore:
+    """Returns the in-process NumPy index of one meeting (or of the default collection)."""
+    collection_name = get_collection_name(meeting_id) if meeting_id else DEFAULT_COLLECTION_NAME
+    directory = os.path.join(persist_directory, collection_name)
+
+    def load():
+        return NumpyVectorStore(directory, get_embedding_function(), dtype=np.dtype(NUMPY_STORE_DTYPE))
+
+    key = ("numpy_store", os.path.abspath(persist_directory), EMBEDDING_MODEL_NAME, collection_name)
+    return get_resource(key, load)
+
+def get_chroma_db(meeting_id: str = None, persist_directory: str = CHROMA_PATH):
+    """
+    Returns the vector store for one meeting, or the shared default collection when no
+    meeting ID is given. With VECTOR_BACKEND set to "numpy" this is the meeting's
+    NumPy index under NUMPY_STORE_PATH instead of a Chroma collection.
+    """
+    if VECTOR_BACKEND == "numpy":
+        return get_numpy_store(meeting_id)
+
+    collection_name = get_collection_name(meeting_id) if meeting_id else DEFAULT_COLLECTION_NAME
+
+    def connect():
+        # Imported here: the Chroma client is slow to import and unused with the NumPy backend
+        from langchain_chroma import Chroma
+
+        # Get the shared embedding object
+        embeddings = get_embedding_function()
+        # Connect to the existing Chroma database
+        return Chroma(
+            collection_name=collection_name,
+            persist_directory=persist_directory,
+            embedding_function=embeddings
+        )
+
+    # Reuse one handle per database directory, embedding model and collection for the whole process
+    key = ("chroma", os.path.abspath(persist_directory), EMBEDDING_MODEL_NAME, collection_name)
+    return get_resource(key, connect)
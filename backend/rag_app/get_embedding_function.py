@@ -1,8 +1,14 @@
-from langchain_huggingface import HuggingFaceEmbeddings
+from .resources import get_resource
 
+# Use a CPU-friendly model
+EMBEDDING_MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
 
-def get_embedding_function():
-    # Use a CPU-friendly model
-    model_name = "sentence-transformers/all-MiniLM-L6-v2"
-    embeddings = HuggingFaceEmbeddings(model_name=model_name)
-    return embeddings
\ No newline at end of file
+def get_embedding_function(model_name: str = EMBEDDING_MODEL_NAME):
+    def load():
+        # Imported on first use: the embedding stack (torch, transformers) is slow to import
+        from langchain_huggingface import HuggingFaceEmbeddings
+
+        return HuggingFaceEmbeddings(model_name=model_name)
+
+    # The model is loaded once per process and shared by every caller
+    return get_resource(("embedding", model_name), load)
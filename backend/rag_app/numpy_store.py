@@ -0,0 +1,157 @@
+import json
+import os
+import shutil
+import threading
+from typing import TYPE_CHECKING
+import numpy as np
+
+if TYPE_CHECKING:
+    from langchain.schema import Document
+
+class NumpyVectorStore:
+    """
+    Exact nearest-neighbour store for a single meeting.
+
+    Normalized embeddings are kept in one contiguous matrix persisted as
+    `embeddings.npy` (memory-mapped on load), and the chunk IDs, texts and metadata in a
+    row-aligned side file `records.json`. A search is one matrix-vector product plus a
+    partial sort, which for the few hundred chunks of a meeting is much cheaper than
+    going through Chroma's persistence and HNSW layers.
+
+    Implements the subset of the langchain Chroma API used by this project.
+    """
+
+    def __init__(self, directory: str, embedding_function, dtype=np.float32):
+        self.directory = directory
+        self.embedding_function = embedding_function
+        self.dtype = np.dtype(dtype)
+        self._lock = threading.RLock()
+        self._load()
+
+    @property
+    def _matrix_path(self) -> str:
+        return os.path.join(self.directory, "embeddings.npy")
+
+    @property
+    def _records_path(self) -> str:
+        return os.path.join(self.directory, "records.json")
+
+    def _load(self):
+        if os.path.exists(self._records_path):
+            with open(self._records_path, "r", encoding="utf-8") as f:
+                records = json.load(f)
+            self.ids = records["ids"]
+            self.texts = records["texts"]
+            self.metadatas = records["metadatas"]
+            self.matrix = np.load(self._matrix_path, mmap_mode="r")
+        else:
+            self.ids, self.texts, self.metadatas = [], [], []
+            self.matrix = None
+        self._positions = {chunk_id: i for i, chunk_id in enumerate(self.ids)}
+
+    def _save(self):
+        os.makedirs(self.directory, exist_ok=True)
+        # Write both files next to their final names, then swap them in
+        matrix = self.matrix if self.matrix is not None else np.zeros((0, 0), dtype=self.dtype)
+        with open(self._matrix_path + ".tmp", "wb") as f:
+            np.save(f, np.ascontiguousarray(matrix))
+        with open(self._records_path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump({"ids": self.ids, "texts": self.texts, "metadatas": self.metadatas}, f)
+        os.replace(self._matrix_path + ".tmp", self._matrix_path)
+        os.replace(self._records_path + ".tmp", self._records_path)
+        self.matrix = np.load(self._matrix_path, mmap_mode="r")
+
+    def _normalize(self, embeddings) -> np.ndarray:
+        vectors = np.asarray(embeddings, dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return (vectors / norms).astype(self.dtype)
+
+    def add_embeddings(self, ids: list[str], texts: list[str], embeddings, metadatas: list[dict]):
+        """Adds precomputed embeddings; existing IDs are replaced."""
+        if not ids:
+            return
+        vectors = self._normalize(embeddings)
+        with self._lock:
+            replaced = [chunk_id for chunk_id in ids if chunk_id in self._positions]
+            if replaced:
+                self._remove(replaced)
+            if self.matrix is None or len(self.matrix) == 0:
+                self.matrix = vectors
+            else:
+                self.matrix = np.concatenate([np.asarray(self.matrix), vectors])
+            for chunk_id, text, metadata in zip(ids, texts, metadatas):
+                self._positions[chunk_id] = len(self.ids)
+                self.ids.append(chunk_id)
+                self.texts.append(text)
+                self.metadatas.append(metadata or {})
+            self._save()
+
+    def add_documents(self, documents: list["Document"], ids: list[str]):
+        texts = [doc.page_content for doc in documents]
+        embeddings = self.embedding_function.embed_documents(texts)
+        self.add_embeddings(ids, texts, embeddings, [doc.metadata for doc in documents])
+        return ids
+
+    def _remove(self, ids: list[str]):
+        drop = {self._positions[chunk_id] for chunk_id in ids if chunk_id in self._positions}
+        if not drop:
+            return
+        keep = [i for i in range(len(self.ids)) if i not in drop]
+        self.matrix = np.asarray(self.matrix)[keep]
+        self.ids = [self.ids[i] for i in keep]
+        self.texts = [self.texts[i] for i in keep]
+        self.metadatas = [self.metadatas[i] for i in keep]
+        self._positions = {chunk_id: i for i, chunk_id in enumerate(self.ids)}
+
+    def delete(self, ids: list[str]):
+        with self._lock:
+            self._remove(ids)
+            self._save()
+
+    def delete_collection(self):
+        with self._lock:
+            shutil.rmtree(self.directory, ignore_errors=True)
+            self.ids, self.texts, self.metadatas = [], [], []
+            self.matrix = None
+            self._positions = {}
+
+    def get(self, ids: list[str] = None, include: list[str] = None) -> dict:
+        """Returns stored IDs (and documents/metadatas when requested), like Chroma.get."""
+        include = include if include is not None else ["documents", "metadatas"]
+        with self._lock:
+            positions = range(len(self.ids)) if ids is None else [self._positions[i] for i in ids if i in self._positions]
+            result = {"ids": [self.ids[i] for i in positions]}
+            if "documents" in include:
+                result["documents"] = [self.texts[i] for i in positions]
+            if "metadatas" in include:
+                result["metadatas"] = [self.metadatas[i] for i in positions]
+            if "embeddings" in include:
+                result["embeddings"] = np.asarray(self.matrix)[list(positions)] if self.matrix is not None else []
+        return result
+
+    def similarity_search_by_vector_with_relevance_scores(self, embedding, k: int = 4) -> list[tuple["Document", float]]:
+        """
+        Exact top-k search by cosine similarity.
+
+        Returns:
+            list[tuple[Document, float]]: Documents with their cosine distance (lower is closer).
+        """
+        with self._lock:
+            matrix, texts, metadatas = self.matrix, self.texts, self.metadatas
+        if matrix is None or len(matrix) == 0:
+            return []
+        from langchain.schema import Document
+
+        query = self._normalize(embedding)
+        scores = (matrix @ query).astype(np.float32)
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [
+            (Document(page_content=texts[i], metadata=metadatas[i]), float(1.0 - scores[i]))
+            for i in top
+        ]
+
+    def similarity_search_with_score(self, query: str, k: int = 4) -> list[tuple["Document", float]]:
+        return self.similarity_search_by_vector_with_relevance_scores(self.embedding_function.embed_query(query), k)
@@ -8,12 +8,16 @@ sys.path.append(project_root)
 
 import argparse
 from dataclasses import dataclass
-from typing import List
+from typing import List, Optional
 from typing_extensions import TypedDict
-from langchain.prompts import ChatPromptTemplate
-from langchain_ollama import ChatOllama
-from backend.rag_app.get_chroma_db import get_chroma_db
-from langchain.schema import HumanMessage
+from backend.rag_app.get_chroma_db import get_chroma_db, get_meeting_id
+from backend.rag_app.get_chat_model import get_chat_model, LOCAL_LLM
+from backend.rag_app.chat_session import CHAT_SESSIONS_ENABLED, PromptEval, get_chat_session, record_prompt_eval
+from backend.rag_app.conversation_memory import get_conversation_memory
+from backend.rag_app.get_embedding_function import get_embedding_function
+from backend.rag_app.semantic_cache import semantic_cache, history_fingerprint
+from backend.metrics import span, increment
+from backend.transcription import format_timestamp
 
 # Define the prompt template with clear instructions for contextual memory and direct recall
 PROMPT_TEMPLATE = """
@@ -31,9 +35,8 @@ Question:
 Answer:
 """
 
-# Initialize LLaMA model
-local_llm = "llama3.2"
-llm = ChatOllama(model=local_llm, temperature=0)
+# LLaMA model used for chat; the client is created on first use and shared
+local_llm = LOCAL_LLM
 
 # Function to retrieve the last question from history
 def get_last_question(history):
@@ -51,69 +54,174 @@ class QueryResponse:
     query_text: str
     response_text: str
     sources: List[str]
-
-# Function to generate response from LLM
-def generate_response(prompt: str) -> str:
-    message = HumanMessage(content=prompt)
-    response = llm.invoke([message])
-    # Split the response to extract the text after "Answer:"
-    answer = response.content.strip()
+    prompt_eval: Optional[PromptEval] = None   # None when the answer did not come from the model
+
+# Function to describe where a retrieved chunk comes from, with its time range when known
+def format_source(metadata: dict) -> str:
+    source = metadata.get("source", "Unknown")
+    if "start" in metadata and "end" in metadata:
+        return f"{source} [{format_timestamp(metadata['start'])} --> {format_timestamp(metadata['end'])}]"
+    return source
+
+# Function to extract the text after "Answer:" from the model output
+def extract_answer(text: str) -> str:
+    answer = text.strip()
     if "Answer:" in answer:
         answer = answer.split("Answer:")[-1].strip()
     return answer
 
-def query_rag(transcript_file: str, query_text: str, history: list, thread_id: str = "1") -> QueryResponse:
+# Function to count the tokens reported in a chat message's usage metadata
+def record_chat_tokens(message):
+    usage = getattr(message, "usage_metadata", None)
+    if usage:
+        increment("meeting_tokens_generated_total", usage.get("output_tokens", 0), model=local_llm, stage="chat")
+
+# Function to stream the response from LLM as it is generated
+def stream_response(prompt: str, prompt_evals: list = None):
+    from langchain.schema import HumanMessage
+
+    message = HumanMessage(content=prompt)
+    # Closing this generator closes the stream to Ollama, which stops the generation
+    with span("chat_generation", model=local_llm):
+        for chunk in get_chat_model(local_llm).stream([message]):
+            record_chat_tokens(chunk)
+            # The final chunk carries Ollama's timings
+            if chunk.response_metadata.get("done") and prompt_evals is not None:
+                prompt_evals.append(record_prompt_eval(local_llm, chunk.response_metadata, "stateless"))
+            yield chunk.content
+
+@dataclass
+class PreparedQuery:
+    prompt: Optional[str]             # None when no LLM call is needed
+    sources: List[str]
+    response_text: Optional[str]      # Direct or cached answer, if any
+    meeting_id: Optional[str] = None
+    query_embedding: Optional[List[float]] = None
+    history_key: str = ""
+    history_text: str = ""
+    context_text: str = ""
+
+def prepare_query(transcript_file: str, query_text: str, history: list, thread_id: str = "1", meeting_id: str = None) -> PreparedQuery:
+    """
+    Retrieves the context for a question and builds the prompt, or returns an answer
+    directly when no LLM call is needed (including semantically cached answers).
+
+    The meeting is `meeting_id` when given (e.g. a backfilled "2024/q1/audit"), otherwise
+    the transcript's file name.
+    """
     # If the user asks for the last question
     if "last question" in query_text.lower():
         last_question = get_last_question(history)
-        response_text = f"Your last question was: {last_question}"
-        history.append({"role": "user", "content": query_text})
-        history.append({"role": "assistant", "content": response_text})
-        return QueryResponse(
-            query_text=query_text, response_text=response_text, sources=[]
-        )
+        return PreparedQuery(None, [], f"Your last question was: {last_question}")
     
-    # Connect to the existing Chroma vectorstore
-    db = get_chroma_db()
+    meeting_id = meeting_id or get_meeting_id(transcript_file)
+
+    # Format conversation history: recent turns verbatim, older turns as a rolling summary
+    history_text = get_conversation_memory(thread_id).format(history)
+    history_key = history_fingerprint(history_text)
+
+    # Embed the question once; the vector serves both the answer cache and the search
+    with span("embed_query"):
+        query_embedding = get_embedding_function().embed_query(query_text)
+
+    cached = semantic_cache.lookup(meeting_id, query_embedding, history_key)
+    if cached is not None:
+        increment("meeting_semantic_cache_total", result="hit")
+        return PreparedQuery(None, cached.sources, cached.response_text, meeting_id)
+    increment("meeting_semantic_cache_total", result="miss")
+
+    # Connect to the collection of the meeting being discussed
+    db = get_chroma_db(meeting_id)
 
     # Search the vectorstore
-    results = db.similarity_search_with_score(query_text, k=3)
+    with span("similarity_search"):
+        results = db.similarity_search_by_vector_with_relevance_scores(query_embedding, k=3)
 
     if not results:
         print("No relevant documents found.")
-        response_text = "No relevant information found."
-        history.append({"role": "user", "content": query_text})
-        history.append({"role": "assistant", "content": response_text})
-        return QueryResponse(
-            query_text=query_text, response_text=response_text, sources=[]
-        )
+        return PreparedQuery(None, [], "No relevant information found.", meeting_id)
 
     # Prepare context and sources
     context_text = "\n".join([doc.page_content for doc, _ in results])
-    sources = [doc.metadata.get("source", "Unknown") for doc, _ in results]
+    sources = [format_source(doc.metadata) for doc, _ in results]
 
-    # Format conversation history
-    history_text = format_history(history)
+    # Prepare the prompt with history (langchain is imported on the first question, not at startup)
+    from langchain.prompts import ChatPromptTemplate
 
-    # Prepare the prompt with history
     prompt_template = ChatPromptTemplate.from_template(PROMPT_TEMPLATE)
     prompt = prompt_template.format(history=history_text, context=context_text, question=query_text)
-
-    # Generate response using LLM
-    response_text = generate_response(prompt)
+    return PreparedQuery(prompt, sources, None, meeting_id, query_embedding, history_key, history_text, context_text)
+
+def finish_query(prepared: PreparedQuery, query_text: str, response_text: str, history: list, thread_id: str):
+    # Only answers that came from the model are worth caching
+    if prepared.query_embedding is not None:
+        semantic_cache.store(
+            prepared.meeting_id, query_text, prepared.query_embedding,
+            response_text, prepared.sources, prepared.history_key,
+        )
 
     # Update history with the new question and response
     history.append({"role": "user", "content": query_text})
     history.append({"role": "assistant", "content": response_text})
+    # Also kept up to date in session mode: a restarted session starts from this summary
+    get_conversation_memory(thread_id).update(history)
+
+# Function to stream the answer to a prepared question, within the conversation's chat session when enabled
+def stream_answer(prepared: PreparedQuery, transcript_file: str, query_text: str, history: list, thread_id: str, prompt_evals: list):
+    if not CHAT_SESSIONS_ENABLED:
+        yield from stream_response(prepared.prompt, prompt_evals)
+        return
+
+    session = get_chat_session(thread_id, prepared.meeting_id, transcript_file, local_llm)
+    with span("chat_generation", model=local_llm, session=True):
+        yield from session.stream(history, prepared.history_text, prepared.context_text, query_text)
+    if session.last_prompt_eval is not None:
+        prompt_evals.append(session.last_prompt_eval)
+
+def query_rag(transcript_file: str, query_text: str, history: list, thread_id: str = "1", meeting_id: str = None) -> QueryResponse:
+    prepared = prepare_query(transcript_file, query_text, history, thread_id, meeting_id)
+
+    # Generate response using LLM
+    response_text = prepared.response_text
+    prompt_evals = []
+    if response_text is None:
+        response_text = extract_answer("".join(stream_answer(prepared, transcript_file, query_text, history, thread_id, prompt_evals)))
+
+    finish_query(prepared, query_text, response_text, history, thread_id)
 
     return QueryResponse(
-        query_text=query_text, response_text=response_text, sources=sources
+        query_text=query_text, response_text=response_text, sources=prepared.sources,
+        prompt_eval=prompt_evals[-1] if prompt_evals else None,
     )
 
+def stream_query_rag(transcript_file: str, query_text: str, history: list, thread_id: str = "1", meeting_id: str = None):
+    """
+    Same as query_rag, but yields the answer generated so far while the model is still
+    producing it. The history is only updated once the answer is complete, so a cancelled
+    answer leaves no trace in the conversation.
+
+    Yields:
+        str: The answer text generated so far; the last value is the final answer.
+    """
+    prepared = prepare_query(transcript_file, query_text, history, thread_id, meeting_id)
+
+    response_text = prepared.response_text
+    if response_text is None:
+        partial_text = ""
+        for piece in stream_answer(prepared, transcript_file, query_text, history, thread_id, []):
+            partial_text += piece
+            yield partial_text
+        response_text = extract_answer(partial_text)
+
+    finish_query(prepared, query_text, response_text, history, thread_id)
+    yield response_text
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description='Query the RAG system.')
     parser.add_argument('query', type=str, help='The question to ask')
+    parser.add_argument('--transcript', default=os.path.join('data', 'transcript.txt'), help='Transcript the question is about.')
+    parser.add_argument('--meeting-id', default=None, help='Meeting to query (defaults to the transcript file name).')
     args = parser.parse_args()
     # Initialize an empty history if needed
-    response = query_rag("", args.query, history=[])
+    response = query_rag(args.transcript, args.query, history=[], meeting_id=args.meeting_id)
     print(response.response_text)
@@ -0,0 +1,83 @@
+import threading
+
+# Process-wide registry of heavy objects (embedding model, vector store handles,
+# chat clients) keyed by a tuple that includes everything the object depends on,
+# e.g. ("embedding", model_name) or ("chroma", persist_directory).
+_resources = {}
+_key_locks = {}
+_registry_lock = threading.Lock()
+
+def get_resource(key: tuple, factory):
+    """
+    Returns the resource registered under `key`, creating it with `factory` on first use.
+
+    Creation happens under a per-key lock, so concurrent requests for the same resource
+    wait for a single load instead of building their own copy.
+
+    Args:
+        key (tuple): Registry key; the first element is the resource kind.
+        factory (callable): Zero-argument callable that builds the resource.
+
+    Returns:
+        The shared resource instance.
+    """
+    resource = _resources.get(key)
+    if resource is not None:
+        return resource
+
+    with _registry_lock:
+        key_lock = _key_locks.setdefault(key, threading.Lock())
+
+    with key_lock:
+        resource = _resources.get(key)
+        if resource is None:
+            resource = factory()
+            _resources[key] = resource
+    return resource
+
+def invalidate_resources(kind: str = None, *args) -> int:
+    """
+    Drops registered resources so the next lookup rebuilds them.
+
+    Args:
+        kind (str): Resource kind to drop (e.g. "chroma"). Drops everything when omitted.
+        *args: Optional further key elements to narrow the match (e.g. a persist directory).
+
+    Returns:
+        int: Number of resources removed.
+    """
+    prefix = (kind, *args) if kind is not None else ()
+    with _registry_lock:
+        keys = [key for key in _resources if key[:len(prefix)] == prefix]
+        for key in keys:
+            del _resources[key]
+    return len(keys)
+
+def registered_resources() -> list[tuple]:
+    """Returns the keys of the resources currently loaded in this process."""
+    return list(_resources)
+
+def warmup_resources():
+    """
+    Loads the embedding model, the vector store handle and the chat model ahead of the
+    first request, so the first upload or chat turn does not pay for the model load.
+    Also imports the modules that are otherwise only imported on first use.
+    """
+    from .get_embedding_function import get_embedding_function
+    from .get_chroma_db import get_chroma_db
+    from .get_chat_model import get_chat_model
+    from backend.ollama_client import get_ollama_client
+    import backend.populate_database  # noqa: F401 (langchain text splitting and documents)
+    import langchain.prompts  # noqa: F401
+
+    try:
+        # Fills the model list cache the UI reads when a page loads
+        get_ollama_client().list_models()
+    except Exception as e:
+        print(f"Could not list Ollama models during warmup: {e}")
+
+    embeddings = get_embedding_function()
+    # Run one embedding so lazily initialized weights are actually paged in
+    embeddings.embed_query("warmup")
+    get_chroma_db()
+    get_chat_model()
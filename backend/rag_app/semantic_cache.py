@@ -0,0 +1,140 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+import numpy as np
+
+# Semantic answer cache settings
+SEMANTIC_CACHE_THRESHOLD = 0.92        # Minimum cosine similarity between questions
+SEMANTIC_CACHE_TTL = 6 * 3600          # Seconds an answer stays valid
+SEMANTIC_CACHE_MAX_ENTRIES = 256       # Answers kept per meeting (least recently used dropped)
+SEMANTIC_CACHE_MAX_MEETINGS = 64       # Meetings kept in the cache
+
+@dataclass
+class CachedAnswer:
+    query_text: str
+    response_text: str
+    sources: list[str]
+    history_key: str
+    created_at: float
+
+def history_fingerprint(history_text: str) -> str:
+    """
+    Identifies the conversation context an answer was produced with. Answers given
+    without any history ("") are standalone and can be reused in any conversation.
+    """
+    if not history_text:
+        return ""
+    return hashlib.sha256(history_text.encode("utf-8")).hexdigest()
+
+class _MeetingAnswers:
+    def __init__(self):
+        self.entries = OrderedDict()   # Entry ID -> CachedAnswer, least recently used first
+        self.vectors = {}              # Entry ID -> normalized query embedding
+        self.next_id = 0
+
+class SemanticCache:
+    """
+    Per-meeting cache of answers keyed by the embedding of the question.
+
+    A new question reuses a cached answer when it is within SEMANTIC_CACHE_THRESHOLD
+    cosine similarity of a cached question for the same meeting and the cached answer
+    was produced with a compatible conversation history. Only standalone answers are
+    stored: the history of a later turn never repeats, so its answers could not be hit
+    and would only push reusable ones out.
+    """
+
+    def __init__(
+        self,
+        threshold: float = SEMANTIC_CACHE_THRESHOLD,
+        ttl: float = SEMANTIC_CACHE_TTL,
+        max_entries: int = SEMANTIC_CACHE_MAX_ENTRIES,
+        max_meetings: int = SEMANTIC_CACHE_MAX_MEETINGS,
+    ):
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_meetings = max_meetings
+        self.hits = 0
+        self.misses = 0
+        self._meetings = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _normalize(embedding) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def lookup(self, meeting_id: str, query_embedding, history_key: str = "") -> CachedAnswer:
+        """Returns the best matching cached answer, or None."""
+        query = self._normalize(query_embedding)
+        now = time.time()
+        with self._lock:
+            meeting = self._meetings.get(meeting_id)
+            best_id, best_score = None, self.threshold
+            if meeting is not None:
+                # Drop expired answers before matching
+                for entry_id in [i for i, e in meeting.entries.items() if now - e.created_at > self.ttl]:
+                    del meeting.entries[entry_id]
+                    del meeting.vectors[entry_id]
+
+                candidates = [
+                    entry_id for entry_id, entry in meeting.entries.items()
+                    if entry.history_key in ("", history_key)
+                ]
+                if candidates:
+                    scores = np.stack([meeting.vectors[i] for i in candidates]) @ query
+                    index = int(np.argmax(scores))
+                    if scores[index] >= best_score:
+                        best_id, best_score = candidates[index], float(scores[index])
+
+            if best_id is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            meeting.entries.move_to_end(best_id)
+            self._meetings.move_to_end(meeting_id)
+            return meeting.entries[best_id]
+
+    def store(self, meeting_id: str, query_text: str, query_embedding, response_text: str, sources: list[str], history_key: str = ""):
+        """Caches an answer for a meeting; answers that depend on a conversation history are skipped."""
+        if history_key:
+            return
+        with self._lock:
+            meeting = self._meetings.get(meeting_id)
+            if meeting is None:
+                meeting = self._meetings[meeting_id] = _MeetingAnswers()
+                while len(self._meetings) > self.max_meetings:
+                    self._meetings.popitem(last=False)
+            self._meetings.move_to_end(meeting_id)
+
+            entry_id = meeting.next_id
+            meeting.next_id += 1
+            meeting.entries[entry_id] = CachedAnswer(query_text, response_text, list(sources), history_key, time.time())
+            meeting.vectors[entry_id] = self._normalize(query_embedding)
+            while len(meeting.entries) > self.max_entries:
+                oldest_id, _ = meeting.entries.popitem(last=False)
+                del meeting.vectors[oldest_id]
+
+    def invalidate_meeting(self, meeting_id: str):
+        """Forgets every answer for a meeting, e.g. after it was re-ingested."""
+        with self._lock:
+            self._meetings.pop(meeting_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._meetings.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "meetings": len(self._meetings),
+                "entries": sum(len(m.entries) for m in self._meetings.values()),
+            }
+
+# Shared answer cache used by query_rag
+semantic_cache = SemanticCache()
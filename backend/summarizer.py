@@ -1,23 +1,36 @@
 import os
-import subprocess
-import json
-import requests
-from .model_services import OLLAMA_SERVER_URL
-from .audio_processing import preprocess_audio_file
+from concurrent.futures import ThreadPoolExecutor
+from .ollama_client import get_ollama_client
+from .metrics import span, increment, in_current_context
+from .audio_processing import prepare_audio_for_whisper
+from .transcription import transcribe_audio, transcription_settings, TranscriptSegments
+from .artifact_cache import (
+    transcript_cache, summary_cache, hash_file, transcript_cache_key, summary_cache_key
+)
 from langdetect import detect, LangDetectException
-from backend.populate_database import main as update_database
 
 # Define the path to the transcript file
 TRANSCRIPT_PATH = os.path.join("data", "transcript.txt")
+# Directory for per-meeting transcripts written by background jobs
+TRANSCRIPTS_DIR = os.path.join("data", "transcripts")
+
+# Map-reduce summarization settings for transcripts that exceed one prompt
+SUMMARY_CHUNK_SIZE = 12000      # Characters per map window
+SUMMARY_CHUNK_OVERLAP = 400     # Characters shared between consecutive windows
+SUMMARY_MAX_PARALLEL = 4        # Concurrent requests sent to the Ollama server
+SUMMARY_REDUCE_FAN_IN = 6       # Partial summaries merged per reduce call
 
 def ensure_data_directory():
     """Ensure that the 'data' directory exists."""
     os.makedirs(os.path.dirname(TRANSCRIPT_PATH), exist_ok=True)
 
-def summarize_with_model(llm_model_name: str, context: str, text: str, language: str) -> str:
-    """Generate a summary using the specified language model on the Ollama server."""
-    # Construct the prompt based on the detected language
-    prompt = (
+def get_summary_path(transcript_path: str) -> str:
+    """Where the summary of a transcript is saved (not .txt, so it is never taken for a transcript)."""
+    return os.path.splitext(transcript_path)[0] + ".summary.md"
+
+def build_summary_prompt(context: str, text: str, language: str) -> str:
+    """Build the single-pass summary prompt for the detected language."""
+    return (
         f"Você recebeu uma transcrição de uma reunião, juntamente com um contexto opcional.\n\n"
         f"Contexto: {context if context else 'Nenhum contexto adicional fornecido.'}\n\n"
         f"A transcrição é a seguinte:\n\n{text}\n\nPor favor, resuma a transcrição."
@@ -27,82 +40,299 @@ def summarize_with_model(llm_model_name: str, context: str, text: str, language:
         f"The transcript is as follows:\n\n{text}\n\nPlease summarize the transcript."
     )
 
-    headers = {"Content-Type": "application/json"}
-    data = {"model": llm_model_name, "prompt": prompt}
+def build_partial_summary_prompt(context: str, text: str, language: str, index: int, total: int) -> str:
+    """Build the map-step prompt for one window of a long transcript."""
+    return (
+        f"Você recebeu a parte {index} de {total} de uma transcrição de reunião, juntamente com um contexto opcional.\n\n"
+        f"Contexto: {context if context else 'Nenhum contexto adicional fornecido.'}\n\n"
+        f"O trecho é o seguinte:\n\n{text}\n\n"
+        f"Resuma este trecho, preservando decisões, responsáveis, prazos e itens de ação."
+        if language == "pt" else
+        f"You are given part {index} of {total} of a meeting transcript, along with some optional context.\n\n"
+        f"Context: {context if context else 'No additional context provided.'}\n\n"
+        f"The excerpt is as follows:\n\n{text}\n\n"
+        f"Summarize this excerpt, preserving decisions, owners, deadlines and action items."
+    )
 
-    response = requests.post(
-        f"{OLLAMA_SERVER_URL}/api/generate",
-        json=data,
-        headers=headers,
-        stream=True
+def build_combine_prompt(context: str, summaries: list[str], language: str) -> str:
+    """Build the reduce-step prompt that merges consecutive partial summaries."""
+    joined = "\n\n".join(f"[{i}] {summary}" for i, summary in enumerate(summaries, start=1))
+    return (
+        f"Você recebeu resumos parciais e consecutivos de uma reunião, juntamente com um contexto opcional.\n\n"
+        f"Contexto: {context if context else 'Nenhum contexto adicional fornecido.'}\n\n"
+        f"Os resumos parciais são os seguintes:\n\n{joined}\n\n"
+        f"Por favor, combine-os em um único resumo da reunião, sem repetir informações."
+        if language == "pt" else
+        f"You are given consecutive partial summaries of a meeting, along with some optional context.\n\n"
+        f"Context: {context if context else 'No additional context provided.'}\n\n"
+        f"The partial summaries are as follows:\n\n{joined}\n\n"
+        f"Please combine them into a single summary of the meeting without repeating information."
     )
 
-    # Process the streaming response from the server
-    if response.status_code == 200:
-        full_response = ""
-        try:
-            for line in response.iter_lines():
-                if line:
-                    decoded_line = line.decode("utf-8")
-                    json_line = json.loads(decoded_line)
-                    full_response += json_line.get("response", "")
-                    if json_line.get("done", False):
-                        break
-            return full_response
-        except json.JSONDecodeError:
-            print("Error: Response contains invalid JSON data.")
-            return f"Failed to parse the response from the server. Raw response: {response.text}"
-    else:
-        raise Exception(f"Failed to summarize with model {llm_model_name}: {response.text}")
+def build_rolling_summary_prompt(context: str, summary: str, text: str, language: str) -> str:
+    """Build the prompt that folds newly transcribed speech into the running summary of a live meeting."""
+    return (
+        f"Você está acompanhando uma reunião em andamento, juntamente com um contexto opcional.\n\n"
+        f"Contexto: {context if context else 'Nenhum contexto adicional fornecido.'}\n\n"
+        f"Resumo até agora:\n\n{summary if summary else '(vazio)'}\n\n"
+        f"Nova parte da transcrição:\n\n{text}\n\n"
+        f"Atualize o resumo com a nova parte, preservando decisões, responsáveis, prazos e itens de ação. Responda apenas com o resumo atualizado."
+        if language == "pt" else
+        f"You are following a meeting that is still in progress, along with some optional context.\n\n"
+        f"Context: {context if context else 'No additional context provided.'}\n\n"
+        f"Summary so far:\n\n{summary if summary else '(empty)'}\n\n"
+        f"New part of the transcript:\n\n{text}\n\n"
+        f"Update the summary with the new part, preserving decisions, owners, deadlines and action items. Reply with the updated summary only."
+    )
+
+class SummaryCancelled(Exception):
+    """Raised when a summary is cancelled while it is being generated."""
+
+def stream_with_model(llm_model_name: str, prompt: str, cancel_event=None):
+    """
+    Send a prompt to the Ollama server and yield the response text as it is generated.
+
+    Closing the generator, or setting `cancel_event`, closes the HTTP stream, which makes
+    the Ollama server stop generating.
+    """
+    messages = get_ollama_client().generate_stream(llm_model_name, prompt)
+    try:
+        for message in messages:
+            if cancel_event is not None and cancel_event.is_set():
+                raise SummaryCancelled(f"Summary with model {llm_model_name} was cancelled.")
+            if message.get("done", False):
+                increment("meeting_tokens_generated_total", message.get("eval_count", 0), model=llm_model_name, stage="summary")
+            yield message.get("response", "")
+    finally:
+        messages.close()
+
+def generate_with_model(llm_model_name: str, prompt: str, cancel_event=None) -> str:
+    """Send a prompt to the Ollama server and collect the streamed response."""
+    return "".join(stream_with_model(llm_model_name, prompt, cancel_event))
+
+def split_transcript(text: str, chunk_size: int = SUMMARY_CHUNK_SIZE, chunk_overlap: int = SUMMARY_CHUNK_OVERLAP) -> list[str]:
+    """Split a transcript into overlapping windows sized for a single summary prompt."""
+    from langchain.text_splitter import RecursiveCharacterTextSplitter
+
+    text_splitter = RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+        length_function=len,
+        is_separator_regex=False,
+    )
+    return text_splitter.split_text(text)
+
+def summarize_windows(
+    llm_model_name: str,
+    context: str,
+    windows: list[str],
+    language: str,
+    max_parallel: int = SUMMARY_MAX_PARALLEL,
+    fan_in: int = SUMMARY_REDUCE_FAN_IN,
+    cancel_event=None,
+) -> list[str]:
+    """
+    Summarize transcript windows concurrently (map), then merge consecutive partial
+    summaries (reduce) until at most `fan_in` remain, so the caller can run the final
+    merge itself, e.g. as a stream.
+    """
+    fan_in = max(2, fan_in)
+
+    def summarize_window(prompt: str) -> str:
+        with span("summary_map", model=llm_model_name, prompt_chars=len(prompt)):
+            return generate_with_model(llm_model_name, prompt, cancel_event)
+
+    def combine(group: list[str]) -> str:
+        if len(group) == 1:
+            return group[0]
+        with span("summary_reduce", model=llm_model_name, summaries=len(group)):
+            return generate_with_model(llm_model_name, build_combine_prompt(context, group, language), cancel_event)
+
+    with ThreadPoolExecutor(max_workers=max(1, max_parallel)) as executor:
+        # Map: summarize every window independently, keeping the original order
+        prompts = [
+            build_partial_summary_prompt(context, window, language, i, len(windows))
+            for i, window in enumerate(windows, start=1)
+        ]
+        # Workers run in a copy of this context so their spans land in the job trace
+        summaries = list(executor.map(in_current_context(summarize_window), prompts))
+
+        # Reduce: merge consecutive groups until one final merge is enough
+        while len(summaries) > fan_in:
+            groups = [summaries[i:i + fan_in] for i in range(0, len(summaries), fan_in)]
+            summaries = list(executor.map(in_current_context(combine), groups))
+
+    return summaries
+
+def stream_summary(
+    llm_model_name: str,
+    context: str,
+    text: str,
+    language: str,
+    chunk_size: int = SUMMARY_CHUNK_SIZE,
+    max_parallel: int = SUMMARY_MAX_PARALLEL,
+    fan_in: int = SUMMARY_REDUCE_FAN_IN,
+    cancel_event=None,
+):
+    """
+    Generate a summary and yield its text as the model produces it.
+
+    Transcripts longer than `chunk_size` are summarized with map-reduce: fixed-size
+    windows are summarized concurrently and the partial summaries are merged in as
+    many reduce tiers as needed. Each request only carries one window (or `fan_in`
+    partial summaries), so the cost of a single prompt stays bounded and the wall time
+    grows with ceil(windows / max_parallel) instead of with the transcript length. The
+    Ollama server must allow parallel requests (OLLAMA_NUM_PARALLEL) to benefit from
+    max_parallel > 1. Only the final merge is streamed.
+
+    Args:
+        llm_model_name (str): Ollama model used for every map and reduce call.
+        context (str): Optional user context, repeated in each prompt.
+        text (str): The full transcript.
+        language (str): "pt" or "en", selects the prompt language.
+        chunk_size (int): Maximum characters per map window.
+        max_parallel (int): Maximum concurrent requests sent to Ollama.
+        fan_in (int): Number of partial summaries merged per reduce call.
+        cancel_event (threading.Event): Stops generation when set.
+
+    Yields:
+        str: Consecutive pieces of the summary.
+    """
+    windows = split_transcript(text, chunk_size=chunk_size) if len(text) > chunk_size else [text]
+    if len(windows) <= 1:
+        yield from stream_with_model(llm_model_name, build_summary_prompt(context, text, language), cancel_event)
+        return
+
+    summaries = summarize_windows(llm_model_name, context, windows, language, max_parallel, fan_in, cancel_event)
+    if len(summaries) == 1:
+        yield summaries[0]
+        return
+    yield from stream_with_model(llm_model_name, build_combine_prompt(context, summaries, language), cancel_event)
+
+def summarize_map_reduce(
+    llm_model_name: str,
+    context: str,
+    text: str,
+    language: str,
+    chunk_size: int = SUMMARY_CHUNK_SIZE,
+    max_parallel: int = SUMMARY_MAX_PARALLEL,
+    fan_in: int = SUMMARY_REDUCE_FAN_IN,
+) -> str:
+    """Summarize a long transcript with map-reduce; see stream_summary for the parameters."""
+    return "".join(stream_summary(llm_model_name, context, text, language, chunk_size, max_parallel, fan_in))
+
+def summarize_with_model(llm_model_name: str, context: str, text: str, language: str) -> str:
+    """Generate a summary using the specified language model on the Ollama server."""
+    # Long transcripts are summarized with map-reduce instead of one truncated prompt
+    return "".join(stream_summary(llm_model_name, context, text, language))
 
 def translate_and_summarize(
     file_path_or_text: str,
     context: str,
     whisper_model_name: str,
     llm_model_name: str,
-    is_transcript: bool = False
+    is_transcript: bool = False,
+    workspace: str = None,
+    transcript_path: str = TRANSCRIPT_PATH,
+    progress=None,
+    on_summary_text=None,
+    cancel_event=None,
 ) -> tuple[str, str]:
-    """Process an audio file or direct text and generate a summary."""
+    """
+    Process an audio file or direct text and generate a summary.
+
+    Args:
+        workspace (str): Directory for intermediate files (converted audio, whisper segments).
+            Concurrent calls must use different workspaces.
+        transcript_path (str): Where the transcript is saved before it is added to the database.
+        progress (callable): Optional callback receiving (stage, fraction) as the pipeline advances.
+        on_summary_text (callable): Optional callback receiving the summary generated so far
+            each time the model produces more text.
+        cancel_event (threading.Event): Stops the summary generation when set.
+    """
+    def report(stage: str, fraction: float):
+        if progress:
+            progress(stage, fraction)
+
     # Check if the 'data' directory exists, create it if not
     ensure_data_directory()
+    os.makedirs(os.path.dirname(transcript_path) or ".", exist_ok=True)
 
     # Handle transcript text or audio file
+    segments = None
     if is_transcript:
         transcript = file_path_or_text
     else:
-        output_file = "output.txt"
-        audio_file_wav = preprocess_audio_file(file_path_or_text)
-        
-        whisper_command = (
-            f'./whisper.cpp/main -m ./whisper.cpp/models/ggml-{whisper_model_name}.bin '
-            f'-f "{audio_file_wav}" --language auto > {output_file}'
-        )
-        subprocess.run(whisper_command, shell=True, check=True)
+        # Reuse the transcript if these exact bytes were already transcribed with this model and settings
+        cache_key = transcript_cache_key(hash_file(file_path_or_text), whisper_model_name, transcription_settings())
+        cached = transcript_cache.get(cache_key)
+        if cached is not None:
+            segments = TranscriptSegments.from_json(cached)
+
+    if not is_transcript and segments is None:
+        report("Converting audio", 0.05)
+        # Long silences are cut out; the time map puts the timestamps back on the recording
+        audio_file_wav, time_map = prepare_audio_for_whisper(file_path_or_text, output_dir=workspace)
         
-        with open(output_file, "r") as f:
-            transcript = f.read().strip()
+        # Long recordings are split at silences and transcribed by several whisper processes
+        report("Transcribing", 0.15)
+        segments = time_map.remap(transcribe_audio(audio_file_wav, whisper_model_name, work_dir=workspace))
         
-        os.remove(audio_file_wav)
-        os.remove(output_file)
+        # Inputs already in whisper's format are used in place
+        if audio_file_wav != file_path_or_text:
+            os.remove(audio_file_wav)
+
+        if len(segments):
+            transcript_cache.put(cache_key, segments.to_json())
+
+    if segments is not None:
+        transcript = segments.to_text()
 
     # Validate transcript length
     if not transcript or len(transcript) < 20:
         raise ValueError("Transcript is empty or too short for language detection.")
 
-    # Detect language
-    try:
-        detected_language = detect(transcript)
-    except LangDetectException:
-        raise ValueError("Failed to detect language due to insufficient text.")
+    # Whisper already identified the spoken language; only plain text needs a detection pass
+    if segments is not None and segments.language and segments.language != "auto":
+        detected_language = segments.language
+    else:
+        try:
+            with span("langdetect"):
+                detected_language = detect(transcript)
+        except LangDetectException:
+            raise ValueError("Failed to detect language due to insufficient text.")
 
     # Determine language for summarization
     language = "pt" if detected_language.startswith("pt") else "en"
-    summary = summarize_with_model(llm_model_name, context, transcript, language)
 
-    # Save the transcript to 'transcript.txt' and update the database
-    with open(TRANSCRIPT_PATH, "w") as f:
+    # Reuse the summary if this transcript was already summarized with the same settings
+    report("Summarizing", 0.6)
+    summary_key = summary_cache_key(transcript, llm_model_name, context, language)
+    summary = summary_cache.get(summary_key)
+    if summary is None:
+        summary = ""
+        with span("summary", model=llm_model_name, transcript_chars=len(transcript)):
+            for piece in stream_summary(llm_model_name, context, transcript, language, cancel_event=cancel_event):
+                summary += piece
+                if on_summary_text:
+                    on_summary_text(summary)
+        if summary:
+            summary_cache.put(summary_key, summary)
+    elif on_summary_text:
+        on_summary_text(summary)
+
+    # Save the transcript and update the database
+    report("Indexing transcript", 0.9)
+    with open(transcript_path, "w") as f:
         f.write(transcript)
+    if summary:
+        with open(get_summary_path(transcript_path), "w") as f:
+            f.write(summary)
     
-    update_database(TRANSCRIPT_PATH, reset=False)
+    with span("index"):
+        # Imported here so loading the job queue does not pull in langchain and the vector store
+        from backend.populate_database import main as update_database
+
+        update_database(transcript_path, reset=False)
     
-    return summary, TRANSCRIPT_PATH
+    return summary, transcript_path
@@ -0,0 +1,359 @@
+import json
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from .model_services import WHISPER_MODEL_DIR
+from .audio_processing import (
+    get_wav_duration, split_wav_at_silences, SILENCE_REMOVAL_ENABLED, SILENCE_MIN_SECONDS,
+    SILENCE_PADDING_SECONDS, SILENCE_RMS_FLOOR, SILENCE_RELATIVE_THRESHOLD,
+)
+from .metrics import span, increment, in_current_context
+from .whisper_pool import get_whisper_pool, whisper_pool_available
+
+# whisper.cpp command-line binary
+WHISPER_BINARY = "./whisper.cpp/main"
+
+# Segmented transcription settings for long recordings
+SEGMENTED_MIN_SECONDS = 600          # Recordings shorter than this use a single whisper process
+SEGMENT_TARGET_SECONDS = 300         # Approximate length of each segment
+SEGMENT_OVERLAP_SECONDS = 1.0        # Audio shared by consecutive segments
+WHISPER_THREADS_PER_WORKER = 4       # Threads given to each whisper process
+
+# The server's verbose_json output names languages in full; the pipeline uses ISO codes
+WHISPER_LANGUAGE_CODES = {
+    "english": "en", "portuguese": "pt", "spanish": "es", "french": "fr", "german": "de", "italian": "it",
+}
+
+# Matches whisper.cpp segment lines such as "[00:01:02.340 --> 00:01:05.120]  Hello"
+SEGMENT_LINE_PATTERN = re.compile(
+    r"^\[(\d+):(\d{2}):(\d{2}\.\d{3}) --> (\d+):(\d{2}):(\d{2}\.\d{3})\]\s*(.*)$"
+)
+
+def transcription_settings() -> str:
+    """
+    Describes the settings besides the model that shape a transcript (silence removal
+    and segmentation), so cached transcripts are not reused after they change.
+    """
+    silence = SILENCE_REMOVAL_ENABLED and (
+        SILENCE_MIN_SECONDS, SILENCE_PADDING_SECONDS, SILENCE_RMS_FLOOR, SILENCE_RELATIVE_THRESHOLD,
+    )
+    return json.dumps({
+        "silence_removal": silence,
+        "segmentation": [SEGMENTED_MIN_SECONDS, SEGMENT_TARGET_SECONDS, SEGMENT_OVERLAP_SECONDS],
+    })
+
+def whisper_model_path(whisper_model_name: str) -> str:
+    """Returns the path of the ggml file for a Whisper model name."""
+    return os.path.join(WHISPER_MODEL_DIR, f"ggml-{whisper_model_name}.bin")
+
+def run_whisper(audio_file_wav: str, whisper_model_name: str, threads: int = None, work_dir: str = None) -> "TranscriptSegments":
+    """
+    Transcribes a WAV file with whisper.cpp.
+
+    When the whisper.cpp server binary is available, the file is sent to a warm server
+    from the worker pool, which keeps the model loaded between files. Otherwise the
+    command-line binary is run and the segments are read from its JSON output, which is
+    written to a temporary directory (never next to the WAV file, which may be the user's
+    own recording) and removed once read. When that file is missing (e.g. a
+    whisper.cpp build without JSON output), the segments are parsed from what whisper.cpp
+    prints to stdout instead, without a detected language.
+
+    Args:
+        audio_file_wav (str): Path to a 16kHz mono WAV file.
+        whisper_model_name (str): Name of the Whisper model (e.g. "small").
+        threads (int): Number of threads for whisper.cpp; the binary's own default, or
+            WHISPER_SERVER_THREADS for pool servers, when omitted.
+        work_dir (str): Directory for the JSON output; system temp when omitted.
+
+    Returns:
+        TranscriptSegments: The timestamped segments and the language whisper detected.
+    """
+    if whisper_pool_available():
+        with span("whisper", model=whisper_model_name, warm_pool=True):
+            response = get_whisper_pool().transcribe(
+                whisper_model_name, whisper_model_path(whisper_model_name), audio_file_wav, threads
+            )
+        increment("meeting_bytes_processed_total", os.path.getsize(audio_file_wav), stage="whisper")
+        return TranscriptSegments.from_server_json(response, get_wav_duration(audio_file_wav))
+
+    output_dir = tempfile.mkdtemp(prefix="whisper_output_", dir=work_dir)
+    output_prefix = os.path.join(output_dir, os.path.splitext(os.path.basename(audio_file_wav))[0])
+    command = [
+        WHISPER_BINARY, "-m", whisper_model_path(whisper_model_name), "-f", audio_file_wav,
+        "--language", "auto", "-oj", "-of", output_prefix,
+    ]
+    if threads:
+        command += ["-t", str(threads)]
+    try:
+        with span("whisper", model=whisper_model_name):
+            result = subprocess.run(command, check=True, stdout=subprocess.PIPE, text=True)
+        increment("meeting_bytes_processed_total", os.path.getsize(audio_file_wav), stage="whisper")
+
+        json_path = output_prefix + ".json"
+        if not os.path.exists(json_path):
+            return TranscriptSegments.from_text(result.stdout)
+        # Multi-byte characters can be split across tokens, so decoding must not fail on them
+        with open(json_path, "r", encoding="utf-8", errors="replace") as f:
+            return TranscriptSegments.from_whisper_json(json.load(f))
+    finally:
+        shutil.rmtree(output_dir, ignore_errors=True)
+
+def parse_timestamp(hours: str, minutes: str, seconds: str) -> float:
+    return int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+
+def format_timestamp(seconds: float) -> str:
+    milliseconds = int(round(seconds * 1000))
+    hours, milliseconds = divmod(milliseconds, 3600000)
+    minutes, milliseconds = divmod(milliseconds, 60000)
+    return f"{hours:02d}:{minutes:02d}:{milliseconds / 1000:06.3f}"
+
+def parse_whisper_output(output: str) -> list[tuple[float, float, str]]:
+    """Parses whisper.cpp stdout into (start, end, text) tuples, times in seconds."""
+    segments = []
+    for line in output.splitlines():
+        match = SEGMENT_LINE_PATTERN.match(line.strip())
+        if match:
+            start = parse_timestamp(*match.group(1, 2, 3))
+            end = parse_timestamp(*match.group(4, 5, 6))
+            segments.append((start, end, match.group(7).strip()))
+    return segments
+
+def format_segments(segments: list[tuple[float, float, str]]) -> str:
+    """Formats (start, end, text) tuples the same way whisper.cpp prints them."""
+    return "\n".join(
+        f"[{format_timestamp(start)} --> {format_timestamp(end)}]  {text}"
+        for start, end, text in segments
+    )
+
+class TranscriptSegments:
+    """
+    Timestamped transcript segments stored as parallel arrays.
+
+    Start and end times are int32 milliseconds, and the texts are one string sliced by
+    an offsets array (segment i is text[offsets[i]:offsets[i + 1]]), so a long meeting
+    costs a few bytes per segment instead of a tuple and a string object each.
+    """
+
+    __slots__ = ("starts", "ends", "offsets", "text", "language")
+
+    def __init__(self, starts: np.ndarray, ends: np.ndarray, offsets: np.ndarray, text: str, language: str = None):
+        self.starts = starts
+        self.ends = ends
+        self.offsets = offsets
+        self.text = text
+        self.language = language
+
+    @classmethod
+    def from_segments(cls, segments: list[tuple[float, float, str]], language: str = None) -> "TranscriptSegments":
+        """Builds the arrays from (start, end, text) tuples, times in seconds."""
+        texts = [text for _, _, text in segments]
+        offsets = np.zeros(len(texts) + 1, dtype=np.int64)
+        np.cumsum([len(text) for text in texts], out=offsets[1:])
+        return cls(
+            np.array([round(start * 1000) for start, _, _ in segments], dtype=np.int32),
+            np.array([round(end * 1000) for _, end, _ in segments], dtype=np.int32),
+            offsets,
+            "".join(texts),
+            language,
+        )
+
+    @classmethod
+    def from_text(cls, text: str, language: str = None) -> "TranscriptSegments":
+        """Parses text in whisper.cpp's timestamped line format (no segments for other text)."""
+        return cls.from_segments(parse_whisper_output(text), language)
+
+    @classmethod
+    def from_whisper_json(cls, data: dict) -> "TranscriptSegments":
+        """Reads the output of whisper.cpp's -oj option."""
+        segments = [
+            (item["offsets"]["from"] / 1000, item["offsets"]["to"] / 1000, item["text"].strip())
+            for item in data.get("transcription", [])
+        ]
+        language = data.get("result", {}).get("language")
+        return cls.from_segments([segment for segment in segments if segment[2]], language)
+
+    @classmethod
+    def from_server_json(cls, data: dict, duration: float) -> "TranscriptSegments":
+        """Reads the verbose_json response of the whisper.cpp server."""
+        language = data.get("language")
+        language = WHISPER_LANGUAGE_CODES.get(language, language)
+        if "segments" not in data:
+            # Servers without verbose_json support only return the text
+            text = data.get("text", "").strip()
+            return cls.from_segments([(0.0, duration, text)] if text else [], language)
+        segments = [(item["start"], item["end"], item["text"].strip()) for item in data["segments"]]
+        return cls.from_segments([segment for segment in segments if segment[2]], language)
+
+    @classmethod
+    def from_json(cls, value: str) -> "TranscriptSegments":
+        """Reverses to_json."""
+        data = json.loads(value)
+        return cls(
+            np.array(data["starts"], dtype=np.int32),
+            np.array(data["ends"], dtype=np.int32),
+            np.array(data["offsets"], dtype=np.int64),
+            data["text"],
+            data.get("language"),
+        )
+
+    def to_json(self) -> str:
+        return json.dumps({
+            "language": self.language,
+            "starts": self.starts.tolist(),
+            "ends": self.ends.tolist(),
+            "offsets": self.offsets.tolist(),
+            "text": self.text,
+        })
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def __getitem__(self, index: int) -> tuple[float, float, str]:
+        return (
+            int(self.starts[index]) / 1000,
+            int(self.ends[index]) / 1000,
+            self.text[self.offsets[index]:self.offsets[index + 1]],
+        )
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+    def to_text(self) -> str:
+        """Formats the segments the same way whisper.cpp prints them."""
+        return format_segments(self)
+
+    def chunks(self, max_chars: int, overlap_chars: int = 0) -> list[tuple[float, float, str]]:
+        """
+        Groups consecutive segments into chunks of at most `max_chars` characters of
+        formatted lines, never cutting a segment. Each chunk repeats the trailing segments
+        of the previous one that fit in `overlap_chars`.
+
+        Returns:
+            list[tuple[float, float, str]]: (start, end, text) of each chunk, times in seconds.
+        """
+        lines = self.to_text().split("\n") if len(self) else []
+        chunks = []
+        first = 0
+        while first < len(lines):
+            # Take whole lines while they fit (always at least one)
+            last, size = first, len(lines[first])
+            while last + 1 < len(lines) and size + 1 + len(lines[last + 1]) <= max_chars:
+                last += 1
+                size += 1 + len(lines[last])
+            chunks.append((int(self.starts[first]) / 1000, int(self.ends[last]) / 1000, "\n".join(lines[first:last + 1])))
+            if last + 1 >= len(lines):
+                break
+
+            # Step back over the lines that fit in the overlap, but always move forward
+            next_first, overlap = last + 1, 0
+            while next_first - 1 > first and overlap + len(lines[next_first - 1]) + 1 <= overlap_chars:
+                next_first -= 1
+                overlap += len(lines[next_first]) + 1
+            first = next_first
+        return chunks
+
+def _normalize_word(word: str) -> str:
+    return re.sub(r"[^\w]", "", word.lower())
+
+def drop_repeated_prefix(previous_text: str, text: str, max_words: int = 30) -> str:
+    """
+    Removes the words at the start of `text` that repeat the end of `previous_text`.
+
+    Consecutive segments share a little audio, so the first words of a segment are often
+    the last words of the one before it. The longest matching run (ignoring case and
+    punctuation) is dropped.
+    """
+    previous_words = [_normalize_word(w) for w in previous_text.split()[-max_words:]]
+    words = text.split()
+    normalized = [_normalize_word(w) for w in words[:max_words]]
+    for length in range(min(len(previous_words), len(normalized)), 0, -1):
+        if previous_words[-length:] == normalized[:length]:
+            return " ".join(words[length:])
+    return text
+
+def stitch_segments(results: list[tuple[float, float, list[tuple[float, float, str]]]]) -> list[tuple[float, float, str]]:
+    """
+    Merges per-segment whisper output into one timeline.
+
+    Args:
+        results: For each audio segment in order, its start time, its cut point and the
+            segments whisper produced for it (times relative to the segment start).
+
+    Returns:
+        list[tuple[float, float, str]]: (start, end, text) with times relative to the recording.
+    """
+    stitched = []
+    for segment_start, cut_point, segments in results:
+        for start, end, text in segments:
+            start, end = start + segment_start, end + segment_start
+            # Speech that ends before the cut was already transcribed by the previous segment
+            if stitched and end <= cut_point:
+                continue
+            if stitched and start < cut_point:
+                text = drop_repeated_prefix(stitched[-1][2], text)
+            if text:
+                stitched.append((start, end, text))
+    return stitched
+
+def transcribe_segmented(
+    audio_file_wav: str,
+    whisper_model_name: str,
+    workers: int = None,
+    threads_per_worker: int = WHISPER_THREADS_PER_WORKER,
+    target_seconds: float = SEGMENT_TARGET_SECONDS,
+    overlap_seconds: float = SEGMENT_OVERLAP_SECONDS,
+    work_dir: str = None,
+) -> TranscriptSegments:
+    """
+    Transcribes a long recording by splitting it at silences and running several
+    whisper.cpp processes at once.
+
+    Args:
+        audio_file_wav (str): Path to a 16kHz mono WAV file.
+        whisper_model_name (str): Name of the Whisper model.
+        workers (int): Concurrent whisper processes; defaults to CPU cores / threads_per_worker.
+        threads_per_worker (int): Threads given to each whisper process.
+        target_seconds (float): Approximate length of each segment.
+        overlap_seconds (float): Audio shared by consecutive segments.
+        work_dir (str): Directory for the temporary segment files; system temp when omitted.
+
+    Returns:
+        TranscriptSegments: The stitched segments, times relative to the recording.
+    """
+    if workers is None:
+        workers = max(1, (os.cpu_count() or 1) // threads_per_worker)
+
+    segment_dir = tempfile.mkdtemp(prefix="whisper_segments_", dir=work_dir)
+    try:
+        audio_segments = split_wav_at_silences(audio_file_wav, segment_dir, target_seconds, overlap_seconds)
+
+        def transcribe(segment):
+            segment_path, segment_start, cut_point = segment
+            return segment_start, cut_point, run_whisper(
+                segment_path, whisper_model_name, threads=threads_per_worker, work_dir=segment_dir
+            )
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(in_current_context(transcribe), audio_segments))
+    finally:
+        shutil.rmtree(segment_dir, ignore_errors=True)
+
+    # Segments are detected independently; the language most of them agree on wins
+    languages = Counter(segments.language for _, _, segments in results if segments.language)
+    language = languages.most_common(1)[0][0] if languages else None
+    return TranscriptSegments.from_segments(stitch_segments(results), language)
+
+def transcribe_audio(audio_file_wav: str, whisper_model_name: str, work_dir: str = None) -> TranscriptSegments:
+    """
+    Transcribes a WAV file, switching to segmented parallel transcription for recordings
+    longer than SEGMENTED_MIN_SECONDS.
+    """
+    if get_wav_duration(audio_file_wav) >= SEGMENTED_MIN_SECONDS:
+        return transcribe_segmented(audio_file_wav, whisper_model_name, work_dir=work_dir)
+    return run_whisper(audio_file_wav, whisper_model_name, work_dir=work_dir)
@@ -0,0 +1,229 @@
+import atexit
+import os
+import socket
+import subprocess
+import threading
+import time
+import requests
+from .metrics import span, set_gauge
+from .rag_app.resources import get_resource
+
+# whisper.cpp HTTP server binary; without it transcription runs the command-line binary per file
+WHISPER_SERVER_BINARY = os.environ.get("WHISPER_SERVER_BINARY", "./whisper.cpp/server")
+# Set WHISPER_POOL=0 to always use the command-line binary
+WHISPER_POOL_ENABLED = os.environ.get("WHISPER_POOL", "1") != "0"
+
+# Warm worker pool settings
+WHISPER_POOL_IDLE_SECONDS = 600          # Servers unused this long are stopped
+WHISPER_POOL_MEMORY_LIMIT_MB = int(os.environ.get("WHISPER_POOL_MEMORY_LIMIT_MB", "8192"))  # Budget for resident models
+WHISPER_SERVER_THREADS = 4               # Threads given to each server unless the caller asks for others
+# Servers kept per model and thread count; by default as many as the CPU cores can keep busy
+WHISPER_POOL_MAX_REPLICAS = int(os.environ["WHISPER_POOL_MAX_REPLICAS"]) if os.environ.get("WHISPER_POOL_MAX_REPLICAS") else None
+WHISPER_SERVER_START_TIMEOUT = 120       # Seconds allowed for a server to load its model
+WHISPER_REQUEST_TIMEOUT = 3600           # Seconds allowed for one transcription
+
+class WhisperPoolError(Exception):
+    """Raised when a whisper server cannot be started or fails a request."""
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+class WhisperServer:
+    """One whisper.cpp server process with a model loaded, serving one request at a time."""
+
+    def __init__(self, model_name: str, model_path: str, threads: int = WHISPER_SERVER_THREADS):
+        self.model_name = model_name
+        self.threads = threads
+        self.size_mb = os.path.getsize(model_path) / (1024 * 1024)
+        self.port = _free_port()
+        self.url = f"http://127.0.0.1:{self.port}"
+        self.busy = False
+        self.last_used = time.monotonic()
+        self.session = requests.Session()
+        self.process = subprocess.Popen(
+            [
+                WHISPER_SERVER_BINARY, "-m", model_path, "--host", "127.0.0.1",
+                "--port", str(self.port), "-t", str(threads), "-l", "auto",
+            ],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        self._wait_until_ready()
+
+    def _wait_until_ready(self):
+        deadline = time.monotonic() + WHISPER_SERVER_START_TIMEOUT
+        with span("whisper_server_start", model=self.model_name):
+            while time.monotonic() < deadline:
+                if self.process.poll() is not None:
+                    raise WhisperPoolError(f"whisper server for {self.model_name} exited with code {self.process.returncode}")
+                try:
+                    self.session.get(self.url, timeout=1)
+                    return
+                except requests.ConnectionError:
+                    time.sleep(0.1)
+        self.close()
+        raise WhisperPoolError(f"whisper server for {self.model_name} did not start within {WHISPER_SERVER_START_TIMEOUT}s")
+
+    def transcribe(self, audio_file_wav: str) -> dict:
+        """Returns the server's verbose_json response for a WAV file."""
+        with open(audio_file_wav, "rb") as f:
+            response = self.session.post(
+                f"{self.url}/inference",
+                files={"file": (os.path.basename(audio_file_wav), f, "audio/wav")},
+                data={"response_format": "verbose_json", "temperature": "0.0"},
+                timeout=(5, WHISPER_REQUEST_TIMEOUT),
+            )
+        if response.status_code != 200:
+            raise WhisperPoolError(f"whisper server for {self.model_name} failed: {response.text[:200]}")
+        return response.json()
+
+    @property
+    def alive(self) -> bool:
+        return self.process.poll() is None
+
+    def close(self):
+        self.session.close()
+        if self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+
+class WhisperPool:
+    """
+    Persistent whisper.cpp servers keyed by model and thread count, so a model is loaded
+    from disk once instead of on every file.
+
+    Requests go to an idle server with the same model and thread count. When all of them
+    are busy, another one is started, up to `max_replicas` (by default CPU cores / threads)
+    and within the memory budget (approximated by the size of the model files). Every
+    replica holds its own copy of the model, so with large models the budget, not the
+    cores, limits how many requests run at once. Servers idle for more than
+    `idle_seconds` are stopped; the least recently used idle servers are stopped earlier
+    when a new model needs their memory.
+    """
+
+    def __init__(
+        self,
+        memory_limit_mb: float = WHISPER_POOL_MEMORY_LIMIT_MB,
+        idle_seconds: float = WHISPER_POOL_IDLE_SECONDS,
+        max_replicas: int = WHISPER_POOL_MAX_REPLICAS,
+    ):
+        self.memory_limit_mb = memory_limit_mb
+        self.idle_seconds = idle_seconds
+        self.max_replicas = max_replicas
+        self._servers = []
+        self._starting_mb = 0.0
+        self._starting = {}               # (model, threads) -> servers being started
+        self._condition = threading.Condition()
+        self._closed = False
+        threading.Thread(target=self._reap_idle, daemon=True, name="whisper-pool").start()
+        atexit.register(self.shutdown)
+
+    def _resident_mb(self) -> float:
+        return sum(server.size_mb for server in self._servers) + self._starting_mb
+
+    def _evict(self, needed_mb: float) -> bool:
+        # Called with the condition held; stops idle servers until `needed_mb` fits
+        idle = sorted((s for s in self._servers if not s.busy), key=lambda s: s.last_used)
+        while self._resident_mb() + needed_mb > self.memory_limit_mb and idle:
+            server = idle.pop(0)
+            self._servers.remove(server)
+            server.close()
+        return self._resident_mb() + needed_mb <= self.memory_limit_mb
+
+    def _replica_limit(self, threads: int) -> int:
+        if self.max_replicas:
+            return self.max_replicas
+        return max(1, (os.cpu_count() or 1) // threads)
+
+    def _acquire(self, model_name: str, model_path: str, threads: int) -> WhisperServer:
+        size_mb = os.path.getsize(model_path) / (1024 * 1024)
+        key = (model_name, threads)
+        with self._condition:
+            while True:
+                if self._closed:
+                    raise WhisperPoolError("The whisper pool is shut down")
+                self._servers = [s for s in self._servers if s.alive or s.busy]
+                servers = [s for s in self._servers if (s.model_name, s.threads) == key]
+                for server in servers:
+                    if not server.busy:
+                        server.busy = True
+                        return server
+                # A model larger than the whole budget still gets a server when nothing else runs
+                replicas = len(servers) + self._starting.get(key, 0)
+                if replicas < self._replica_limit(threads) and (self._evict(size_mb) or not self._servers):
+                    self._starting_mb += size_mb
+                    self._starting[key] = self._starting.get(key, 0) + 1
+                    break
+                self._condition.wait()
+
+        # Load the model outside the lock, so other models stay available meanwhile
+        server = None
+        try:
+            server = WhisperServer(model_name, model_path, threads)
+        finally:
+            with self._condition:
+                self._starting_mb -= size_mb
+                self._starting[key] -= 1
+                if server is not None:
+                    server.busy = True
+                    self._servers.append(server)
+                    self._update_gauge()
+                self._condition.notify_all()
+        return server
+
+    def _release(self, server: WhisperServer):
+        with self._condition:
+            server.busy = False
+            server.last_used = time.monotonic()
+            self._condition.notify_all()
+
+    def transcribe(self, model_name: str, model_path: str, audio_file_wav: str, threads: int = None) -> dict:
+        """
+        Transcribes a WAV file on a warm server for `model_name` running `threads` threads
+        (WHISPER_SERVER_THREADS when omitted), starting one if needed.
+        """
+        server = self._acquire(model_name, model_path, threads or WHISPER_SERVER_THREADS)
+        try:
+            return server.transcribe(audio_file_wav)
+        finally:
+            self._release(server)
+
+    def warm_models(self) -> list[str]:
+        """Returns the models that currently have a running server."""
+        with self._condition:
+            return sorted({s.model_name for s in self._servers if s.alive})
+
+    def _update_gauge(self):
+        set_gauge("meeting_whisper_servers", len(self._servers))
+
+    def _reap_idle(self):
+        while not self._closed:
+            time.sleep(min(60, self.idle_seconds))
+            with self._condition:
+                now = time.monotonic()
+                for server in [s for s in self._servers if not s.busy and now - s.last_used > self.idle_seconds]:
+                    self._servers.remove(server)
+                    server.close()
+                self._update_gauge()
+                self._condition.notify_all()
+
+    def shutdown(self):
+        with self._condition:
+            self._closed = True
+            servers, self._servers = self._servers, []
+            self._condition.notify_all()
+        for server in servers:
+            server.close()
+
+def whisper_pool_available() -> bool:
+    """Whether transcription should go through the warm server pool."""
+    return WHISPER_POOL_ENABLED and os.path.exists(WHISPER_SERVER_BINARY)
+
+def get_whisper_pool() -> WhisperPool:
+    """Returns the process-wide whisper server pool, creating it on first use."""
+    return get_resource(("whisper_pool",), WhisperPool)
@@ -0,0 +1,48 @@
+"""
+Compares two benchmark result files written by run_benchmarks.py:
+
+    python -m benchmarks.compare baseline.json candidate.json --threshold 0.10
+
+Prints the change in each stage's latency and exits with status 1 when any stage got
+slower than the threshold allows.
+"""
+import argparse
+import json
+import sys
+
+def load_results(path: str) -> tuple[dict, dict]:
+    with open(path) as f:
+        report = json.load(f)
+    results = {(r["scenario"], r["stage"]): r for r in report["results"]}
+    return report, results
+
+def compare(baseline_path: str, candidate_path: str, metric: str = "p50", threshold: float = 0.10) -> bool:
+    baseline_report, baseline = load_results(baseline_path)
+    candidate_report, candidate = load_results(candidate_path)
+    print(f"baseline  {baseline_report['revision'][:12]}  {baseline_report['timestamp']}")
+    print(f"candidate {candidate_report['revision'][:12]}  {candidate_report['timestamp']}")
+    print(f"{'scenario':>20} {'stage':<24} {'baseline':>12} {'candidate':>12} {'change':>9}")
+
+    regressed = False
+    for key in sorted(baseline.keys() & candidate.keys()):
+        before = baseline[key]["latency_ms"][metric]
+        after = candidate[key]["latency_ms"][metric]
+        change = (after - before) / before if before else 0.0
+        flag = ""
+        if change > threshold:
+            flag = "  REGRESSION"
+            regressed = True
+        print(f"{key[0]:>20} {key[1]:<24} {before:10.1f}ms {after:10.1f}ms {change:+8.1%}{flag}")
+
+    for key in sorted(baseline.keys() ^ candidate.keys()):
+        print(f"{key[0]:>20} {key[1]:<24} only in {'baseline' if key in baseline else 'candidate'}")
+    return not regressed
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files.")
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--metric", default="p50", choices=["p50", "p90", "p99", "mean", "min", "max"])
+    parser.add_argument("--threshold", type=float, default=0.10, help="Allowed slowdown before failing (0.10 = 10%%).")
+    args = parser.parse_args()
+    sys.exit(0 if compare(args.baseline, args.candidate, args.metric, args.threshold) else 1)
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Stand-in for the whisper.cpp `main` and `server` binaries used by the benchmarks.
+
+As `main`, it accepts the arguments the backend passes (-m, -f, -t, --language, -oj,
+-of), reads the duration of the WAV file and prints synthetic segments in whisper.cpp's
+timestamped format, also writing them as whisper.cpp's JSON output when -oj is given.
+With --port it behaves like `server` instead and answers POST /inference with
+verbose_json.
+
+FAKE_WHISPER_LOAD_SECONDS is the time spent "loading the model" at startup (once per
+file for `main`, once per process for `server`). FAKE_WHISPER_REALTIME_FACTOR controls
+how long it "computes" per second of audio (0.05 = 20x faster than real time).
+"""
+import argparse
+import io
+import json
+import os
+import random
+import time
+import wave
+from email.parser import BytesParser
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+WORDS = (
+    "audit budget review control finding risk owner deadline action item revenue "
+    "compliance report evidence sample approval policy meeting team quarter"
+).split()
+
+def format_timestamp(seconds: float) -> str:
+    milliseconds = int(round(seconds * 1000))
+    hours, milliseconds = divmod(milliseconds, 3600000)
+    minutes, milliseconds = divmod(milliseconds, 60000)
+    return f"{hours:02d}:{minutes:02d}:{milliseconds / 1000:06.3f}"
+
+def load_model():
+    time.sleep(float(os.environ.get("FAKE_WHISPER_LOAD_SECONDS", "0")))
+
+def fake_segments(wav_file) -> list[tuple[float, float, str]]:
+    """Computes synthetic (start, end, text) segments for a WAV file path or file object."""
+    with wave.open(wav_file, "rb") as wav:
+        duration = wav.getnframes() / wav.getframerate()
+
+    time.sleep(duration * float(os.environ.get("FAKE_WHISPER_REALTIME_FACTOR", "0.01")))
+
+    rng = random.Random(int(duration * 1000))
+    segments, start = [], 0.0
+    while start < duration:
+        end = min(duration, start + 5.0)
+        text = " ".join(rng.choice(WORDS) for _ in range(12)).capitalize() + "."
+        segments.append((start, end, text))
+        start = end
+    return segments
+
+class _InferenceHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def do_POST(self):
+        if self.path != "/inference":
+            self.send_error(404)
+            return
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        form = BytesParser().parsebytes(f"Content-Type: {self.headers['Content-Type']}\r\n\r\n".encode() + body)
+        audio = next(
+            part.get_payload(decode=True) for part in form.get_payload()
+            if part.get_param("name", header="content-disposition") == "file"
+        )
+        segments = fake_segments(io.BytesIO(audio))
+        body = json.dumps({
+            "task": "transcribe",
+            "language": "english",
+            "text": " ".join(text for _, _, text in segments),
+            "segments": [
+                {"id": i, "start": start, "end": end, "text": " " + text}
+                for i, (start, end, text) in enumerate(segments)
+            ],
+        }).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-m", dest="model")
+    parser.add_argument("-f", dest="file")
+    parser.add_argument("-t", dest="threads", type=int, default=4)
+    parser.add_argument("-l", "--language", default="auto")
+    parser.add_argument("-oj", dest="output_json", action="store_true")
+    parser.add_argument("-of", dest="output_file")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int)
+    args, _ = parser.parse_known_args()
+
+    load_model()
+
+    if args.port:
+        # whisper.cpp's server handles one inference at a time
+        server = HTTPServer((args.host, args.port), _InferenceHandler)
+        server.serve_forever()
+        return
+
+    transcription = []
+    for start, end, text in fake_segments(args.file):
+        print(f"[{format_timestamp(start)} --> {format_timestamp(end)}]  {text}")
+        transcription.append({
+            "timestamps": {"from": format_timestamp(start).replace(".", ","), "to": format_timestamp(end).replace(".", ",")},
+            "offsets": {"from": int(start * 1000), "to": int(end * 1000)},
+            "text": " " + text,
+        })
+
+    if args.output_json:
+        output_file = args.output_file or args.file
+        with open(output_file + ".json", "w", encoding="utf-8") as f:
+            json.dump({"result": {"language": "en"}, "transcription": transcription}, f)
+
+if __name__ == "__main__":
+    main()
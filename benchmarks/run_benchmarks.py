@@ -0,0 +1,302 @@
+"""
+End-to-end benchmark for the meeting pipeline with stubbed whisper.cpp and Ollama.
+
+Runs translate_and_summarize, populate_database.main and query_rag against synthetic
+transcripts of increasing size inside a throwaway working directory, then writes
+per-stage latency percentiles, throughput and peak RSS as JSON:
+
+    python -m benchmarks.run_benchmarks --output bench.json
+    python -m benchmarks.compare baseline.json bench.json
+"""
+import argparse
+import hashlib
+import json
+import os
+import platform
+import random
+import resource
+import shutil
+import socket
+import stat
+import subprocess
+import sys
+import tempfile
+import time
+import wave
+
+import numpy as np
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, REPO_ROOT)
+
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000]
+DEFAULT_QUERIES = [
+    "What were the action items?",
+    "Who owns the budget decision?",
+    "Which risks were discussed?",
+]
+WORDS = (
+    "the audit team reviewed the budget and agreed that the revenue controls need more "
+    "evidence before the quarter closes while the owner of each finding will report back "
+    "on the deadline and the approval policy for the sample"
+).split()
+
+class HashEmbeddings:
+    """Deterministic feature-hashing embeddings, so the benchmark does not download a model."""
+
+    def __init__(self, dimension: int = 384):
+        self.dimension = dimension
+
+    def _embed(self, text: str) -> list[float]:
+        vector = np.zeros(self.dimension, dtype=np.float32)
+        for word in text.lower().split():
+            digest = hashlib.blake2b(word.encode("utf-8"), digest_size=8).digest()
+            vector[int.from_bytes(digest[:4], "little") % self.dimension] += 1.0
+        norm = np.linalg.norm(vector)
+        return (vector / norm if norm else vector).tolist()
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> list[float]:
+        return self._embed(text)
+
+def synthetic_transcript(size: int, seed: int = 0) -> str:
+    """Builds a transcript of roughly `size` characters in whisper.cpp's line format."""
+    rng = random.Random(seed)
+    lines, length, start = [], 0, 0.0
+    while length < size:
+        text = " ".join(rng.choice(WORDS) for _ in range(rng.randint(8, 20))).capitalize() + "."
+        end = start + len(text) / 15
+        line = f"[{time.strftime('%H:%M:%S', time.gmtime(start))}.000 --> {time.strftime('%H:%M:%S', time.gmtime(end))}.000]  {text}"
+        lines.append(line)
+        length += len(line) + 1
+        start = end
+    return "\n".join(lines)[:size]
+
+def write_meeting_wav(path: str, seconds: float, sample_rate: int = 16000, talk_seconds: float = 12, pause_seconds: float = 6):
+    """
+    Writes a 16 kHz mono WAV alternating loud noise ("speech") and quiet noise (pauses),
+    so silence detection and removal have work to do.
+    """
+    rng = np.random.default_rng(0)
+    samples = rng.standard_normal(int(seconds * sample_rate))
+    period = int((talk_seconds + pause_seconds) * sample_rate)
+    talking = np.arange(len(samples)) % period < talk_seconds * sample_rate
+    samples = (samples * np.where(talking, 3000, 20)).astype(np.int16)
+    with wave.open(path, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.writeframes(samples.tobytes())
+
+def peak_rss_mb() -> dict:
+    # ru_maxrss is reported in KiB on Linux and bytes on macOS
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return {
+        "self": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale,
+        "children": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / scale,
+    }
+
+def summarize_latencies(samples: list[float]) -> dict:
+    values = np.array(samples) * 1000
+    return {
+        "p50": float(np.percentile(values, 50)),
+        "p90": float(np.percentile(values, 90)),
+        "p99": float(np.percentile(values, 99)),
+        "mean": float(values.mean()),
+        "min": float(values.min()),
+        "max": float(values.max()),
+    }
+
+def record(results: list, scenario: str, stage: str, size: int, samples: list[float]):
+    latency = summarize_latencies(samples)
+    results.append({
+        "scenario": scenario,
+        "stage": stage,
+        "size_chars": size,
+        "iterations": len(samples),
+        "latency_ms": latency,
+        "throughput_chars_per_s": size / (latency["mean"] / 1000) if latency["mean"] else None,
+        "peak_rss_mb": peak_rss_mb(),
+    })
+    print(f"{scenario:>18} {stage:<24} p50={latency['p50']:9.1f} ms  p90={latency['p90']:9.1f} ms")
+
+def timed(fn, *args, **kwargs) -> tuple[float, object]:
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+def clear_artifact_cache():
+    shutil.rmtree(os.path.join("data", "cache"), ignore_errors=True)
+
+def setup_workdir(workdir: str):
+    """Lays out the relative paths the backend expects, with the fake whisper binary."""
+    models_dir = os.path.join(workdir, "whisper.cpp", "models")
+    os.makedirs(models_dir)
+    open(os.path.join(models_dir, "ggml-bench.bin"), "wb").close()
+    # The same script stands in for both the command-line binary and the server
+    for name in ("main", "server"):
+        binary = os.path.join(workdir, "whisper.cpp", name)
+        with open(binary, "w") as f:
+            f.write(f'#!/bin/sh\nexec "{sys.executable}" "{os.path.join(REPO_ROOT, "benchmarks", "fake_whisper.py")}" "$@"\n')
+        os.chmod(binary, os.stat(binary).st_mode | stat.S_IEXEC)
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=REPO_ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def run(args) -> dict:
+    # Importing anything from the backend reads OLLAMA_SERVER_URL, so it is set first
+    port = free_port()
+    os.environ["OLLAMA_SERVER_URL"] = f"http://127.0.0.1:{port}"
+    os.environ["FAKE_WHISPER_REALTIME_FACTOR"] = str(args.whisper_realtime_factor)
+    os.environ["FAKE_WHISPER_LOAD_SECONDS"] = str(args.whisper_load_seconds)
+    if args.no_whisper_pool:
+        os.environ["WHISPER_POOL"] = "0"
+    if args.no_chat_sessions:
+        os.environ["CHAT_SESSIONS"] = "0"
+    if args.no_silence_removal:
+        os.environ["SILENCE_REMOVAL"] = "0"
+
+    from backend.fake_ollama_server import start_fake_ollama_server
+
+    server = start_fake_ollama_server(
+        address=("127.0.0.1", port),
+        response_tokens=args.response_tokens,
+        prompt_token_latency=args.prompt_token_latency,
+        token_latency=args.token_latency,
+    )
+
+    from backend.rag_app.resources import get_resource
+    from backend.rag_app.get_embedding_function import EMBEDDING_MODEL_NAME
+    from backend.summarizer import translate_and_summarize
+    from backend import populate_database
+    from backend.rag_app.query_rag import query_rag
+    from backend.rag_app.get_chroma_db import get_meeting_id
+    from backend.rag_app.semantic_cache import semantic_cache
+
+    if not args.real_embeddings:
+        get_resource(("embedding", EMBEDDING_MODEL_NAME), HashEmbeddings)
+
+    llm_model = "llama3.2:latest"
+    results = []
+    workdir = tempfile.mkdtemp(prefix="meeting_bench_")
+    previous_cwd = os.getcwd()
+    try:
+        setup_workdir(workdir)
+        os.chdir(workdir)
+
+        for size in args.sizes:
+            transcript = synthetic_transcript(size, seed=size)
+            scenario = f"transcript_{size}"
+            pipeline, ingest, queries, chat_turns, prompt_evals = [], [], [], [], []
+
+            for iteration in range(args.iterations):
+                clear_artifact_cache()
+                elapsed, (_, transcript_path) = timed(
+                    translate_and_summarize, transcript, "", "bench", llm_model, is_transcript=True,
+                    transcript_path=os.path.join("data", "transcripts", f"{scenario}_{iteration}.txt"),
+                )
+                pipeline.append(elapsed)
+
+                # Re-ingest under a fresh meeting ID so every chunk is embedded again
+                elapsed, _ = timed(populate_database.main, transcript_path, meeting_id=f"{scenario}_ingest_{iteration}")
+                ingest.append(elapsed)
+
+                for query in args.queries:
+                    elapsed, _ = timed(query_rag, transcript_path, query, [])
+                    queries.append(elapsed)
+
+                # The same questions as one conversation, where chat sessions reuse the model's
+                # context between turns; the standalone answers must not be served from the cache
+                semantic_cache.invalidate_meeting(get_meeting_id(transcript_path))
+                history = []
+                for query in args.queries:
+                    elapsed, response = timed(query_rag, transcript_path, query, history, f"{scenario}_chat_{iteration}")
+                    chat_turns.append(elapsed)
+                    if response.prompt_eval is not None:
+                        prompt_evals.append(response.prompt_eval.seconds)
+
+            record(results, scenario, "translate_and_summarize", size, pipeline)
+            record(results, scenario, "populate_database", size, ingest)
+            record(results, scenario, "query_rag", size, queries)
+            record(results, scenario, "chat_turn", size, chat_turns)
+            if prompt_evals:
+                record(results, scenario, "chat_prompt_eval", size, prompt_evals)
+
+        # Already in whisper's format, so the audio scenario does not need ffmpeg
+        if args.audio_seconds:
+            audio_path = os.path.join(workdir, "meeting.wav")
+            write_meeting_wav(audio_path, args.audio_seconds)
+            samples = []
+            for iteration in range(args.iterations):
+                clear_artifact_cache()
+                elapsed, _ = timed(
+                    translate_and_summarize, audio_path, "", "bench", llm_model,
+                    transcript_path=os.path.join("data", "transcripts", f"audio_{iteration}.txt"),
+                )
+                samples.append(elapsed)
+            record(results, f"audio_{int(args.audio_seconds)}s", "translate_and_summarize", os.path.getsize(audio_path), samples)
+    finally:
+        os.chdir(previous_cwd)
+        server.shutdown()
+        if not args.keep_workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    return {
+        "revision": git_revision(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": {
+            "sizes": args.sizes,
+            "iterations": args.iterations,
+            "queries": len(args.queries),
+            "response_tokens": args.response_tokens,
+            "prompt_token_latency": args.prompt_token_latency,
+            "token_latency": args.token_latency,
+            "whisper_realtime_factor": args.whisper_realtime_factor,
+            "whisper_load_seconds": args.whisper_load_seconds,
+            "whisper_pool": not args.no_whisper_pool,
+            "chat_sessions": not args.no_chat_sessions,
+            "silence_removal": not args.no_silence_removal,
+            "audio_seconds": args.audio_seconds,
+            "real_embeddings": args.real_embeddings,
+            "vector_backend": os.environ.get("VECTOR_BACKEND", "chroma"),
+        },
+        "results": results,
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the pipeline with stubbed whisper.cpp and Ollama.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="Transcript sizes in characters.")
+    parser.add_argument("--iterations", type=int, default=3, help="Repetitions per size.")
+    parser.add_argument("--queries", nargs="+", default=DEFAULT_QUERIES, help="Questions asked after each ingestion.")
+    parser.add_argument("--response-tokens", type=int, default=40, help="Tokens streamed by the fake Ollama server.")
+    parser.add_argument("--prompt-token-latency", type=float, default=0.0, help="Fake prompt evaluation seconds per token.")
+    parser.add_argument("--token-latency", type=float, default=0.001, help="Fake seconds between streamed tokens.")
+    parser.add_argument("--whisper-realtime-factor", type=float, default=0.01, help="Fake whisper seconds per audio second.")
+    parser.add_argument("--whisper-load-seconds", type=float, default=0.5, help="Fake whisper model load time.")
+    parser.add_argument("--no-whisper-pool", action="store_true", help="Run the whisper binary per file instead of warm servers.")
+    parser.add_argument("--no-chat-sessions", action="store_true", help="Send every chat question as a standalone prompt.")
+    parser.add_argument("--audio-seconds", type=float, default=0, help="Also run a recording of this length (one third pauses).")
+    parser.add_argument("--no-silence-removal", action="store_true", help="Transcribe recordings without cutting silences.")
+    parser.add_argument("--real-embeddings", action="store_true", help="Use the real embedding model instead of hashing.")
+    parser.add_argument("--keep-workdir", action="store_true", help="Keep the temporary working directory.")
+    parser.add_argument("--output", default="bench_results.json", help="Where to write the JSON results.")
+    args = parser.parse_args()
+
+    report = run(args)
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}")
@@ -1,27 +1,81 @@
+import time
 import gradio as gr
 from backend.model_services import get_available_models, get_available_whisper_models
-from backend.summarizer import translate_and_summarize
-from backend.rag_app.query_rag import query_rag
+from backend.jobs import get_job_manager, QueueFullError
+from backend.rag_app.query_rag import stream_query_rag
+from backend.live import start_live_session, get_live_session, stop_live_session
+
+# Seconds between status checks while a meeting is being processed; short enough
+# for the streamed summary to appear as it is generated
+JOB_POLL_INTERVAL = 0.25
+
+# Function to format the status shown while a job is queued or running
+def format_job_status(job, queue_position: int) -> str:
+    if job.status == "queued":
+        return f"⏳ Queued ({queue_position} meeting(s) ahead)"
+    return f"⏳ {job.stage}... {int(job.progress * 100)}%"
 
 # Function to handle summarization and return transcript file path
-def gradio_app(file, context: str, whisper_model_name: str, llm_model_name: str) -> tuple[str, gr.File]:
-    if file.endswith(".txt"):
-        with open(file, "r") as f:
-            transcript = f.read().strip()
-        summary, transcript_file = translate_and_summarize(
-            transcript, context, whisper_model_name, llm_model_name, is_transcript=True
-        )
-    else:
-        summary, transcript_file = translate_and_summarize(
-            file, context, whisper_model_name, llm_model_name
-        )
-    return summary, gr.update(value=transcript_file, visible=True)
+def gradio_app(file, context: str, whisper_model_name: str, llm_model_name: str):
+    manager = get_job_manager()
+    try:
+        if file.endswith(".txt"):
+            with open(file, "r") as f:
+                transcript = f.read().strip()
+            job_id = manager.submit(transcript, context, whisper_model_name, llm_model_name, is_transcript=True)
+        else:
+            job_id = manager.submit(file, context, whisper_model_name, llm_model_name)
+    except QueueFullError as e:
+        raise gr.Error(str(e))
+
+    # Poll the background job and show its progress, then the summary as it streams in
+    try:
+        while True:
+            job = manager.get(job_id)
+            if job.status == "done":
+                yield job.summary, gr.update(value=job.transcript_path, visible=True)
+                return
+            if job.status == "failed":
+                raise gr.Error(f"Processing failed: {job.error}")
+            if job.status == "cancelled":
+                yield "Cancelled.", gr.update()
+                return
+            yield job.partial_summary or format_job_status(job, manager.queue_position(job_id)), gr.update()
+            time.sleep(JOB_POLL_INTERVAL)
+    finally:
+        # Stopping the event (Stop button or closed tab) also stops the job on the server
+        manager.cancel(job_id)
 
 # Function to handle chat queries to the transcript
-def chat_with_transcript(transcript_file, query_text, history):
-    response = query_rag(transcript_file, query_text, history).response_text
+def chat_with_transcript(transcript_file, query_text, history, request: gr.Request):
+    # Each browser session keeps its own conversation memory
+    thread_id = request.session_hash if request else "1"
+    # Stream the answer into the chat while it is generated
+    pending = list(history) + [{"role": "user", "content": query_text}]
+    for partial_text in stream_query_rag(transcript_file, query_text, history, thread_id):
+        yield pending + [{"role": "assistant", "content": partial_text}], ""
     # Return updated history and clear input
-    return history, ""  # History is updated within query_rag
+    yield history, ""  # History is updated within stream_query_rag
+
+# Functions to transcribe and summarize a meeting live from the microphone
+def start_live(context: str, whisper_model_name: str, llm_model_name: str, request: gr.Request):
+    session = start_live_session(request.session_hash, whisper_model_name, llm_model_name, context)
+    return "🎙️ Listening...", "", gr.update(value=session.transcript_path, visible=True)
+
+def stream_live(audio_chunk, request: gr.Request):
+    session = get_live_session(request.session_hash)
+    if session is None or audio_chunk is None:
+        return gr.update(), gr.update()
+    sample_rate, samples = audio_chunk
+    session.feed(samples, sample_rate)
+    status = f"⚠️ {session.error}\n\n" if session.error else ""
+    return status + (session.summary or "🎙️ Listening..."), session.transcript_text()
+
+def stop_live(request: gr.Request):
+    session = stop_live_session(request.session_hash)
+    if session is None:
+        return gr.update(), gr.update()
+    return session.summary, session.transcript_text()
 
 # Function to clear the inputs and outputs
 def clear_all():
@@ -33,9 +87,23 @@ def update_clear_button(file, summary, history):
         return gr.update(interactive=True)
     return gr.update(interactive=False)
 
+# Function to fill the summarization model list once a page has loaded
+def load_ollama_models():
+    try:
+        ollama_models = get_available_models()
+    except Exception as e:
+        gr.Warning(f"Could not reach the Ollama server: {e}")
+        return gr.update(choices=[], value=None)
+    return gr.update(choices=ollama_models, value=ollama_models[0] if ollama_models else None)
+
+# Function to refresh the whisper model list, so models warmed since startup are labelled
+def load_whisper_models():
+    return gr.update(choices=get_available_whisper_models())
+
 # Function to create and configure the Gradio interface
 def create_gradio_interface():
-    ollama_models = get_available_models()
+    # Only the local whisper models are listed here; the Ollama models are fetched after
+    # the page loads, so building the interface never waits on the network
     whisper_models = get_available_whisper_models()
 
     with gr.Blocks() as app:
@@ -53,16 +121,19 @@ def create_gradio_interface():
                 whisper_model_dropdown = gr.Dropdown(
                     choices=whisper_models,
                     label="Select a Whisper model for audio-to-text conversion",
-                    value=whisper_models[0] if whisper_models else None,
+                    value=whisper_models[0][1] if whisper_models else None,
                 )
                 ollama_model_dropdown = gr.Dropdown(
-                    choices=ollama_models,
+                    choices=[],
                     label="Select a model for summarization",
-                    value=ollama_models[0] if ollama_models else None,
                 )
                 submit_button = gr.Button("Submit")
                 clear_button = gr.Button("Clear", interactive=False)  # Initially disabled
 
+                with gr.Accordion("Live meeting", open=False):
+                    live_audio = gr.Audio(sources=["microphone"], streaming=True, type="numpy", label="Record the meeting")
+                    live_transcript = gr.Textbox(label="Live Transcript", lines=8, max_lines=8, autoscroll=True)
+
             with gr.Column():
                 summary_output = gr.Textbox(label="Summary", show_copy_button=True)
                 transcript_download = gr.File(label="Download Transcript", visible=False)
@@ -71,20 +142,44 @@ def create_gradio_interface():
                 chat_history = gr.Chatbot(label="Chatbot", type="messages")
                 user_query_input = gr.Textbox(label="Your Question", placeholder="Ask about the transcript content")
                 query_button = gr.Button("Ask")
+                stop_button = gr.Button("Stop")
+
+        app.load(fn=load_ollama_models, inputs=None, outputs=ollama_model_dropdown)
+        app.load(fn=load_whisper_models, inputs=None, outputs=whisper_model_dropdown)
 
-        submit_button.click(
+        # The job manager bounds the real work, so polling handlers can run concurrently
+        submit_event = submit_button.click(
             fn=gradio_app,
             inputs=[file_input, context_input, whisper_model_dropdown, ollama_model_dropdown],
-            outputs=[summary_output, transcript_download]
+            outputs=[summary_output, transcript_download],
+            concurrency_limit=None,
         )
 
         # Initialize an empty history list for managing conversation context
-        query_button.click(
+        query_event = query_button.click(
             fn=chat_with_transcript,
             inputs=[transcript_download, user_query_input, gr.State([])],  # Initialize history as an empty list
             outputs=[chat_history, user_query_input]
         )
 
+        # The summary, transcript and chat index follow the recording window by window
+        live_audio.start_recording(
+            fn=start_live,
+            inputs=[context_input, whisper_model_dropdown, ollama_model_dropdown],
+            outputs=[summary_output, live_transcript, transcript_download],
+        )
+        live_audio.stream(
+            fn=stream_live,
+            inputs=[live_audio],
+            outputs=[summary_output, live_transcript],
+            stream_every=1.0,
+            concurrency_limit=None,
+        )
+        live_audio.stop_recording(fn=stop_live, inputs=None, outputs=[summary_output, live_transcript])
+
+        # Cancelling a streaming event closes its generator, which stops generation on the server
+        stop_button.click(fn=None, inputs=None, outputs=None, cancels=[submit_event, query_event])
+
         clear_button.click(
             fn=clear_all,
             inputs=[],
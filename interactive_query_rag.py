@@ -1,12 +1,28 @@
-from backend.rag_app.query_rag import query_rag
+import argparse
+import os
+
+parser = argparse.ArgumentParser(description="Chat with a meeting transcript.")
+parser.add_argument("--transcript", default=os.path.join("data", "transcript.txt"), help="Transcript the questions are about.")
+parser.add_argument("--meeting-id", default=None, help="Meeting to chat about (defaults to the transcript file name).")
+args = parser.parse_args()
 
 print("Chat with the transcript (type 'exit' to quit):")
+
+# Imported after the prompt is shown; the RAG stack loads its models on the first question
+from backend.rag_app.query_rag import query_rag
+
+history = []
 while True:
     query = input("You: ")
     if query.lower() == 'exit':
         break
     try:
-        response = query_rag(query)
-        print("Response:", response)
+        response = query_rag(args.transcript, query, history, meeting_id=args.meeting_id)
+        print("Response:", response.response_text)
+        if response.prompt_eval is not None:
+            print(
+                f"(prompt eval: {response.prompt_eval.tokens} new tokens in {response.prompt_eval.seconds:.2f} s, "
+                f"{response.prompt_eval.reused_tokens} reused)"
+            )
     except Exception as e:
-        print("An error occurred:", e)
\ No newline at end of file
+        print("An error occurred:", e)
@@ -1,5 +1,62 @@
-from frontend.app import create_gradio_interface
+import argparse
+import subprocess
+import sys
+import threading
+import time
+from backend.metrics import start_metrics_server, METRICS_PORT
+
+def profile_imports(modules: list[str], top: int = 20):
+    """
+    Imports `modules` in a fresh interpreter with `-X importtime` and prints the total
+    import time and the slowest imports, to catch dependencies creeping onto the startup path.
+    """
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "; ".join(f"import {module}" for module in modules)],
+        capture_output=True,
+        text=True,
+    )
+    elapsed = time.perf_counter() - start
+
+    rows = []
+    for line in result.stderr.splitlines():
+        # Lines look like "import time:  self [us] | cumulative | imported package"
+        if not line.startswith("import time:"):
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        if self_us.strip().isdigit():
+            rows.append((int(cumulative_us), int(self_us), name.rstrip()))
+
+    print(f"Importing {', '.join(modules)} took {elapsed:.2f} s (interpreter start included)")
+    print(f"{'cumulative ms':>14} {'self ms':>9}  module")
+    for cumulative_us, self_us, name in sorted(rows, reverse=True)[:top]:
+        print(f"{cumulative_us / 1000:14.1f} {self_us / 1000:9.1f} {name}")
+    if result.returncode != 0:
+        print(result.stderr.splitlines()[-1])
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--skip-warmup", action="store_true", help="Do not preload the embedding and chat models.")
+    parser.add_argument("--metrics-port", type=int, default=METRICS_PORT, help="Port of the Prometheus /metrics endpoint (0 disables it).")
+    parser.add_argument(
+        "--profile-imports", nargs="*", metavar="MODULE", default=None,
+        help="Print where import time goes for the given modules (default: the app) and exit.",
+    )
+    args = parser.parse_args()
+
+    if args.profile_imports is not None:
+        profile_imports(args.profile_imports or ["frontend.app"])
+        sys.exit(0)
+
+    from frontend.app import create_gradio_interface
+    from backend.rag_app.resources import warmup_resources
+
+    if args.metrics_port:
+        start_metrics_server(args.metrics_port)
+
+    if not args.skip_warmup:
+        # Load the shared models in the background while the UI starts
+        threading.Thread(target=warmup_resources, daemon=True).start()
+
     iface = create_gradio_interface()
-    iface.launch(debug=True)
\ No newline at end of file
+    iface.launch(debug=True)
@@ -0,0 +1,26 @@
+import pytest
+from backend import populate_database
+from backend.rag_app import get_chroma_db as chroma_db
+from backend.rag_app.get_embedding_function import EMBEDDING_MODEL_NAME
+from backend.rag_app.resources import get_resource, invalidate_resources
+from benchmarks.run_benchmarks import HashEmbeddings, synthetic_transcript
+
+@pytest.fixture
+def vector_store(tmp_path, monkeypatch):
+    """Runs the test in tmp_path with NumPy vector stores and hashed embeddings (no model download)."""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(chroma_db, "VECTOR_BACKEND", "numpy")
+    get_resource(("embedding", EMBEDDING_MODEL_NAME), HashEmbeddings)
+    yield tmp_path
+
+    invalidate_resources("embedding")
+    invalidate_resources("numpy_store")
+
+@pytest.fixture
+def meeting(vector_store):
+    """Indexes one synthetic meeting; returns its ID and transcript path."""
+    transcript_path = vector_store / "data" / "transcripts" / "weekly_sync.txt"
+    transcript_path.parent.mkdir(parents=True)
+    transcript_path.write_text(synthetic_transcript(4000, seed=1), encoding="utf-8")
+    populate_database.main(str(transcript_path))
+    return "weekly_sync", transcript_path
@@ -0,0 +1,73 @@
+import numpy as np
+import pytest
+from backend.audio_processing import SILENCE_PADDING_SECONDS, TimeMap, frame_energy, remove_silences
+from backend.transcription import TranscriptSegments
+
+SAMPLE_RATE = 16000
+
+@pytest.fixture
+def time_map():
+    # Kept: 0-5 s of the recording, then 8-12 s (3 s removed); trimmed audio joins them at 5 s
+    return TimeMap(np.array([0, 5000], dtype=np.int64), np.array([0, 8000], dtype=np.int64), 3.0)
+
+@pytest.mark.parametrize("output_ms, source_ms", [
+    (0, 0),
+    (4999, 4999),
+    (5000, 8000),       # A start at the join belongs to the stretch after it
+    (5001, 8001),
+    (9000, 12000),
+])
+def test_to_source_starts(time_map, output_ms, source_ms):
+    assert time_map.to_source(output_ms) == source_ms
+
+@pytest.mark.parametrize("output_ms, source_ms", [
+    (4999, 4999),
+    (5000, 5000),       # An end at the join belongs to the stretch before it
+    (5001, 8001),
+])
+def test_to_source_ends(time_map, output_ms, source_ms):
+    assert time_map.to_source(output_ms, ends=True) == source_ms
+
+def test_remap_segments_around_removed_span(time_map):
+    segments = TranscriptSegments.from_segments([
+        (1.0, 5.0, "Before the pause."),
+        (5.0, 6.5, "After the pause."),
+        (4.5, 5.5, "Across the join."),
+    ], language="en")
+
+    remapped = time_map.remap(segments)
+
+    assert remapped.starts.tolist() == [1000, 8000, 4500]
+    assert remapped.ends.tolist() == [5000, 9500, 8500]
+    assert remapped.text == segments.text
+    assert remapped.language == "en"
+
+def test_identity_remap_returns_segments():
+    segments = TranscriptSegments.from_segments([(1.0, 2.0, "Hello.")])
+
+    assert TimeMap.identity().remap(segments) is segments
+
+def test_remove_silences_maps_back_to_recording():
+    rng = np.random.default_rng(0)
+    samples = rng.normal(0, 3000, 10 * SAMPLE_RATE).astype(np.int16)
+    samples[3 * SAMPLE_RATE:8 * SAMPLE_RATE] = 0
+
+    trimmed, time_map = remove_silences(samples, SAMPLE_RATE)
+
+    assert time_map.removed_seconds == pytest.approx(5 - 2 * SILENCE_PADDING_SECONDS, abs=0.05)
+    assert len(trimmed) == len(samples) - round(time_map.removed_seconds * SAMPLE_RATE)
+    join = int(time_map.output_starts[1])
+    # Padding is kept on both sides of the removed span
+    assert time_map.to_source(join - 1) == pytest.approx((3 + SILENCE_PADDING_SECONDS) * 1000, abs=50)
+    assert time_map.to_source(join) == pytest.approx((8 - SILENCE_PADDING_SECONDS) * 1000, abs=50)
+    assert time_map.to_source(len(trimmed) * 1000 // SAMPLE_RATE, ends=True) == 10000
+
+def test_frame_energy_spans_blocks():
+    samples = np.full(25 * SAMPLE_RATE, 1000, dtype=np.int16)
+    samples[12 * SAMPLE_RATE:] = -2000
+
+    energy = frame_energy(samples, SAMPLE_RATE)
+
+    assert energy.shape == (25 * 1000 // 30,)
+    assert energy[0] == pytest.approx(1000)
+    assert energy[-1] == pytest.approx(2000)
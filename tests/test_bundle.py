@@ -0,0 +1,72 @@
+import numpy as np
+import pytest
+from backend import bundle
+from backend.bundle import BundleError, export_meeting, import_meeting, read_bundle
+from backend.rag_app.get_chroma_db import get_chroma_db
+
+# Largest component error each storage type may add to unit-length embeddings
+TOLERANCES = {"float32": 1e-6, "float16": 1e-3, "int8": 1e-2}
+
+def _normalized(vectors) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+@pytest.mark.parametrize("quantization", bundle.BUNDLE_QUANTIZATIONS)
+def test_round_trip(meeting, tmp_path, quantization):
+    meeting_id, transcript_path = meeting
+    original = get_chroma_db(meeting_id).get(include=["embeddings", "documents", "metadatas"])
+
+    header = export_meeting(meeting_id, str(tmp_path / "meeting.bundle"), summary="Budget approved.", quantization=quantization)
+    assert header["dtype"] == quantization
+    assert header["count"] == len(original["ids"])
+
+    result = import_meeting(str(tmp_path / "meeting.bundle"), meeting_id="copy", transcripts_dir=str(tmp_path / "imported"))
+    assert result["chunks_added"] == len(original["ids"])
+
+    imported = get_chroma_db("copy").get(include=["embeddings", "documents", "metadatas"])
+    assert imported["ids"] == [chunk_id.replace(f"{meeting_id}:", "copy:", 1) for chunk_id in original["ids"]]
+    assert imported["documents"] == original["documents"]
+    assert all(metadata["meeting_id"] == "copy" for metadata in imported["metadatas"])
+    error = np.abs(_normalized(imported["embeddings"]) - _normalized(original["embeddings"])).max()
+    assert error <= TOLERANCES[quantization]
+
+    assert (tmp_path / "imported" / "copy.txt").read_text(encoding="utf-8") == transcript_path.read_text(encoding="utf-8")
+
+def test_reimport_is_incremental(meeting, tmp_path):
+    meeting_id, _ = meeting
+    export_meeting(meeting_id, str(tmp_path / "meeting.bundle"))
+
+    result = import_meeting(str(tmp_path / "meeting.bundle"), transcripts_dir=str(tmp_path / "imported"))
+
+    assert (result["chunks_added"], result["chunks_deleted"]) == (0, 0)
+
+def test_checksum_mismatch_is_rejected(meeting, tmp_path):
+    meeting_id, _ = meeting
+    path = tmp_path / "meeting.bundle"
+    export_meeting(meeting_id, str(path))
+    header = read_bundle(str(path)).header
+
+    # Flip one byte inside the embeddings section
+    data = bytearray(path.read_bytes())
+    header_length = int.from_bytes(data[len(bundle.BUNDLE_MAGIC):len(bundle.BUNDLE_MAGIC) + 8], "little")
+    data_start = bundle._align(bundle.BUNDLE_PREAMBLE + header_length)
+    data[data_start + header["sections"]["embeddings"]["offset"] + 3] ^= 0xFF
+    path.write_bytes(bytes(data))
+
+    with pytest.raises(BundleError, match="Checksum mismatch in section embeddings"):
+        read_bundle(str(path))
+    with pytest.raises(BundleError, match="Checksum mismatch"):
+        import_meeting(str(path), meeting_id="copy", transcripts_dir=str(tmp_path / "imported"))
+    assert get_chroma_db("copy").get(include=[])["ids"] == []
+
+def test_nested_meeting_id_round_trip(meeting, tmp_path):
+    meeting_id, transcript_path = meeting
+    export_meeting(meeting_id, str(tmp_path / "meeting.bundle"))
+
+    # Backfilled meetings are identified by their relative path
+    result = import_meeting(str(tmp_path / "meeting.bundle"), meeting_id="2024/q1/audit", transcripts_dir=str(tmp_path / "imported"))
+    assert result["transcript_path"] == str(tmp_path / "imported" / "2024" / "q1" / "audit.txt")
+
+    header = export_meeting("2024/q1/audit", str(tmp_path / "nested.bundle"), transcript_path=result["transcript_path"])
+    assert header["meeting_id"] == "2024/q1/audit"
+    assert header["count"] == len(get_chroma_db(meeting_id).get(include=[])["ids"])
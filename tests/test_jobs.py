@@ -0,0 +1,50 @@
+import threading
+import time
+from backend import jobs
+from backend.jobs import JobManager
+from backend.metrics import render_prometheus
+
+def _wait_until_finished(manager: JobManager, job_ids: list[str], timeout: float = 5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if all(manager.get(job_id).finished for job_id in job_ids):
+            return
+        time.sleep(0.01)
+    raise AssertionError("jobs did not finish")
+
+def test_cancelled_queued_job_leaves_queue_gauge(monkeypatch):
+    release = threading.Event()
+
+    def translate_and_summarize(*args, **kwargs):
+        release.wait(5)
+        return "Summary.", "transcript.txt"
+
+    monkeypatch.setattr(jobs, "translate_and_summarize", translate_and_summarize)
+    manager = JobManager(max_workers=1)
+    try:
+        running = manager.submit("text", "", "base", "llama3.2", is_transcript=True)
+        queued = manager.submit("text", "", "base", "llama3.2", is_transcript=True)
+        manager.cancel(queued)
+        release.set()
+        _wait_until_finished(manager, [running, queued])
+    finally:
+        manager.shutdown()
+
+    assert manager.get(running).status == "done"
+    assert manager.get(queued).status == "cancelled"
+    assert "meeting_jobs_queued 0\n" in render_prometheus()
+
+def test_job_fails_instead_of_hanging_when_setup_fails(monkeypatch):
+    def failing_mkdtemp(*args, **kwargs):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(jobs.tempfile, "mkdtemp", failing_mkdtemp)
+    manager = JobManager(max_workers=1)
+    try:
+        job_id = manager.submit("text", "", "base", "llama3.2", is_transcript=True)
+        _wait_until_finished(manager, [job_id])
+    finally:
+        manager.shutdown()
+
+    assert manager.get(job_id).status == "failed"
+    assert manager.get(job_id).error == "disk full"
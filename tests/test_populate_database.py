@@ -0,0 +1,42 @@
+from langchain.schema import Document
+from backend.populate_database import split_documents
+
+WHISPER_TRANSCRIPT = """[00:00:00.000 --> 00:00:04.000]  Welcome everyone to the audit committee.
+[00:00:04.000 --> 00:00:09.500]  Let us start with the quarterly numbers.
+"""
+
+def _document(text: str) -> Document:
+    return Document(page_content=text, metadata={"source": "meeting.txt", "meeting_id": "meeting"})
+
+def test_whisper_transcript_is_chunked_by_segments():
+    chunks = split_documents([_document(WHISPER_TRANSCRIPT)])
+
+    assert len(chunks) == 1
+    assert chunks[0].metadata["start"] == 0.0
+    assert chunks[0].metadata["end"] == 9.5
+    assert "quarterly numbers" in chunks[0].page_content
+
+def test_mixed_transcript_keeps_lines_without_timestamps():
+    text = (
+        "Audit committee meeting, minutes\n"
+        + WHISPER_TRANSCRIPT
+        + "The CFO approved the 2M budget for Q3.\n"
+        + "[00:00:09.500 --> 00:00:12.000]  Any other business?\n"
+    )
+
+    chunks = split_documents([_document(text)])
+    content = "\n".join(chunk.page_content for chunk in chunks)
+
+    assert "Audit committee meeting, minutes" in content
+    assert "The CFO approved the 2M budget for Q3." in content
+    assert "Any other business?" in content
+    assert all("start" not in chunk.metadata for chunk in chunks)
+
+def test_plain_text_is_split_by_characters():
+    text = "The board discussed the budget. " * 60
+
+    chunks = split_documents([_document(text)])
+
+    assert len(chunks) > 1
+    assert all(len(chunk.page_content) <= 600 for chunk in chunks)
+    assert all(chunk.metadata["meeting_id"] == "meeting" for chunk in chunks)
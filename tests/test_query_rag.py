@@ -0,0 +1,36 @@
+from backend import populate_database
+from backend.rag_app import query_rag
+from backend.rag_app.query_rag import PreparedQuery, prepare_query
+from benchmarks.run_benchmarks import synthetic_transcript
+
+def test_prepare_query_uses_explicit_meeting_id(vector_store):
+    # A backfilled meeting whose ID is not its file name
+    transcript_path = vector_store / "archive" / "2024" / "q1" / "audit.txt"
+    transcript_path.parent.mkdir(parents=True)
+    transcript_path.write_text(synthetic_transcript(3000, seed=2), encoding="utf-8")
+    populate_database.main(str(transcript_path), meeting_id="2024/q1/audit")
+
+    by_file_name = prepare_query(str(transcript_path), "What was decided about the budget?", [])
+    by_meeting_id = prepare_query(str(transcript_path), "What was decided about the budget?", [], meeting_id="2024/q1/audit")
+
+    assert by_file_name.response_text == "No relevant information found."
+    assert by_meeting_id.meeting_id == "2024/q1/audit"
+    assert by_meeting_id.prompt is not None
+    transcript = transcript_path.read_text(encoding="utf-8")
+    assert by_meeting_id.context_text
+    assert all(line in transcript for line in by_meeting_id.context_text.splitlines())
+
+def test_finish_query_folds_memory_in_session_mode(monkeypatch):
+    updates = []
+
+    class Memory:
+        def update(self, history):
+            updates.append(list(history))
+
+    monkeypatch.setattr(query_rag, "CHAT_SESSIONS_ENABLED", True)
+    monkeypatch.setattr(query_rag, "get_conversation_memory", lambda thread_id: Memory())
+    history = []
+
+    query_rag.finish_query(PreparedQuery(None, [], "Answer."), "Question?", "Answer.", history, "thread")
+
+    assert updates == [[{"role": "user", "content": "Question?"}, {"role": "assistant", "content": "Answer."}]]
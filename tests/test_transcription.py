@@ -0,0 +1,84 @@
+import os
+import sys
+import pytest
+import numpy as np
+from backend import transcription
+from backend.audio_processing import find_silence_split_points, write_wav_samples
+from backend.transcription import stitch_segments
+
+SAMPLE_RATE = 16000
+
+def test_stitch_drops_phrase_repeated_across_overlap():
+    # The second segment starts one second before the cut at 10 s and hears the end of the first again
+    results = [
+        (0.0, 0.0, [
+            (0.0, 4.0, "Welcome everyone to the audit."),
+            (4.0, 10.2, "Let us review the quarterly numbers"),
+        ]),
+        (9.0, 10.0, [
+            (0.0, 0.9, "quarterly numbers"),
+            (0.9, 4.0, "Quarterly numbers, and the cash flow statement."),
+            (4.0, 6.0, "The quarterly numbers look fine."),
+        ]),
+    ]
+
+    stitched = stitch_segments(results)
+
+    assert [text for _, _, text in stitched] == [
+        "Welcome everyone to the audit.",
+        "Let us review the quarterly numbers",
+        "and the cash flow statement.",
+        # Speech after the cut is new, even when it repeats earlier words
+        "The quarterly numbers look fine.",
+    ]
+    assert stitched[2][:2] == pytest.approx((9.9, 13.0))
+
+def test_stitch_keeps_segment_without_repeated_words():
+    results = [
+        (0.0, 0.0, [(0.0, 10.1, "First part")]),
+        (9.0, 10.0, [(0.8, 3.0, "second part")]),
+    ]
+
+    assert [text for _, _, text in stitch_segments(results)] == ["First part", "second part"]
+
+def test_split_points_fall_in_silences():
+    rng = np.random.default_rng(0)
+    samples = rng.normal(0, 3000, 30 * SAMPLE_RATE).astype(np.int16)
+    # Pauses near the 10 s and 20 s targets
+    samples[int(9.4 * SAMPLE_RATE):int(9.8 * SAMPLE_RATE)] = 0
+    samples[int(21.0 * SAMPLE_RATE):int(21.5 * SAMPLE_RATE)] = 0
+
+    cuts = find_silence_split_points(samples, SAMPLE_RATE, target_seconds=10, search_seconds=2)
+
+    assert len(cuts) == 2
+    assert 9.4 * SAMPLE_RATE <= cuts[0] <= 9.8 * SAMPLE_RATE
+    assert 21.0 * SAMPLE_RATE <= cuts[1] <= 21.5 * SAMPLE_RATE
+
+def test_split_points_skip_short_audio():
+    samples = np.zeros(5 * SAMPLE_RATE, dtype=np.int16)
+
+    assert find_silence_split_points(samples, SAMPLE_RATE, target_seconds=10) == []
+
+def test_run_whisper_leaves_files_next_to_recording_alone(tmp_path, monkeypatch):
+    script = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks", "fake_whisper.py")
+    binary = tmp_path / "whisper"
+    binary.write_text(f'#!/bin/sh\nexec "{sys.executable}" "{script}" "$@"\n')
+    binary.chmod(0o755)
+    monkeypatch.setattr(transcription, "WHISPER_BINARY", str(binary))
+    monkeypatch.setattr(transcription, "whisper_pool_available", lambda: False)
+
+    # A recording already in whisper's format is transcribed in place
+    recording = tmp_path / "uploads" / "meeting.wav"
+    recording.parent.mkdir()
+    write_wav_samples(str(recording), np.zeros(3 * SAMPLE_RATE, dtype=np.int16), SAMPLE_RATE)
+    existing = recording.with_suffix(".json")
+    existing.write_text('{"notes": "not whisper output"}')
+    work_dir = tmp_path / "work"
+    work_dir.mkdir()
+
+    segments = transcription.run_whisper(str(recording), "base", work_dir=str(work_dir))
+
+    assert len(segments)
+    assert existing.read_text() == '{"notes": "not whisper output"}'
+    assert sorted(os.listdir(recording.parent)) == ["meeting.json", "meeting.wav"]
+    assert os.listdir(work_dir) == []